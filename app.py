@@ -1,132 +1,126 @@
 # File: app.py
 # Main application file for Upwork Job Analyzer Pro
 
-from config import GROQ_API_KEY
-from job_scraper import scrape_job_post
-from ui import setup_ui, sidebar_inputs, display_results
-from video_processor import VideoProcessor
-from rag_pipeline import RAGPipeline
-from langchain.docstore.document import Document
-import streamlit as st
+# Only Streamlit, config and the UI are imported at module load so the
+# page renders before LangChain, FAISS or the models are touched; the
+# analysis stack is imported when the first job is analyzed.
 
-# Import from proposal_generator
-from proposal_generator import extract_bullet_points, generate_human_sounding_proposal
+from config import GROQ_API_KEY, MODEL_WARMUP
+from contextlib import nullcontext
+from ui import setup_ui, sidebar_inputs, display_duplicate, display_results, display_trace
+import streamlit as st
 
 def main():
     # 1) Set up the UI layout
     setup_ui()
-    
-    # 2) Initialize required objects
-    vp = VideoProcessor()
-    rag = RAGPipeline()
 
-    # 3) Get sidebar inputs (existing code)
+    # 2) Get sidebar inputs (existing code)
     (
         job_url,
         video_input,
         uploaded_file,
         analyze_btn,
         selected_template,
-        custom_template_text
+        custom_template_text,
+        stream_output,
+        compare_tones,
+        profile
     ) = sidebar_inputs()
 
+    # 3) Start loading the configured models in the background (once per
+    #    process; the model registry keeps them across reruns)
+    from model_registry import warm_up_defaults
+    warm_up_defaults(MODEL_WARMUP)
+
     if analyze_btn:
         if not job_url:
             st.error("Please provide a job posting URL to analyze.")
             return
 
+        from rag_pipeline import RAGPipeline
+        from pipeline import (run_analysis, run_proposal, run_proposals, resolve_tone,
+            stream_analysis, stream_proposal)
+        from stage_scheduler import StageScheduler
+        from streaming import StageLatency, timed_stream
+        from scrape_cache import url_key
+        from llm_cache import install_llm_cache
+        from tracing import profile_run, start_trace
+
+        llm_cache = install_llm_cache()
+        rag = RAGPipeline()
+
         try:
-            with st.spinner("Deep Analysis in Progress..."):
-                # Prepare doc storage
-                docs = []
-                sources = {
-                    "job": {
-                        "title": "",
-                        "description": "",
-                        "links": [],
-                        "documents": []
-                    },
-                    "video": ""
-                }
-
-                # 4) Scrape job post
-                st.write("🔍 Deep Scanning Job Post...")
-                scraped_data = scrape_job_post(job_url)
-                if "error" in scraped_data:
-                    st.error(scraped_data["error"])
-                    return
-
-                # Put scraped info into 'sources'
-                sources["job"]["title"] = scraped_data["title"]
-                sources["job"]["description"] = scraped_data["description"]
-                sources["job"]["links"] = scraped_data["links"]
-                sources["job"]["documents"] = scraped_data["documents"]
-
-                docs.append(Document(
-                    page_content=sources["job"]["description"],
-                    metadata={"source": "job_post"}
-                ))
-
-                # 5) Check if video was provided
-                has_video = False
-                if video_input or uploaded_file:
-                    has_video = True
-                    st.write("🎬 Frame-by-Frame Video Analysis...")
-                    video_source = video_input or uploaded_file
-                    try:
-                        video_text = vp.transcribe_video(video_source)
-                        sources["video"] = video_text
-                        docs.append(Document(
-                            page_content=video_text,
-                            metadata={"source": "video"}
-                        ))
-                    except Exception as video_error:
-                        st.warning(f"Video processing failed: {str(video_error)}")
-
-                # 6) Build Knowledge Base & generate RAG analysis
-                st.write("🧠 Building Context-Aware Database...")
-                retriever = rag.create_knowledge_base(docs)
-
-                analysis_prompt = (
-                    "Analyze this job post and, if present, any video content to extract "
-                    "key requirements, client needs, and project goals. If no video is "
-                    "provided, ignore video references."
-                )
-                analysis = rag.generate_response(analysis_prompt, retriever)
-                analysis_text = analysis["answer"]  # the analysis from RAG
-
-                # 7) Convert the analysis text into bullet points
-                bullet_points = extract_bullet_points(analysis_text)
-
-                # 8) Decide the tone based on selected_template
-                #    If user picks "Default"/"Formal"/"Casual"/"Technical"/"Custom",
-                #    we can interpret that as a "tone" param.
-                #    - For "Custom" you might do something else, but let's treat "Custom"
-                #      as just 'default' or we can read custom_template_text if you want
-                #      to handle that. Below is an example.
-
-                tone_map = {
-                    "Default": "default",
-                    "Formal": "formal",
-                    "Casual": "casual",
-                    "Technical": "technical"
-                }
-                if selected_template in tone_map:
-                    chosen_tone = tone_map[selected_template]
-                else:
-                    chosen_tone = "default"  # fallback
-
-                # 9) Generate the final proposal
-                job_title = sources["job"]["title"] or "Client"
-                proposal = generate_human_sounding_proposal(
-                    bullet_points=bullet_points,
-                    job_title=job_title,
-                    has_video=has_video,
-                    tone=chosen_tone
-                )
-
-            # 10) Display final results (unchanged)
-            display_results(analysis, proposal, sources)
+            # Every stage below records a span in this trace; the panel is
+            # rendered once the streams have been consumed
+            with start_trace("analyze_job", url=job_url) as trace, \
+                    (profile_run(trace) if profile else nullcontext()):
+                with st.spinner("Deep Analysis in Progress..."):
+                    # 4-6) Scrape the job post and transcribe any video in parallel,
+                    #      embedding the description while Whisper runs
+                    has_video = bool(video_input or uploaded_file)
+                    job_id = url_key(job_url)
+                    stages = StageScheduler(rag).run(
+                        job_url,
+                        video_source=video_input or uploaded_file,
+                        job_id=job_id,
+                        on_progress=st.write
+                    )
+                    if stages.error:
+                        st.error(stages.error)
+                        return
+                    if stages.video_error:
+                        st.warning(f"Video processing failed: {stages.video_error}")
+                    sources = stages.sources
+                    retriever = stages.retriever
+                    if stages.duplicate:
+                        display_duplicate(stages.duplicate)
+                    if has_video:
+                        st.caption(f"Stages finished in {stages.timings['wall']:.1f}s "
+                                   f"({stages.serial_time:.1f}s if run one after another)")
+
+                    # 7) Decide the tone based on selected_template
+                    #    "Default"/"Formal"/"Casual"/"Technical" map to a tone;
+                    #    "Custom" falls back to the default tone.
+                    chosen_tone = resolve_tone(selected_template)
+
+                    def compare(analysis_text):
+                        # One analysis, one proposal per tone, generated concurrently
+                        results = run_proposals(analysis_text, sources,
+                                                [resolve_tone(t) for t in compare_tones],
+                                                has_video=has_video)
+                        return {t: results[resolve_tone(t)] for t in compare_tones}
+
+                    latencies = None
+                    if stream_output:
+                        # The LLM calls run as display_results consumes the streams.
+                        latencies = [StageLatency("analysis"), StageLatency("proposal")]
+                        analysis = timed_stream(
+                            stream_analysis(rag, sources, job_id=job_id, retriever=retriever,
+                                            duplicate=stages.duplicate), latencies[0]
+                        )
+                        proposal = compare if compare_tones else lambda analysis_text: timed_stream(
+                            stream_proposal(analysis_text, sources, tone=chosen_tone, has_video=has_video),
+                            latencies[1]
+                        )
+                    else:
+                        analysis = run_analysis(rag, sources, job_id=job_id, retriever=retriever,
+                                                duplicate=stages.duplicate)
+
+                        # 8) Generate the final proposal(s) from the analysis bullet points
+                        if compare_tones:
+                            proposal = compare(analysis["answer"])
+                        else:
+                            proposal = run_proposal(
+                                analysis["answer"], sources, tone=chosen_tone, has_video=has_video
+                            )
+
+                # 9) Display final results (streams render as tokens arrive)
+                display_results(analysis, proposal, sources, latencies)
+                if llm_cache is not None and llm_cache.metrics["hits"]:
+                    metrics = llm_cache.get_metrics()
+                    st.caption(f"LLM cache: {metrics['hits']} hits this session, saved "
+                               f"~{metrics['saved_tokens']} tokens and {metrics['saved_seconds']:.1f}s")
+            display_trace(trace)
 
         except Exception as e:
             st.error(f"Scraping Failed: {str(e)}")
@@ -0,0 +1,126 @@
+# File: async_scraper.py
+# Asyncio scraping engine with pooled keep-alive connections and a
+# per-host token-bucket rate limiter
+
+import asyncio
+
+import aiohttp
+
+from config import (get_headers, get_proxy, SCRAPE_RATE_LIMIT, SCRAPE_RATE_BURST,
+    SCRAPE_MAX_CONNECTIONS, SCRAPE_MAX_PER_HOST, SCRAPE_TIMEOUT)
+from job_scraper import parse_job_html, random_cookies, USE_DEFAULT_CACHE
+from rate_limiter import PerHostLimiter
+from scrape_cache import get_scrape_cache
+
+class AsyncScraper:
+    """Scrape job posts concurrently over a shared connection pool
+
+    Politeness comes from the per-host token bucket rather than a random
+    sleep before each request, so requests to different hosts proceed in
+    parallel and requests to the same host are spaced at `rate_per_host`.
+
+    Usage:
+        async with AsyncScraper() as scraper:
+            results = await scraper.scrape_many(urls)
+    """
+
+    def __init__(self, rate_per_host=SCRAPE_RATE_LIMIT, burst=SCRAPE_RATE_BURST,
+                 max_connections=SCRAPE_MAX_CONNECTIONS, max_per_host=SCRAPE_MAX_PER_HOST,
+                 timeout=SCRAPE_TIMEOUT, cache=USE_DEFAULT_CACHE):
+        self.cache = get_scrape_cache() if cache is USE_DEFAULT_CACHE else cache
+        self.limiter = PerHostLimiter(rate_per_host, burst)
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                cookies=random_cookies()
+            )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, url, headers=None):
+        """GET a page after waiting for the host's rate limit; returns the response"""
+        await self.open()
+        await self.limiter.acquire_async(url)
+        request_headers = get_headers()
+        if headers:
+            request_headers.update(headers)
+        proxy = None
+        if proxies := get_proxy():
+            proxy = proxies["https" if url.startswith("https") else "http"]
+        async with self._session.get(url, headers=request_headers, proxy=proxy) as response:
+            await response.read()
+            return response
+
+    async def scrape(self, url):
+        """Async equivalent of job_scraper.scrape_job_post"""
+        try:
+            cache = self.cache
+            entry = cache.lookup(url) if cache else None
+            if entry and not entry.expired:
+                return cache.hit(entry)
+            try:
+                response = await self.fetch(url, cache.conditional_headers(entry) if entry else None)
+            except asyncio.TimeoutError:
+                return {"error": f"Request timed out after {self.timeout:g} seconds"}
+            if entry and response.status == 304:
+                return cache.not_modified(url, entry)
+            if response.status >= 400:
+                return {"error": f"HTTP Error {response.status}: {response.reason}"}
+            html = await response.text()
+            # Parsing is CPU-bound; keep it off the event loop.
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, parse_job_html, html)
+            if cache:
+                cache.miss()
+                if "error" not in result:
+                    cache.store_page(
+                        url, html, result,
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified")
+                    )
+            return result
+        except Exception as e:
+            return {"error": f"Scraping failed: {str(e)}"}
+
+    async def scrape_many(self, urls, concurrency=None):
+        """Scrape urls concurrently, returning results in input order"""
+        semaphore = asyncio.Semaphore(concurrency or self.max_connections)
+
+        async def bounded(url):
+            async with semaphore:
+                return await self.scrape(url)
+
+        return await asyncio.gather(*(bounded(url) for url in urls))
+
+def scrape_many(urls, **kwargs):
+    """Synchronous wrapper around AsyncScraper.scrape_many"""
+    concurrency = kwargs.pop("concurrency", None)
+
+    async def run():
+        async with AsyncScraper(**kwargs) as scraper:
+            return await scraper.scrape_many(urls, concurrency=concurrency)
+
+    return asyncio.run(run())
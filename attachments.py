@@ -0,0 +1,275 @@
+# File: attachments.py
+# Downloads the documents and links found in a job post, extracts their
+# text in worker processes and caches it by URL and by content hash
+
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+from xml.etree import ElementTree
+
+import aiohttp
+
+from config import (get_headers, CACHE_DIR, SCRAPE_TIMEOUT, ATTACHMENTS_ENABLED,
+    ATTACHMENT_INCLUDE_LINKS, ATTACHMENT_MAX_COUNT, ATTACHMENT_MAX_MB, ATTACHMENT_MAX_CHARS,
+    ATTACHMENT_CONCURRENCY, ATTACHMENT_WORKERS, ATTACHMENT_TIME_BUDGET, ATTACHMENT_CACHE_ENABLED,
+    ATTACHMENT_CACHE_TTL, ATTACHMENT_CACHE_MAX_MB)
+from disk_cache import DiskCache
+from job_scraper import USE_DEFAULT_CACHE
+from scrape_cache import url_key
+from tracing import span
+
+EXTENSIONS = {
+    ".pdf": "pdf", ".docx": "docx", ".xlsx": "xlsx",
+    ".txt": "text", ".md": "text", ".csv": "text",
+    ".html": "html", ".htm": "html",
+}
+CONTENT_TYPES = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+    "text/html": "html",
+    "application/xhtml+xml": "html",
+    "text/plain": "text",
+    "text/csv": "text",
+    "text/markdown": "text",
+}
+_WORD = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_SHEET = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+
+def attachment_urls(scraped):
+    """URLs worth ingesting from a scrape_job_post result: documents first,
+    then (optionally) other links"""
+    if not ATTACHMENTS_ENABLED:
+        return []
+    urls = list(scraped.get("documents") or [])
+    if ATTACHMENT_INCLUDE_LINKS:
+        urls += scraped.get("links") or []
+    return list(dict.fromkeys(urls))[:ATTACHMENT_MAX_COUNT]
+
+def attachment_kind(url, content_type=""):
+    """pdf/docx/xlsx/html/text from the Content-Type, else the URL extension"""
+    mime = content_type.split(";")[0].strip().lower()
+    if mime in CONTENT_TYPES:
+        return CONTENT_TYPES[mime]
+    return EXTENSIONS.get(os.path.splitext(urlsplit(url).path)[1].lower())
+
+# --- text extraction (runs in the process pool) ---------------------------
+
+def _zip_xml(archive, name, max_bytes):
+    # Refuse members that inflate far beyond the download limit
+    if archive.getinfo(name).file_size > max_bytes:
+        raise ValueError(f"{name} is too large to extract")
+    return ElementTree.fromstring(archive.read(name))
+
+def _docx_text(data, max_bytes):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = _zip_xml(archive, "word/document.xml", max_bytes)
+    paragraphs = ("".join(t.text or "" for t in p.iter(_WORD + "t")) for p in root.iter(_WORD + "p"))
+    return "\n".join(p for p in paragraphs if p.strip())
+
+def _xlsx_text(data, max_bytes):
+    """One tab-separated line per non-empty row, sheet by sheet"""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = archive.namelist()
+        shared = []
+        if "xl/sharedStrings.xml" in names:
+            shared = ["".join(t.text or "" for t in si.iter(_SHEET + "t"))
+                      for si in _zip_xml(archive, "xl/sharedStrings.xml", max_bytes).iter(_SHEET + "si")]
+        sheets = sorted((n for n in names if re.fullmatch(r'xl/worksheets/sheet\d+\.xml', n)),
+                        key=lambda n: int(re.search(r'\d+', n).group()))
+        rows = []
+        for name in sheets:
+            for row in _zip_xml(archive, name, max_bytes).iter(_SHEET + "row"):
+                cells = []
+                for cell in row.iter(_SHEET + "c"):
+                    if cell.get("t") == "inlineStr":
+                        value = "".join(t.text or "" for t in cell.iter(_SHEET + "t"))
+                    else:
+                        v = cell.find(_SHEET + "v")
+                        value = (v.text or "") if v is not None else ""
+                        if cell.get("t") == "s" and value:
+                            value = shared[int(value)]
+                    if value:
+                        cells.append(value)
+                if cells:
+                    rows.append("\t".join(cells))
+    return "\n".join(rows)
+
+def _pdf_text(data):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ValueError("PDF attachments need pypdf (pip install pypdf)")
+    return "\n".join(page.extract_text() or "" for page in PdfReader(io.BytesIO(data)).pages)
+
+def _html_text(data):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(data, "html.parser")
+    for tag in soup(["script", "style", "noscript", "nav", "footer"]):
+        tag.decompose()
+    return soup.get_text("\n")
+
+def extract_text(data, kind, max_chars=ATTACHMENT_MAX_CHARS):
+    """Plain text of an attachment, at most max_chars characters"""
+    max_bytes = int(ATTACHMENT_MAX_MB * 1024 * 1024) * 10
+    if kind == "pdf":
+        text = _pdf_text(data)
+    elif kind == "docx":
+        text = _docx_text(data, max_bytes)
+    elif kind == "xlsx":
+        text = _xlsx_text(data, max_bytes)
+    elif kind == "html":
+        text = _html_text(data)
+    elif kind == "text":
+        text = data.decode("utf-8", errors="replace")
+    else:
+        raise ValueError(f"Unsupported attachment type: {kind}")
+    text = _BLANK_LINES.sub("\n\n", "\n".join(line.strip() for line in text.splitlines())).strip()
+    return text[:max_chars]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def extraction_pool(workers=ATTACHMENT_WORKERS):
+    """Long-lived process pool for text extraction, shared by all sessions"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max(1, workers),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+# --- cache -----------------------------------------------------------------
+
+class AttachmentCache:
+    """Extracted text keyed by content hash, plus URL -> hash entries
+
+    A fresh URL entry (younger than ttl) skips the download; a download
+    whose bytes were seen before (e.g. the same file under another URL)
+    skips extraction.
+    """
+
+    def __init__(self, path=None, ttl=ATTACHMENT_CACHE_TTL, max_bytes=ATTACHMENT_CACHE_MAX_MB * 1024 * 1024):
+        self.store = DiskCache(path or os.path.join(CACHE_DIR, "attachments.sqlite3"),
+                               max_bytes=max_bytes, ttl=ttl)
+
+    def by_url(self, url):
+        entry = self.store.get("url:" + url_key(url))
+        if entry is None or entry.expired:
+            return None
+        return self.by_hash(entry.meta["sha256"])
+
+    def by_hash(self, digest):
+        entry = self.store.get("sha256:" + digest)
+        if entry is None:
+            return None
+        return {"kind": entry.meta["kind"], "text": entry.value.decode("utf-8")}
+
+    def set(self, url, digest, kind, text):
+        # Text entries never expire by age; only the URL mapping does
+        self.store.set("sha256:" + digest, text.encode("utf-8"), {"kind": kind})
+        self.store.set("url:" + url_key(url), b"", {"sha256": digest})
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_attachment_cache():
+    """Process-wide attachment cache, or None when caching is disabled"""
+    global _default_cache
+    if not ATTACHMENT_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AttachmentCache()
+        return _default_cache
+
+# --- ingestion ---------------------------------------------------------------
+
+async def _download(session, url, max_bytes):
+    """GET url, refusing bodies larger than max_bytes; returns (bytes, content type)"""
+    async with session.get(url, headers=get_headers()) as response:
+        if response.status >= 400:
+            raise ValueError(f"HTTP Error {response.status}: {response.reason}")
+        if response.content_length and response.content_length > max_bytes:
+            raise ValueError(f"Larger than {ATTACHMENT_MAX_MB:g} MB")
+        data = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            data += chunk
+            if len(data) > max_bytes:
+                raise ValueError(f"Larger than {ATTACHMENT_MAX_MB:g} MB")
+        return bytes(data), response.headers.get("Content-Type", "")
+
+async def aingest_attachments(urls, budget=ATTACHMENT_TIME_BUDGET, cache=None,
+                              concurrency=ATTACHMENT_CONCURRENCY,
+                              max_bytes=int(ATTACHMENT_MAX_MB * 1024 * 1024)):
+    """Fetch and extract urls concurrently within `budget` seconds
+
+    Returns one dict per URL, in input order: {"url", "kind", "text",
+    "cached"} on success, {"url", "error"} otherwise. Attachments still
+    in flight when the budget runs out are reported with "skipped": True.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(session, url):
+        if cache is not None and (hit := cache.by_url(url)):
+            return {"url": url, **hit, "cached": True}
+        async with semaphore:
+            data, content_type = await _download(session, url, max_bytes)
+        kind = attachment_kind(url, content_type)
+        if kind is None:
+            raise ValueError(f"Unsupported attachment type: {content_type or url}")
+        digest = hashlib.sha256(data).hexdigest()
+        hit = cache.by_hash(digest) if cache is not None else None
+        if hit:
+            text = hit["text"]
+        else:
+            text = await loop.run_in_executor(extraction_pool(), extract_text, data, kind)
+        if cache is not None:
+            cache.set(url, digest, kind, text)
+        return {"url": url, "kind": kind, "text": text, "cached": bool(hit)}
+
+    timeout = aiohttp.ClientTimeout(total=SCRAPE_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        tasks = [asyncio.ensure_future(one(session, url)) for url in urls]
+        _, pending = await asyncio.wait(tasks, timeout=budget or None)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = []
+    for url, task in zip(urls, tasks):
+        if task in pending:
+            results.append({"url": url, "error": "Skipped: time budget exceeded", "skipped": True})
+        elif task.exception() is not None:
+            error = task.exception()
+            if isinstance(error, asyncio.TimeoutError):
+                error = f"Request timed out after {SCRAPE_TIMEOUT:g} seconds"
+            results.append({"url": url, "error": str(error)})
+        else:
+            results.append(task.result())
+    return results
+
+def ingest_attachments(urls, budget=ATTACHMENT_TIME_BUDGET, cache=USE_DEFAULT_CACHE):
+    """Synchronous wrapper around aingest_attachments, recorded as one span"""
+    if not urls:
+        return []
+    cache = get_attachment_cache() if cache is USE_DEFAULT_CACHE else cache
+    with span("attachments", urls=len(urls)) as stage:
+        results = asyncio.run(aingest_attachments(urls, budget=budget, cache=cache))
+        stage.set(
+            extracted=sum("text" in r for r in results),
+            cached=sum(bool(r.get("cached")) for r in results),
+            skipped=sum(bool(r.get("skipped")) for r in results),
+            failed=sum("error" in r and not r.get("skipped") for r in results),
+            chars=sum(len(r.get("text", "")) for r in results),
+        )
+    return results
@@ -0,0 +1,247 @@
+# File: batch_runner.py
+# Headless batch mode: analyze many job URLs through a bounded-concurrency
+# scrape -> analysis -> proposal pipeline and write results as JSONL.
+#
+# Usage:
+#   python batch_runner.py urls.txt -o results.jsonl
+#   cat urls.txt | python batch_runner.py - -o results.jsonl --scrape-workers 8
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from attachments import attachment_urls, ingest_attachments
+from config import (BATCH_SCRAPE_WORKERS, BATCH_ANALYSIS_WORKERS, BATCH_PROPOSAL_WORKERS,
+    BATCH_QUEUE_SIZE, SCRAPE_RATE_LIMIT, LLM_RATE_LIMIT)
+from job_scraper import scrape_job_post
+from llm_cache import install_llm_cache
+from pipeline import build_sources, run_analysis, run_proposal
+from rate_limiter import make_limiter
+from scrape_cache import url_key
+
+_DONE = object()
+
+def read_urls(path):
+    """Read one URL per line from a file ('-' for stdin), skipping blanks and comments"""
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        urls = []
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                urls.append(line)
+        return list(dict.fromkeys(urls))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def completed_urls(output_path):
+    """URLs that already have a successful record in the output file"""
+    done = set()
+    if not output_path or not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # truncated last line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["url"])
+    return done
+
+class BatchRunner:
+    """Run the analysis stages as worker pools connected by bounded queues
+
+    Each stage has its own pool of threads; the bounded queues between them
+    provide backpressure so a fast scraper cannot run ahead of the LLM
+    stages. Shared token buckets cap request rates across all workers.
+    """
+
+    def __init__(self, rag=None, tone="default",
+                 scrape_workers=BATCH_SCRAPE_WORKERS,
+                 analysis_workers=BATCH_ANALYSIS_WORKERS,
+                 proposal_workers=BATCH_PROPOSAL_WORKERS,
+                 queue_size=BATCH_QUEUE_SIZE,
+                 scrape_rate=SCRAPE_RATE_LIMIT,
+                 llm_rate=LLM_RATE_LIMIT):
+        if rag is None:
+            from rag_pipeline import RAGPipeline
+            rag = RAGPipeline()
+        self.rag = rag
+        self.tone = tone
+        self.queue_size = queue_size
+        self.stages = [
+            ("scrape", self._scrape, scrape_workers),
+            ("analysis", self._analyze, analysis_workers),
+            ("proposal", self._propose, proposal_workers),
+        ]
+        self.scrape_limiter = make_limiter(scrape_rate)
+        self.llm_limiter = make_limiter(llm_rate)
+
+    # --- stages -----------------------------------------------------------
+
+    def _scrape(self, record):
+        self.scrape_limiter.acquire()
+        scraped = scrape_job_post(record["url"], polite_delay=False)
+        if "error" in scraped:
+            raise RuntimeError(scraped["error"])
+        record["sources"] = build_sources(
+            scraped, attachments=ingest_attachments(attachment_urls(scraped))
+        )
+
+    def _analyze(self, record):
+        self.llm_limiter.acquire()
+        analysis = run_analysis(self.rag, record["sources"], job_id=url_key(record["url"]))
+        record["analysis"] = analysis["answer"]
+        if duplicate := analysis.get("duplicate"):
+            record["duplicate_of"] = {"job_id": duplicate["job_id"], "similarity": duplicate["similarity"],
+                                      "reused": duplicate["reusable"]}
+
+    def _propose(self, record):
+        self.llm_limiter.acquire()
+        record["proposal"] = run_proposal(record["analysis"], record["sources"], tone=self.tone)
+
+    # --- plumbing ---------------------------------------------------------
+
+    def _worker(self, name, func, inbox, outbox):
+        while True:
+            record = inbox.get()
+            if record is _DONE:
+                return
+            if record["status"] == "ok":
+                start = time.perf_counter()
+                try:
+                    func(record)
+                except Exception as e:
+                    record["status"] = "error"
+                    record["stage"] = name
+                    record["error"] = str(e)
+                record["timings"][name] = round(time.perf_counter() - start, 3)
+            outbox.put(record)
+
+    def run(self, urls, on_result):
+        """Process urls, calling on_result(record) from a single thread as each finishes"""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        pools = []
+        for i, (name, func, workers) in enumerate(self.stages):
+            threads = [
+                threading.Thread(target=self._worker, args=(name, func, queues[i], queues[i + 1]),
+                                 daemon=True, name=f"{name}-{n}")
+                for n in range(max(1, workers))
+            ]
+            for t in threads:
+                t.start()
+            pools.append(threads)
+
+        def feed():
+            for url in urls:
+                queues[0].put({"url": url, "status": "ok", "timings": {}})
+            # Shut the stages down in order: a stage's workers only see
+            # their sentinels once every upstream worker has exited.
+            for i, threads in enumerate(pools):
+                for _ in threads:
+                    queues[i].put(_DONE)
+                for t in threads:
+                    t.join()
+            queues[-1].put(_DONE)
+
+        feeder = threading.Thread(target=feed, daemon=True, name="batch-feeder")
+        feeder.start()
+        while (record := queues[-1].get()) is not _DONE:
+            on_result(record)
+        feeder.join()
+
+def to_output(record):
+    """Flatten a pipeline record into the JSONL output schema"""
+    sources = record.get("sources") or {}
+    job = sources.get("job", {})
+    return {
+        "url": record["url"],
+        "status": record["status"],
+        "stage": record.get("stage"),
+        "error": record.get("error"),
+        "title": job.get("title"),
+        "description": job.get("description"),
+        "links": job.get("links", []),
+        "documents": job.get("documents", []),
+        "attachments": [
+            {"url": a["url"], "kind": a.get("kind"), "chars": len(a.get("text", "")), "error": a.get("error")}
+            for a in sources.get("attachments", [])
+        ],
+        "duplicate_of": record.get("duplicate_of"),
+        "analysis": record.get("analysis"),
+        "proposal": record.get("proposal"),
+        "timings": record["timings"],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze job URLs in batch")
+    parser.add_argument("input", help="file with one job URL per line, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--tone", default="default",
+                        choices=["default", "formal", "casual", "technical"])
+    parser.add_argument("--scrape-workers", type=int, default=BATCH_SCRAPE_WORKERS)
+    parser.add_argument("--analysis-workers", type=int, default=BATCH_ANALYSIS_WORKERS)
+    parser.add_argument("--proposal-workers", type=int, default=BATCH_PROPOSAL_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=BATCH_QUEUE_SIZE)
+    parser.add_argument("--scrape-rate", type=float, default=SCRAPE_RATE_LIMIT,
+                        help="max scrape requests/sec across workers (0 = unlimited)")
+    parser.add_argument("--llm-rate", type=float, default=LLM_RATE_LIMIT,
+                        help="max LLM calls/sec across workers (0 = unlimited)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="reprocess URLs that already succeeded in the output file")
+    args = parser.parse_args(argv)
+
+    urls = read_urls(args.input)
+    llm_cache = install_llm_cache()
+    to_file = args.output != "-"
+    if to_file and not args.no_resume:
+        done = completed_urls(args.output)
+        if done:
+            print(f"Resuming: skipping {len(done)} completed URLs", file=sys.stderr)
+        urls = [u for u in urls if u not in done]
+
+    runner = BatchRunner(
+        tone=args.tone,
+        scrape_workers=args.scrape_workers,
+        analysis_workers=args.analysis_workers,
+        proposal_workers=args.proposal_workers,
+        queue_size=args.queue_size,
+        scrape_rate=args.scrape_rate,
+        llm_rate=args.llm_rate,
+    )
+
+    out = open(args.output, "a", encoding="utf-8") if to_file else sys.stdout
+    counts = {"ok": 0, "error": 0}
+    start = time.perf_counter()
+
+    def on_result(record):
+        out.write(json.dumps(to_output(record), ensure_ascii=False) + "\n")
+        out.flush()  # every finished URL is durable, so a rerun can resume
+        counts[record["status"]] += 1
+        done = counts["ok"] + counts["error"]
+        print(f"[{done}/{len(urls)}] {record['status']:5s} {record['url']}", file=sys.stderr)
+
+    try:
+        runner.run(urls, on_result)
+    finally:
+        if to_file:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    rate = len(urls) / elapsed if elapsed else 0.0
+    print(f"Done: {counts['ok']} ok, {counts['error']} failed in {elapsed:.1f}s "
+          f"({rate:.2f} jobs/sec)", file=sys.stderr)
+    if llm_cache is not None:
+        metrics = llm_cache.get_metrics()
+        print(f"LLM cache: {metrics['hits']} hits, {metrics['misses']} misses, saved "
+              f"~{metrics['saved_tokens']} tokens and {metrics['saved_seconds']:.1f}s", file=sys.stderr)
+    return 0 if not counts["error"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
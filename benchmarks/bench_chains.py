@@ -0,0 +1,80 @@
+# File: benchmarks/bench_chains.py
+# Per-call overhead of building the Groq client and prompt chain on every
+# call vs. the cached chain factory. The Groq API is replaced by a local
+# stub, so only client-side work and connection setup are measured.
+#
+# Usage: python -m benchmarks.bench_chains [--calls 200]
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from benchmarks.stubs import stub_server
+
+COMPLETION = json.dumps({
+    "id": "bench", "object": "chat.completion", "created": 0, "model": "llama3-70b-8192",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "Hey there, here is my proposal."}}],
+    "usage": {"prompt_tokens": 600, "completion_tokens": 8, "total_tokens": 608}
+}).encode("utf-8")
+
+INPUTS = {"bullet_points": "- Python data pipeline\n- PostgreSQL loading",
+          "job_title": "Data engineer", "has_video": False}
+
+def per_call_chain():
+    """What each proposal call used to do: new client, parse prompts, build chain"""
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import (ChatPromptTemplate, HumanMessagePromptTemplate,
+        SystemMessagePromptTemplate)
+    from langchain_groq import ChatGroq
+    from proposal_generator import STYLE_INSTRUCTIONS, SYSTEM_PROMPT, USER_PROMPT
+
+    llm = ChatGroq(temperature=0.75, model_name="llama3-70b-8192")
+    system_text = SYSTEM_PROMPT.replace("{style_instructions}", STYLE_INSTRUCTIONS["default"])
+    user_text = USER_PROMPT
+    for name, value in INPUTS.items():
+        user_text = user_text.replace("{" + name + "}", str(value))
+    prompt = ChatPromptTemplate(messages=[
+        SystemMessagePromptTemplate.from_template(system_text),
+        HumanMessagePromptTemplate.from_template(user_text),
+    ])
+    return prompt | llm | StrOutputParser(), {}
+
+def factory_chain():
+    from proposal_generator import _proposal_chain, _proposal_inputs
+    return _proposal_chain("default"), _proposal_inputs(**INPUTS)
+
+def run(make_chain, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        chain, inputs = make_chain()
+        chain.invoke(inputs)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM client/chain reuse benchmark")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    route = (200, {"Content-Type": "application/json"}, COMPLETION)
+    print(f"{'mode':<22}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'connections':>13}")
+    for label, make_chain in [("client+chain per call", per_call_chain),
+                              ("chain factory", factory_chain)]:
+        with stub_server({"/openai/v1/chat/completions": route}) as server:
+            os.environ["GROQ_API_BASE"] = server.base_url
+            os.environ.setdefault("GROQ_API_KEY", "bench")
+            import chain_factory
+            chain_factory.clear()
+            run(make_chain, 5)  # imports and first-call setup
+            server.clients.clear()
+            timings = sorted(run(make_chain, args.calls))
+            print(f"{label:<22}{statistics.mean(timings) * 1000:>9.2f}"
+                  f"{timings[len(timings) // 2] * 1000:>9.2f}"
+                  f"{timings[int(len(timings) * 0.95)] * 1000:>9.2f}{len(server.clients):>13}")
+
+if __name__ == "__main__":
+    main()
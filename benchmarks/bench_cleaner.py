@@ -0,0 +1,61 @@
+# File: benchmarks/bench_cleaner.py
+# Micro-benchmark: legacy per-pattern cleaner vs the single-pass TextCleaner
+# on large synthetic job descriptions.
+#
+# Usage: python -m benchmarks.bench_cleaner [--lines 20000] [--repeat 5]
+
+import argparse
+import random
+import re
+import timeit
+
+from config import UNWANTED_PATTERNS
+from text_cleaner import default_cleaner
+
+def legacy_clean(text):
+    """The original clean_scraped_content: one re.search per pattern per line"""
+    cleaned = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or any(re.search(p, line) for p in UNWANTED_PATTERNS):
+            continue
+        cleaned.append(re.sub(r'\s{2,}', ' ', line))
+    return '\n'.join(cleaned) if cleaned else 'No description available'
+
+KEEP = [
+    "We need an experienced Python developer to build a   data pipeline.",
+    "- Strong SQL and pandas skills",
+    "## Requirements",
+    "The project involves integrating three REST APIs and a PostgreSQL database.",
+    "Please include examples of similar work in your proposal.",
+    "   ",
+]
+DROP = [
+    "Budget: $1,500",
+    "Proposals: 20 to 50",
+    "Interviewing:3",
+    "Last viewed by client: 2 hours ago",
+    "Activity on this job",
+    "- FooBarBaz",
+    "12 hires",
+]
+
+def synthetic_description(lines, seed=0):
+    rng = random.Random(seed)
+    return '\n'.join(rng.choice(KEEP if rng.random() < 0.7 else DROP) for _ in range(lines))
+
+def main():
+    parser = argparse.ArgumentParser(description="Text cleaner benchmark")
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = synthetic_description(args.lines)
+    assert legacy_clean(text) == default_cleaner.clean(text), "cleaners disagree"
+
+    for label, func in [("legacy", legacy_clean), ("single-pass", default_cleaner.clean)]:
+        best = min(timeit.repeat(lambda: func(text), number=1, repeat=args.repeat))
+        print(f"{label:12s} {best * 1000:8.2f} ms  ({args.lines / best:,.0f} lines/sec)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# File: benchmarks/bench_duplicates.py
+# Near-duplicate lookup as the index grows: the index is filled with
+# synthetic postings in steps, and at each size reposts (indexed postings
+# with a share of their words replaced) and unseen postings are looked up.
+# Reports signature and lookup latency, how many reposts were mapped to
+# their original, false matches among unseen postings and the file size.
+#
+# Usage: python -m benchmarks.bench_duplicates [--sizes 1000 10000 100000]
+#        [--edit 0.03] [--queries 200] [--threshold 0.8]
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+def postings(rng, count, words=250, vocabulary=20000):
+    """Random postings over a Zipf-like vocabulary (common words repeat)"""
+    ranks = np.minimum(rng.zipf(1.2, size=(count, words)), vocabulary)
+    return [" ".join(f"w{r}" for r in row) for row in ranks]
+
+def repost(rng, text, edit):
+    """The posting with `edit` of its words replaced by new ones"""
+    words = text.split()
+    for i in rng.choice(len(words), max(1, int(len(words) * edit)), replace=False):
+        words[i] = f"edited{rng.integers(1 << 30)}"
+    return " ".join(words)
+
+def main():
+    from config import DUPLICATE_THRESHOLD
+
+    parser = argparse.ArgumentParser(description="Duplicate index benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--edit", type=float, default=0.03, help="share of words changed in a repost")
+    parser.add_argument("--queries", type=int, default=200, help="lookups per size (half reposts)")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD)
+    args = parser.parse_args()
+
+    from duplicate_index import DuplicateIndex
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory(prefix="bench-duplicates-") as tmp:
+        index = DuplicateIndex(os.path.join(tmp, "duplicates.sqlite3"), threshold=args.threshold)
+        print(f"threshold {args.threshold}, {index.bands} bands x {index.rows} rows, "
+              f"reposts change {args.edit:.0%} of words")
+        print(f"{'postings':>9}{'sig ms':>8}{'find p50':>10}{'find p95':>10}{'found':>8}"
+              f"{'false':>7}{'MB':>8}")
+        stored = []
+        for size in sorted(args.sizes):
+            while len(stored) < size:
+                batch = postings(rng, min(5000, size - len(stored)))
+                index.add_many((f"job{len(stored) + n}", text, "") for n, text in enumerate(batch))
+                stored += batch
+
+            originals = rng.choice(len(stored), args.queries // 2, replace=False)
+            queries = [(repost(rng, stored[i], args.edit), f"job{i}") for i in originals]
+            queries += [(text, None) for text in postings(rng, args.queries - len(queries))]
+            signature_times, find_times, found, false = [], [], 0, 0
+            for text, expected in queries:
+                start = time.perf_counter()
+                signature = index.signature(text)
+                signature_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                match = index.find(text, signature=signature)
+                find_times.append(time.perf_counter() - start)
+                if expected is None:
+                    false += match is not None
+                else:
+                    found += match is not None and match["job_id"] == expected
+            find_times.sort()
+            size_mb = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)) / 1e6
+            print(f"{size:>9}{statistics.median(signature_times) * 1000:>8.3f}"
+                  f"{statistics.median(find_times) * 1000:>10.3f}"
+                  f"{find_times[int(len(find_times) * 0.95)] * 1000:>10.3f}"
+                  f"{found / len(originals):>8.0%}{false:>7}{size_mb:>8.1f}")
+
+if __name__ == "__main__":
+    main()
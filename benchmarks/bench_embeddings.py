@@ -0,0 +1,153 @@
+# File: benchmarks/bench_embeddings.py
+# Embedding backends on sentences from the fixture job pages plus generated
+# job-post sentences: model load time, sentences/sec for one large request
+# and for many concurrent small ones (each calling the backend directly,
+# then through the dynamic batcher), peak memory, and retrieval recall@k of
+# every backend against the first. Each backend runs in a fresh interpreter.
+#
+# Usage: python -m benchmarks.bench_embeddings [--backends huggingface,onnx]
+#        [--model sentence-transformers/all-MiniLM-L6-v2] [--threads 4]
+#        [--clients 8] [--request-size 4] [--k 5]
+
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.stubs import ROOT, FIXTURES, load_fixture
+
+TASKS = ["migrate a legacy database", "build a nightly ETL pipeline", "fix a flaky checkout flow",
+         "design a mobile onboarding screen", "scrape product prices every hour",
+         "set up CI for a monorepo", "train a churn prediction model", "write API documentation",
+         "optimize slow SQL reports", "integrate Stripe subscriptions"]
+TOOLS = ["PostgreSQL", "Python", "React Native", "Airflow", "Django", "TypeScript", "Kubernetes",
+         "pandas", "GraphQL", "Terraform"]
+DETAILS = ["The deadline is tight", "Documentation is missing", "The current vendor left mid-project",
+           "We need weekly progress calls", "Tests must cover the critical paths",
+           "Budget is fixed for the first milestone", "The data arrives as CSV from three vendors",
+           "Performance matters more than features"]
+
+def corpus(size=600, seed=0):
+    """Fixture page sentences plus generated job-post sentences"""
+    from job_scraper import parse_job_html
+    sentences = []
+    for name in sorted(os.listdir(os.path.join(FIXTURES, "pages"))):
+        text = parse_job_html(load_fixture("pages", name)).get("description") or ""
+        sentences += [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if len(s.split()) > 3]
+    rng = random.Random(seed)
+    while len(sentences) < size:
+        sentences.append(f"We need someone to {rng.choice(TASKS)} using {rng.choice(TOOLS)}. "
+                         f"{rng.choice(DETAILS)}.")
+    return sentences[:size]
+
+def queries(count=50, seed=1):
+    rng = random.Random(seed)
+    return [f"Who can {rng.choice(TASKS)} with {rng.choice(TOOLS)}?" for _ in range(count)]
+
+def throughput(embed, sentences, clients, request_size):
+    """Sentences/sec with `clients` threads each sending request_size sentences at a time"""
+    calls = [sentences[i:i + request_size] for i in range(0, len(sentences), request_size)]
+    shares = [calls[n::clients] for n in range(clients)]
+
+    def client(share):
+        for texts in share:
+            embed(texts)
+
+    threads = [threading.Thread(target=client, args=(share,)) for share in shares]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(sentences) / (time.perf_counter() - start)
+
+def measure(backend_name, model_name, threads, clients, request_size, out_path):
+    """Run inside a fresh interpreter"""
+    from embedding_backends import DynamicBatcher, get_embedding_backend
+
+    sentences, questions = corpus(), queries()
+    start = time.perf_counter()
+    backend = get_embedding_backend(backend_name, model_name, threads).load()
+    load_time = time.perf_counter() - start
+    backend.embed(sentences[:32])  # warm-up
+
+    start = time.perf_counter()
+    vectors = backend.embed(sentences)
+    bulk = len(sentences) / (time.perf_counter() - start)
+    direct = throughput(backend.embed, sentences, clients, request_size)
+    batcher = DynamicBatcher(backend)
+    batched = throughput(batcher.embed, sentences, clients, request_size)
+    np.savez(out_path, corpus=vectors, queries=backend.embed(questions))
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {"load": load_time, "bulk": bulk, "direct": direct, "batched": batched,
+            "batches": batcher.metrics["batches"], "peak_mb": peak_mb}
+
+def recall_at_k(reference, candidate, k):
+    """Share of the reference top-k neighbours (inner product) that the
+    candidate backend also ranks in its top k, averaged over the queries"""
+    import faiss
+    hits = []
+    for vectors in (reference, candidate):
+        index = faiss.IndexFlatIP(vectors["corpus"].shape[1])
+        index.add(vectors["corpus"])
+        hits.append(index.search(vectors["queries"], k)[1])
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(*hits)]))
+
+def main():
+    from config import EMBEDDING_MODEL
+
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--backends", default="huggingface,onnx",
+                        help="comma-separated; recall is measured against the first")
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent callers")
+    parser.add_argument("--request-size", type=int, default=4, help="sentences per request")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.model, args.threads, args.clients,
+                                 args.request_size, args.out)))
+        return
+
+    print(f"{args.model}, {args.threads} threads, {args.clients} clients x {args.request_size} sentences")
+    print(f"{'backend':<13}{'load':>7}{'bulk/s':>9}{'direct/s':>10}{'batched/s':>11}"
+          f"{'batches':>9}{'peak MB':>9}{f'recall@{args.k}':>11}")
+    reference = None
+    with tempfile.TemporaryDirectory(prefix="bench-embeddings-") as tmp:
+        for backend in args.backends.split(","):
+            out_path = os.path.join(tmp, f"{backend}.npz")
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_embeddings", "--child", backend,
+                 "--model", args.model, "--threads", str(args.threads), "--clients", str(args.clients),
+                 "--request-size", str(args.request_size), "--out", out_path],
+                cwd=ROOT, capture_output=True, text=True
+            )
+            if out.returncode != 0:
+                print(f"{backend:<13}failed: {out.stderr.strip().splitlines()[-1]}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            vectors = dict(np.load(out_path))
+            if reference is None:
+                reference = vectors
+            recall = recall_at_k(reference, vectors, args.k)
+            print(f"{backend:<13}{r['load']:>6.1f}s{r['bulk']:>9.0f}{r['direct']:>10.0f}"
+                  f"{r['batched']:>11.0f}{r['batches']:>9}{r['peak_mb']:>9.0f}{recall:>11.1%}")
+
+if __name__ == "__main__":
+    main()
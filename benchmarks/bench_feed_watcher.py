@@ -0,0 +1,177 @@
+# File: benchmarks/bench_feed_watcher.py
+# Feed watcher against a local stub job board: an RSS feed of the latest
+# postings that supports ETag revalidation, and a copy without validators.
+# First checks what polls hand over (new postings, edited postings,
+# retries of failed ones, nothing for an unchanged feed) and how intervals
+# adapt for a busy and a quiet feed, then times polls as the seen-set
+# grows to show the per-poll cost does not depend on history: a 304, an
+# identical body from a server without validators, and a feed with one
+# new posting (fetch, parse, seen-set lookup and mark).
+#
+# Usage: python -m benchmarks.bench_feed_watcher [--history 1000 10000 100000 1000000]
+#        [--feed-size 50] [--polls 50]
+
+import argparse
+import hashlib
+import os
+import statistics
+import tempfile
+import time
+from xml.sax.saxutils import escape
+
+from benchmarks.stubs import stub_server
+
+class JobBoard:
+    """Postings with ids, newest first, rendered as an RSS feed"""
+
+    def __init__(self, base_url="https://www.upwork.com/jobs/"):
+        self.base_url = base_url
+        self.jobs = []  # [id, title, description]
+        self.next_id = 0
+
+    def post(self, count=1):
+        for _ in range(count):
+            self.jobs.insert(0, [self.next_id, f"Job {self.next_id}",
+                                 f"Build feature {self.next_id} for our platform"])
+            self.next_id += 1
+
+    def edit(self, index=0):
+        self.jobs[index][2] += " (budget updated)"
+
+    def rss(self, size):
+        items = "".join(
+            f"<item><title>{escape(title)}</title><link>{self.base_url}~{job_id:012d}</link>"
+            f"<description>{escape(description)}</description><guid>{job_id}</guid></item>"
+            for job_id, title, description in self.jobs[:size])
+        return (f'<?xml version="1.0"?><rss version="2.0"><channel><title>Saved search</title>'
+                f"{items}</channel></rss>").encode("utf-8")
+
+def routes(board, size):
+    def validated(handler):
+        body = board.rss(size)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if handler.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"Content-Type": "application/rss+xml", "ETag": etag}, body
+
+    def plain(handler):
+        return 200, {"Content-Type": "application/rss+xml"}, board.rss(size)
+
+    return {"/feed.rss": validated, "/plain.rss": plain}
+
+def check(line, ok):
+    print(f"  {'ok ' if ok else 'FAIL'} {line}")
+    return ok
+
+def behaviour(tmp, feed_size):
+    from feed_watcher import FeedWatcher
+
+    board = JobBoard()
+    board.post(feed_size)
+    results = []
+    with stub_server(routes(board, feed_size)) as server:
+        watcher = FeedWatcher(os.path.join(tmp, "behaviour.sqlite3"), min_interval=1, max_interval=3600,
+                              initial_interval=60, max_attempts=2)
+        feed, plain = server.base_url + "/feed.rss", server.base_url + "/plain.rss"
+        watcher.add_feed(feed)
+        watcher.add_feed(plain)
+
+        postings = watcher.poll(feed)
+        results.append(check(f"first poll offers the {len(postings)} postings in the feed",
+                             len(postings) == feed_size and {p["change"] for p in postings} == {"new"}))
+        watcher.mark(postings[1:])
+        watcher.mark(postings[:1], ok=False)
+        retry = watcher.poll(feed)
+        results.append(check("a failed posting is offered again", [p["change"] for p in retry] == ["retry"]))
+        watcher.mark(retry, ok=False)
+        results.append(check("...until max_attempts, then the feed settles", watcher.poll(feed) == []))
+        before = server.requests
+        results.append(check("unchanged feed: 304, nothing offered",
+                             watcher.poll(feed) == [] and watcher.metrics["not_modified"] == 1))
+        results.append(check("the same jobs in another feed are not offered again", watcher.poll(plain) == []))
+        results.append(check("unchanged feed without validators: body hash, nothing offered",
+                             watcher.poll(plain) == [] and watcher.metrics["unchanged"] == 1))
+
+        board.post(3)
+        board.edit(5)
+        postings = watcher.poll(feed)
+        changes = sorted(p["change"] for p in postings)
+        results.append(check(f"3 new and 1 edited posting offered ({changes})",
+                             changes == ["edited", "new", "new", "new"]))
+        watcher.mark(postings)
+        results.append(check("once marked they are not offered again",
+                             watcher.poll(feed) == [] and watcher.poll(plain) == []))
+        print(f"  {server.requests - before} requests for the last {watcher.metrics['polls'] - 3} polls")
+
+        # Busy: a new posting before every poll; quiet: never changes
+        for _ in range(8):
+            board.post()
+            watcher.mark(watcher.poll(feed))
+            watcher.poll(feed)  # the follow-up poll that stores the validators
+        busy = {f["url"]: f["interval"] for f in watcher.feeds()}[feed]
+        for _ in range(8):
+            watcher.poll(plain)
+        quiet = {f["url"]: f["interval"] for f in watcher.feeds()}[plain]
+        results.append(check(f"intervals adapt: busy feed {busy:.0f}s, quiet feed {quiet:.0f}s", busy < quiet))
+        watcher.close()
+    return all(results)
+
+def scaling(tmp, history_sizes, feed_size, polls):
+    from feed_watcher import FeedWatcher
+
+    board = JobBoard()
+    board.post(feed_size)
+    print(f"\n{'seen':>9}{'304 ms':>9}{'same ms':>9}{'new ms':>9}{'MB':>8}")
+    with stub_server(routes(board, feed_size)) as server:
+        watcher = FeedWatcher(os.path.join(tmp, "scaling.sqlite3"))
+        feed, plain = server.base_url + "/feed.rss", server.base_url + "/plain.rss"
+        watcher.add_feed(feed)
+        watcher.add_feed(plain)
+        seen = 0
+        for size in sorted(history_sizes):
+            # Earlier postings that have scrolled out of the feed
+            while seen < size:
+                batch = min(50000, size - seen)
+                watcher.mark([{"job_id": f"old{seen + n}", "url": "", "hash": ""} for n in range(batch)])
+                seen += batch
+            watcher.mark(watcher.poll(feed))
+            watcher.poll(feed)  # stores the validators
+
+            def timed(poll):
+                times = []
+                for _ in range(polls):
+                    start = time.perf_counter()
+                    poll()
+                    times.append(time.perf_counter() - start)
+                return statistics.median(times) * 1000
+
+            not_modified = timed(lambda: watcher.poll(feed))
+            unchanged = timed(lambda: watcher.poll(plain))  # no validators: body hash compared
+
+            def new_posting():
+                board.post()
+                watcher.mark(watcher.poll(plain))
+
+            fresh = timed(new_posting)
+            size_mb = os.path.getsize(watcher.path) / 1e6
+            print(f"{len(watcher):>9}{not_modified:>9.2f}{unchanged:>9.2f}{fresh:>9.2f}{size_mb:>8.1f}")
+            seen = len(watcher)
+        watcher.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Feed watcher benchmark")
+    parser.add_argument("--history", type=int, nargs="+", default=[1000, 10000, 100000, 1000000],
+                        help="seen-set sizes to time polls at")
+    parser.add_argument("--feed-size", type=int, default=50, help="postings per feed")
+    parser.add_argument("--polls", type=int, default=50, help="timed polls per size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-feeds-") as tmp:
+        print("behaviour:")
+        ok = behaviour(tmp, args.feed_size)
+        scaling(tmp, args.history, args.feed_size, args.polls)
+    if not ok:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# File: benchmarks/bench_media_stream.py
+# Audio download + decode for transcription: a synthetic recording is
+# encoded with ffmpeg into the containers YouTube serves (WebM/Opus, and
+# MP4/AAC with its index at the end, which cannot be decoded from a pipe)
+# and served by a bandwidth-limited local stub. Compares downloading to a
+# temporary file and then decoding against decoding while downloading
+# (media_stream.stream_audio), checks both give the same samples, and that
+# failed downloads raise and leave no temporary files behind.
+#
+# Usage: python -m benchmarks.bench_media_stream [--seconds 600]
+#        [--bandwidth 2000000]
+
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+import wave
+
+import numpy as np
+import requests
+
+from benchmarks.stubs import stub_server
+
+FORMATS = {
+    "webm": ["-c:a", "libopus", "-b:a", "48k", "-f", "webm"],
+    "m4a": ["-c:a", "aac", "-b:a", "48k", "-f", "mp4"],  # moov atom last
+}
+
+def synthesize(path, seconds, rate=44100):
+    """A speech-like test signal: gated tones over noise, 16-bit stereo WAV"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * rate)) / rate
+    tone = np.sin(2 * np.pi * (220 + 80 * np.sin(2 * np.pi * 0.3 * t)) * t)
+    gate = (np.sin(2 * np.pi * 2.5 * t) > 0).astype(np.float32)
+    mono = 0.4 * tone * gate + 0.02 * rng.standard_normal(len(t))
+    pcm = (np.clip(mono, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.repeat(pcm, 2).tobytes())
+
+def download_then_decode(url):
+    """The previous approach: the whole file lands on disk before decoding"""
+    from media_stream import decode_file
+    with tempfile.NamedTemporaryFile(suffix=".media", delete=False) as tmp:
+        path = tmp.name
+        with requests.get(url, stream=True) as response:
+            for chunk in response.iter_content(64 * 1024):
+                tmp.write(chunk)
+    try:
+        return decode_file(path)
+    finally:
+        os.unlink(path)
+
+def temp_files():
+    return set(os.listdir(tempfile.gettempdir()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Media streaming benchmark")
+    parser.add_argument("--seconds", type=float, default=600, help="length of the recording")
+    parser.add_argument("--bandwidth", type=int, default=2_000_000, help="stub bytes/sec")
+    args = parser.parse_args()
+
+    from media_stream import stream_audio
+
+    with tempfile.TemporaryDirectory(prefix="bench-media-") as tmp:
+        source = os.path.join(tmp, "source.wav")
+        synthesize(source, args.seconds)
+        media = {}
+        for name, options in FORMATS.items():
+            path = os.path.join(tmp, f"audio.{name}")
+            subprocess.run(["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", source,
+                            *options, path], check=True)
+            with open(path, "rb") as f:
+                media[name] = f.read()
+
+        routes = {f"/audio.{name}": (200, {"Content-Type": "application/octet-stream"}, body)
+                  for name, body in media.items()}
+        # The server promises the whole file but the connection drops after a third
+        routes["/dropped.webm"] = (200, {"Content-Length": str(len(media["webm"])),
+                                         "Connection": "close"}, media["webm"][:len(media["webm"]) // 3])
+        routes["/garbage.webm"] = (200, {}, os.urandom(256 * 1024))
+
+        print(f"{args.seconds:.0f}s recording, stub at {args.bandwidth / 1e6:.1f} MB/s")
+        print(f"{'format':>7}{'MB':>7}{'file s':>9}{'stream s':>10}{'samples':>10}{'same':>6}")
+        with stub_server(routes, bandwidth=args.bandwidth) as server:
+            for name, body in media.items():
+                url = f"{server.base_url}/audio.{name}"
+                start = time.perf_counter()
+                reference = download_then_decode(url)
+                file_time = time.perf_counter() - start
+                before = temp_files()
+                start = time.perf_counter()
+                audio = stream_audio(url)
+                stream_time = time.perf_counter() - start
+                leaked = temp_files() - before
+                same = len(audio) == len(reference) and np.array_equal(audio, reference)
+                print(f"{name:>7}{len(body) / 1e6:>7.1f}{file_time:>9.2f}{stream_time:>10.2f}"
+                      f"{len(audio):>10}{'yes' if same else 'NO':>6}"
+                      + (f"  leaked {sorted(leaked)}" if leaked else ""))
+
+            print("\nfailures:")
+            for path in ["/missing.webm", "/dropped.webm", "/garbage.webm"]:
+                before = temp_files()
+                try:
+                    audio = stream_audio(server.base_url + path)
+                    outcome = f"decoded {len(audio)} samples"
+                except Exception as e:
+                    outcome = f"{type(e).__name__}: {e}"
+                leaked = temp_files() - before
+                print(f"  {path:<17}{outcome[:70]}"
+                      + (f"  leaked {sorted(leaked)}" if leaked else "  (no temp files left)"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# File: benchmarks/bench_parsers.py
+# HTML parser backends: check that every backend produces output identical
+# to html.parser on the saved pages, then compare parse time and the peak
+# memory of one parse. Memory is traced with tracemalloc, so it covers
+# Python objects only; the C trees of lxml and selectolax are not counted.
+#
+# Usage: python -m benchmarks.bench_parsers [--repeat 50] [--backends html.parser,lxml,selectolax]
+
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+from benchmarks.stubs import FIXTURES
+from job_scraper import parse_job_html
+
+PAGES = sorted(glob.glob(os.path.join(FIXTURES, "pages", "*.html")))
+
+def load_pages():
+    pages = []
+    for path in PAGES:
+        with open(path, encoding="utf-8") as f:
+            pages.append((os.path.basename(path), f.read()))
+    # A large synthetic page: the real description buried in a heavy app shell
+    name, html = pages[0]
+    shell = "<div class='card'><p>sidebar item</p><a href='https://example.com/x'>x</a></div>" * 3000
+    pages.append(("large_" + name, html.replace("<main>", "<main>" + shell, 1)))
+    return pages
+
+def normalized(result):
+    # links/documents come from a set, so their order is not meaningful
+    if "error" in result:
+        return result
+    return {**result, "links": sorted(result["links"]), "documents": sorted(result["documents"])}
+
+def check_parity(pages, backends):
+    ok = True
+    for name, html in pages:
+        expected = normalized(parse_job_html(html, backend="html.parser"))
+        for backend in backends:
+            actual = normalized(parse_job_html(html, backend=backend))
+            if actual != expected:
+                ok = False
+                print(f"MISMATCH {backend} on {name}:\n  expected {expected}\n  actual   {actual}")
+    return ok
+
+def peak_memory(backend, html):
+    """Peak bytes traced by tracemalloc during a single parse"""
+    tracemalloc.start()
+    try:
+        parse_job_html(html, backend=backend)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(backend, pages, repeat):
+    parse_job_html(pages[0][1], backend=backend)  # import and warm up
+    timings, peaks = {}, {}
+    for name, html in pages:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parse_job_html(html, backend=backend)
+        timings[name] = (time.perf_counter() - start) / repeat
+        # Traced separately: tracemalloc slows allocation-heavy code down
+        peaks[name] = peak_memory(backend, html)
+    return {"timings": timings, "peaks": peaks}
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML parser backend benchmark")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--backends", default="html.parser,bs4-lxml,lxml,selectolax")
+    args = parser.parse_args()
+
+    backends = args.backends.split(",")
+    pages = load_pages()
+    others = [b for b in backends if b != "html.parser"]
+    print("Parity with html.parser:", "OK" if check_parity(pages, others) else "FAILED")
+
+    results = {backend: measure(backend, pages, args.repeat) for backend in backends}
+
+    names = [name for name, _ in pages]
+    header = f"{'page':32s}" + "".join(f"{b:>14s}" for b in backends)
+    print("\nparse time\n" + header)
+    for name in names:
+        row = "".join(f"{results[b]['timings'][name] * 1000:12.2f}ms" for b in backends)
+        print(f"{name:32s}{row}")
+    print("\npeak Python memory per parse (tracemalloc)\n" + header)
+    for name in names:
+        row = "".join(f"{results[b]['peaks'][name] / 1024:12.0f}KB" for b in backends)
+        print(f"{name:32s}{row}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# File: benchmarks/bench_scraper.py
+# Pages/sec of the sync scraper vs the async engine against a local stub
+# server, at the same per-host politeness budget.
+#
+# Usage: python -m benchmarks.bench_scraper [--pages 40] [--hosts 4] [--rate 5]
+
+import argparse
+import time
+
+from benchmarks.stubs import html_route, load_fixture, stub_server
+from async_scraper import scrape_many
+from job_scraper import scrape_job_post
+from rate_limiter import PerHostLimiter
+
+def urls_for(server, pages, hosts):
+    return [
+        f"http://127.0.0.{i % hosts + 1}:{server.port}/jobs/{i}"
+        for i in range(pages)
+    ]
+
+def bench_sync(urls, rate):
+    """The old path: a fresh session per page, paced by the same per-host budget"""
+    limiter = PerHostLimiter(rate)
+    start = time.perf_counter()
+    for url in urls:
+        limiter.acquire(url)
+        result = scrape_job_post(url, polite_delay=False, cache=None)
+        assert "error" not in result, result
+    return time.perf_counter() - start
+
+def bench_async(urls, rate):
+    start = time.perf_counter()
+    results = scrape_many(urls, rate_per_host=rate, cache=None)
+    assert all("error" not in r for r in results), results
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraper throughput benchmark")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=5.0, help="requests/sec per host")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub server latency (s)")
+    args = parser.parse_args()
+
+    routes = {"*": html_route(load_fixture("pages", "job_post.html"))}
+    with stub_server(routes, latency=args.latency) as server:
+        urls = urls_for(server, args.pages, args.hosts)
+        print(f"{args.pages} pages, {args.hosts} hosts, {args.rate:g} req/s per host, "
+              f"{args.latency * 1000:.0f} ms server latency")
+        for label, bench in [("sync (requests)", bench_sync), ("async engine", bench_async)]:
+            elapsed = bench(urls, args.rate)
+            print(f"{label:16s} {args.pages / elapsed:7.2f} pages/sec ({elapsed:.2f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# File: benchmarks/bench_service.py
+# Throughput and latency of service.py under concurrent load. Job pages
+# come from a local stub server and the Groq API from a stub that streams
+# a canned completion after a configurable delay; embeddings are fake.
+# With the default context budget of 0 every job is embedded and added to
+# the shared knowledge index; after each round the index is reloaded and
+# the jobs missing from it are counted (workers must not lose each
+# other's updates).
+#
+# Usage: python -m benchmarks.bench_service [--jobs 40] [--clients 8]
+#        [--workers 1 2 4] [--llm-latency 0.2] [--context-budget 0]
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.stubs import html_route, load_fixture, stub_server
+from benchmarks.suite import isolate, use_fake_embeddings
+
+ANSWER = ("- Build a nightly import from three vendors\n- Load the cleaned data into "
+          "PostgreSQL\n- Alert on failures instead of silent gaps\n")
+
+def groq_route(handler):
+    """Chat completions endpoint: SSE chunks when streaming, JSON otherwise"""
+    request = json.loads(handler.body)
+    usage = {"prompt_tokens": 600, "completion_tokens": 30, "total_tokens": 630}
+    if not request.get("stream"):
+        body = {"id": "bench", "object": "chat.completion", "created": 0, "model": request["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": ANSWER}}],
+                "usage": usage}
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode("utf-8")
+    events = []
+    for n, line in enumerate(ANSWER.splitlines(keepends=True)):
+        events.append({"id": "bench", "object": "chat.completion.chunk", "created": 0,
+                       "model": request["model"],
+                       "choices": [{"index": 0, "delta": {"content": line}, "finish_reason": None}]})
+    events.append({"id": "bench", "object": "chat.completion.chunk", "created": 0,
+                   "model": request["model"], "x_groq": {"usage": usage},
+                   "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+    body = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+    return 200, {"Content-Type": "text/event-stream"}, body.encode("utf-8")
+
+def run_job(service_url, job_url):
+    """Submit a job and follow its event stream; returns (latency, first analysis token)"""
+    start = time.perf_counter()
+    response = requests.post(f"{service_url}/jobs", json={"url": job_url})
+    response.raise_for_status()
+    job_id = response.json()["id"]
+    first_token = None
+    with requests.get(f"{service_url}/jobs/{job_id}/events", stream=True) as events:
+        for line in events.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["event"] == "analysis" and first_token is None:
+                first_token = time.perf_counter() - start
+            elif event["event"] == "error":
+                raise RuntimeError(f"{event['stage']}: {event['error']}")
+            elif event["event"] == "done":
+                break
+    return time.perf_counter() - start, first_token
+
+def main():
+    parser = argparse.ArgumentParser(description="Service load benchmark")
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent submitting clients")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--llm-latency", type=float, default=0.2,
+                        help="seconds the stub LLM waits before answering")
+    parser.add_argument("--context-budget", type=int, default=0,
+                        help="prompt-token budget; jobs that fit skip embedding and the index")
+    args = parser.parse_args()
+
+    html = load_fixture("pages", "job_post.html")
+    with tempfile.TemporaryDirectory(prefix="bench-service-") as cache_dir, \
+            stub_server({"*": html_route(html)}) as pages, \
+            stub_server({"/openai/v1/chat/completions": groq_route}, latency=args.llm_latency) as llm:
+        # Set before config is imported here or in the spawned workers
+        isolate(cache_dir)
+        os.environ.update(GROQ_API_BASE=llm.base_url, SCRAPE_RATE_LIMIT="0", LLM_RATE_LIMIT="0",
+                          CONTEXT_TOKEN_BUDGET=str(args.context_budget))
+        from config import EMBEDDING_BACKEND, EMBEDDING_MODEL, KNOWLEDGE_INDEX_DIR
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from knowledge_index import KnowledgeIndex
+        from scrape_cache import url_key
+        from service import JobQueue, make_server
+        index_dir = os.path.join(KNOWLEDGE_INDEX_DIR, EMBEDDING_BACKEND, EMBEDDING_MODEL.replace("/", "__"))
+
+        print(f"{'workers':>7}{'jobs/s':>9}{'p50 s':>8}{'p95 s':>8}{'ttft p50 s':>12}{'errors':>8}"
+              f"{'unindexed':>11}")
+        for workers in args.workers:
+            jobs = JobQueue(workers=workers, queue_size=args.jobs, setup=use_fake_embeddings).start()
+            server = make_server(jobs, "127.0.0.1", 0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            service_url = f"http://127.0.0.1:{server.server_address[1]}"
+            try:
+                run_job(service_url, f"{pages.base_url}/jobs/warmup")
+                urls = [f"{pages.base_url}/jobs/{workers}-{n}" for n in range(args.jobs)]
+                results, errors = [], 0
+                start = time.perf_counter()
+                with ThreadPoolExecutor(args.clients) as pool:
+                    for future in [pool.submit(run_job, service_url, url) for url in urls]:
+                        try:
+                            results.append(future.result())
+                        except Exception:
+                            errors += 1
+                elapsed = time.perf_counter() - start
+            finally:
+                server.shutdown()
+                server.server_close()
+                jobs.close()
+            # Every worker has exited; reload the index as a new process would
+            indexed = KnowledgeIndex(DeterministicFakeEmbedding(size=384), index_dir)
+            missing = sum(not indexed.job_ids(url_key(url)) for url in urls)
+            latencies = sorted(r[0] for r in results)
+            ttfts = [r[1] for r in results if r[1] is not None]
+            print(f"{workers:>7}{len(results) / elapsed:>9.2f}{statistics.median(latencies):>8.2f}"
+                  f"{latencies[int(len(latencies) * 0.95)]:>8.2f}"
+                  f"{statistics.median(ttfts) if ttfts else float('nan'):>12.2f}{errors:>8}{missing:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# File: benchmarks/bench_startup.py
+# Startup latency: cold time-to-first-render of app.py, an import-time
+# report of what the entry point loads, and per-rerun cost with and
+# without the model registry.
+#
+# Usage: python -m benchmarks.bench_startup [--reruns 5] [--top 15]
+#
+# Exits with status 1 when importing app.py loads any of HEAVY_MODULES.
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must only be imported once an analysis (or a video) needs them
+HEAVY_MODULES = ("torch", "whisper", "faster_whisper", "pytube", "sentence_transformers",
+                 "faiss", "langchain", "langchain_core", "langchain_community", "langchain_groq")
+
+_IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+def import_report(module="app"):
+    """Parse `python -X importtime -c 'import module'` in a fresh interpreter
+
+    Returns (seconds to import module, {package: cumulative seconds of
+    the module's direct imports from it}, set of every module imported).
+    """
+    env = dict(os.environ, GROQ_API_KEY=os.getenv("GROQ_API_KEY", "bench"))
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    packages, modules, children, total = {}, set(), [], 0.0
+    # Children are printed before their parent, indented one level deeper
+    for line in out.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        cumulative = int(match.group(2)) / 1e6
+        name = match.group(4)
+        modules.add(name)
+        depth = len(match.group(3)) // 2
+        if depth == 1:
+            children.append((name, cumulative))
+        elif depth == 0:
+            if name == module:
+                total = cumulative
+                for child, seconds in children:
+                    root = child.split(".")[0]
+                    packages[root] = packages.get(root, 0.0) + seconds
+            children = []
+    return total, packages, modules
+
+def measure_first_render():
+    """Run inside a fresh interpreter: time the first AppTest render of app.py"""
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600).run()
+    elapsed = time.perf_counter() - start
+    return {"first_render": elapsed, "exceptions": [str(e.value) for e in app.exception],
+            "heavy_loaded": sorted(m for m in HEAVY_MODULES if m in sys.modules)}
+
+def measure(reruns):
+    """Run inside a fresh interpreter: render app.py and load the models each rerun"""
+    from streamlit.testing.v1 import AppTest
+    from rag_pipeline import RAGPipeline
+
+    timings = []
+    for _ in range(reruns + 1):
+        start = time.perf_counter()
+        AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600).run()
+        # An analysis touches the embedding model, so count it as part of
+        # the time the rerun needs before it can do real work.
+        RAGPipeline().embeddings
+        timings.append(time.perf_counter() - start)
+    return {"first_render": timings[0], "reruns": timings[1:]}
+
+def run_child(mode, env_overrides, reruns=0):
+    env = dict(os.environ, GROQ_API_KEY=os.getenv("GROQ_API_KEY", "bench"), **env_overrides)
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode, "--reruns", str(reruns)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup latency benchmark")
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages to list in the import report")
+    parser.add_argument("--skip-registry", action="store_true",
+                        help="skip the rerun comparison (it loads the embedding model)")
+    parser.add_argument("--child", choices=["render", "reruns"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == "render":
+        print(json.dumps(measure_first_render()))
+        return 0
+    if args.child == "reruns":
+        print(json.dumps(measure(args.reruns)))
+        return 0
+
+    total, packages, modules = import_report()
+    print(f"import app: {total:.3f}s")
+    for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<28}{seconds:>8.3f}s")
+    heavy = sorted(m for m in HEAVY_MODULES if m in modules)
+
+    render = run_child("render", {"MODEL_WARMUP": ""})
+    print(f"cold first render (no warm-up): {render['first_render']:.2f}s")
+    if render["exceptions"]:
+        print(f"  app raised: {render['exceptions']}")
+
+    if not args.skip_registry:
+        for label, enabled in [("without registry", False), ("with registry", True)]:
+            result = run_child("reruns", {"MODEL_REGISTRY_ENABLED": "1" if enabled else "0",
+                                          "MODEL_WARMUP": "embeddings"}, args.reruns)
+            reruns = result["reruns"]
+            avg = sum(reruns) / len(reruns) if reruns else 0.0
+            print(f"{label:18s} first render: {result['first_render']:.2f}s  "
+                  f"avg rerun: {avg:.2f}s")
+
+    if heavy:
+        print(f"FAIL: importing app.py loads {', '.join(heavy)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
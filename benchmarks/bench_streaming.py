@@ -0,0 +1,51 @@
+# File: benchmarks/bench_streaming.py
+# Time-to-first-token vs total latency for the analysis and proposal
+# stages, streamed and blocking, against the local fake chat model.
+#
+# Usage: python -m benchmarks.bench_streaming [--first-token-delay 0.5] [--token-delay 0.02]
+
+import argparse
+import time
+
+from langchain.docstore.document import Document
+from langchain_core.runnables import RunnableLambda
+
+from fake_llm import FakeStreamingChatModel
+from pipeline import ANALYSIS_PROMPT, build_sources, stream_proposal, run_proposal
+from rag_pipeline import RAGPipeline
+from streaming import StageLatency, timed_stream
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming latency benchmark")
+    parser.add_argument("--first-token-delay", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    llm = FakeStreamingChatModel(first_token_delay=args.first_token_delay,
+                                 token_delay=args.token_delay)
+    rag = RAGPipeline(llm=llm)
+    sources = build_sources({"title": "Python developer", "description": "Build a data pipeline.",
+                             "links": [], "documents": []})
+    # A fixed retriever keeps embeddings out of the measurement
+    retriever = RunnableLambda(lambda _: [Document(page_content=sources["job"]["description"])])
+
+    analysis_latency = StageLatency("analysis")
+    analysis_text = "".join(timed_stream(rag.stream_response(ANALYSIS_PROMPT, retriever),
+                                         analysis_latency))
+    proposal_latency = StageLatency("proposal")
+    "".join(timed_stream(stream_proposal(analysis_text, sources, llm=llm), proposal_latency))
+
+    start = time.perf_counter()
+    rag.generate_response(ANALYSIS_PROMPT, retriever)
+    blocking_analysis = time.perf_counter() - start
+    start = time.perf_counter()
+    run_proposal(analysis_text, sources, llm=llm)
+    blocking_proposal = time.perf_counter() - start
+
+    print(f"{'stage':10s} {'stream ttft':>12s} {'stream total':>13s} {'blocking':>10s}")
+    for latency, blocking in [(analysis_latency, blocking_analysis),
+                              (proposal_latency, blocking_proposal)]:
+        print(f"{latency.stage:10s} {latency.ttft:11.2f}s {latency.total:12.2f}s {blocking:9.2f}s")
+
+if __name__ == "__main__":
+    main()
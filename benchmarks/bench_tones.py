@@ -0,0 +1,76 @@
+# File: benchmarks/bench_tones.py
+# Multi-tone proposals: wall time of generating every tone one after
+# another vs. concurrently from one analysis, against the local fake chat
+# model, optionally with injected 429 responses to exercise the backoff.
+#
+# Usage: python -m benchmarks.bench_tones [--latency 1.0] [--rate-limited 2]
+
+import argparse
+import threading
+import time
+
+import httpx
+from groq import RateLimitError
+from pydantic import PrivateAttr
+
+from fake_llm import FakeStreamingChatModel
+from pipeline import TONE_MAP, build_sources, run_proposal, run_proposals
+
+class RateLimitedModel(FakeStreamingChatModel):
+    """Fake model whose first `failures` calls fail with HTTP 429"""
+
+    failures: int = 0
+    _calls: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        with self._lock:
+            self._calls += 1
+            fail = self._calls <= self.failures
+        if fail:
+            request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+            raise RateLimitError("rate limited", response=httpx.Response(429, request=request), body=None)
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-tone proposal benchmark")
+    parser.add_argument("--latency", type=float, default=1.0, help="simulated seconds per LLM call")
+    parser.add_argument("--rate-limited", type=int, default=2,
+                        help="number of calls that first get a 429")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    sources = build_sources({"title": "Data engineer", "description": "Build a data pipeline.",
+                             "links": [], "documents": []})
+    analysis = "- Python data pipeline\n- PostgreSQL loading"
+    tones = list(TONE_MAP.values())
+
+    llm = FakeStreamingChatModel(first_token_delay=args.latency)
+    start = time.perf_counter()
+    run_proposal(analysis, sources, tone=tones[0], llm=llm)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for tone in tones:
+        run_proposal(analysis, sources, tone=tone, llm=llm)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run_proposals(analysis, sources, tones, llm=llm, concurrency=args.concurrency)
+    concurrent = time.perf_counter() - start
+
+    flaky = RateLimitedModel(first_token_delay=args.latency, failures=args.rate_limited)
+    start = time.perf_counter()
+    results = run_proposals(analysis, sources, tones, llm=flaky, concurrency=args.concurrency)
+    with_429 = time.perf_counter() - start
+    failed = sum(isinstance(r, Exception) for r in results.values())
+
+    print(f"{len(tones)} tones, {args.latency:.2f}s per call")
+    print(f"{'single proposal':<34}{single:>7.2f}s")
+    print(f"{'all tones, sequential':<34}{sequential:>7.2f}s")
+    print(f"{'all tones, concurrent':<34}{concurrent:>7.2f}s")
+    print(f"{f'concurrent, {args.rate_limited} x 429 then retry':<34}{with_429:>7.2f}s"
+          f"  ({failed} failed)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# File: benchmarks/bench_transcribe.py
+# Long-media transcription: real-time factor (processing time / audio
+# duration) of one whole-file Whisper call vs. silence-split segments over
+# 1..N worker processes. CPU only.
+#
+# Usage: python -m benchmarks.bench_transcribe [--audio talk.mp3] [--minutes 10]
+#        [--model base] [--backend whisper] [--workers 1,2,4]
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from long_media import SAMPLE_RATE, ChunkedTranscriber, load_audio, silence_splits
+from transcription_backends import get_backend
+
+def synthetic_audio(minutes, seed=0):
+    """Speech-like bursts (amplitude-modulated tones and noise) separated by
+    short silences, so the splitter has realistic cut points"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    total = int(minutes * 60 * SAMPLE_RATE)
+    while sum(len(p) for p in parts) < total:
+        n = int(rng.uniform(2, 8) * SAMPLE_RATE)
+        t = np.arange(n) / SAMPLE_RATE
+        tone = np.sin(2 * np.pi * rng.uniform(120, 300) * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+        parts.append((0.3 * tone + 0.05 * rng.standard_normal(n)).astype(np.float32))
+        parts.append(np.zeros(int(rng.uniform(0.2, 0.8) * SAMPLE_RATE), dtype=np.float32))
+    return np.concatenate(parts)[:total]
+
+def rtf_whole(audio, model_size, backend):
+    engine = get_backend(backend, model_size, threads=os.cpu_count() or 1)
+    engine.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))  # load the model
+    start = time.perf_counter()
+    engine.transcribe(audio)
+    return (time.perf_counter() - start) / (len(audio) / SAMPLE_RATE)
+
+def rtf_chunked(audio, model_size, backend, workers, segment_seconds):
+    transcriber = ChunkedTranscriber(model_size, workers, segment_seconds, backend=backend)
+    try:
+        # Warm the pool (model load per worker) outside the timed region,
+        # as the app keeps the pool alive between videos.
+        transcriber.warm_up()
+        start = time.perf_counter()
+        first = None
+        for _ in transcriber.iter_segments(audio):
+            first = first or time.perf_counter() - start
+        elapsed = time.perf_counter() - start
+    finally:
+        transcriber.close()
+    return elapsed / (len(audio) / SAMPLE_RATE), first
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-media transcription benchmark")
+    parser.add_argument("--audio", help="media file to transcribe (default: synthetic audio)")
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--backend", default="whisper", help="whisper or faster-whisper")
+    parser.add_argument("--segment-seconds", type=float, default=60)
+    parser.add_argument("--workers", default=None, help="comma-separated worker counts")
+    args = parser.parse_args()
+
+    audio = load_audio(args.audio) if args.audio else synthetic_audio(args.minutes)
+    cores = os.cpu_count() or 1
+    counts = [int(w) for w in args.workers.split(",")] if args.workers else \
+        sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+    segments = silence_splits(audio, args.segment_seconds)
+    print(f"audio: {len(audio) / SAMPLE_RATE:.0f}s, {len(segments)} segments, {cores} cores, {args.backend} {args.model}")
+
+    print(f"{'mode':<22}{'RTF':>8}{'speedup':>10}{'first text':>12}")
+    base = rtf_whole(audio, args.model, args.backend)
+    print(f"{'whole file':<22}{base:>8.3f}{1.0:>9.2f}x{'-':>12}")
+    for workers in counts:
+        rtf, first = rtf_chunked(audio, args.model, args.backend, workers, args.segment_seconds)
+        print(f"{f'chunked x{workers}':<22}{rtf:>8.3f}{base / rtf:>9.2f}x{first:>11.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# File: benchmarks/bench_transcribe_backends.py
+# Transcription backends on the short speech fixtures: real-time factor,
+# model load time, peak memory and word error rate. Each backend runs in a
+# fresh interpreter so peak RSS is not shared between them.
+#
+# Usage: python -m benchmarks.make_audio_fixtures   (once)
+#        python -m benchmarks.bench_transcribe_backends [--model base] [--threads 4]
+#        [--backends whisper,faster-whisper]
+
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.make_audio_fixtures import AUDIO_DIR, load_manifest
+from benchmarks.stubs import ROOT
+
+def words(text):
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the reference length"""
+    ref, hyp = words(reference), words(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / max(1, len(ref))
+
+def measure(backend, model_size, threads):
+    """Run inside a fresh interpreter"""
+    from long_media import SAMPLE_RATE, load_audio
+    from transcription_backends import get_backend
+
+    engine = get_backend(backend, model_size, threads)
+    clips = [(load_audio(os.path.join(AUDIO_DIR, item["file"])), item["text"])
+             for item in load_manifest()]
+
+    start = time.perf_counter()
+    engine.transcribe(clips[0][0][:SAMPLE_RATE])  # loads the model
+    load_time = time.perf_counter() - start
+
+    audio_seconds = elapsed = errors = 0.0
+    for audio, reference in clips:
+        start = time.perf_counter()
+        text = engine.transcribe(audio)["text"]
+        elapsed += time.perf_counter() - start
+        audio_seconds += len(audio) / SAMPLE_RATE
+        errors += word_error_rate(reference, text)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {"load": load_time, "rtf": elapsed / audio_seconds, "peak_mb": peak_mb,
+            "wer": errors / len(clips)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcription backend benchmark")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backends", default="whisper,faster-whisper")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.model, args.threads)))
+        return
+
+    missing = [item["file"] for item in load_manifest()
+               if not os.path.exists(os.path.join(AUDIO_DIR, item["file"]))]
+    if missing:
+        raise SystemExit(f"Missing fixtures {missing}; run python -m benchmarks.make_audio_fixtures")
+
+    print(f"model {args.model}, {args.threads} threads")
+    print(f"{'backend':<18}{'load':>8}{'RTF':>8}{'peak MB':>10}{'WER':>8}")
+    for backend in args.backends.split(","):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_transcribe_backends", "--child", backend,
+             "--model", args.model, "--threads", str(args.threads)],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if out.returncode != 0:
+            print(f"{backend:<18}failed: {out.stderr.strip().splitlines()[-1]}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{backend:<18}{r['load']:>7.1f}s{r['rtf']:>8.3f}{r['peak_mb']:>10.0f}{r['wer']:>8.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# File: benchmarks/make_audio_fixtures.py
+# Synthesizes the speech fixtures listed in fixtures/audio/manifest.json as
+# 16 kHz mono WAV files with espeak-ng (or macOS `say` plus ffmpeg), so the
+# transcription benchmark has audio with known reference transcripts.
+#
+# Usage: python -m benchmarks.make_audio_fixtures [--force]
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+from benchmarks.stubs import FIXTURES
+
+AUDIO_DIR = os.path.join(FIXTURES, "audio")
+
+def load_manifest():
+    with open(os.path.join(AUDIO_DIR, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def _temp_path(suffix):
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        return tmp.name
+
+def synthesize(text, path):
+    espeak = shutil.which("espeak-ng") or shutil.which("espeak")
+    if espeak:
+        raw = _temp_path(".wav")
+        command = [espeak, "-s", "150", "-w", raw, text]
+    elif shutil.which("say"):
+        raw = _temp_path(".aiff")
+        command = ["say", "-o", raw, text]
+    else:
+        raise SystemExit("No speech synthesizer found (install espeak-ng)")
+    try:
+        subprocess.run(command, check=True)
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", raw,
+                        "-ac", "1", "-ar", "16000", path], check=True)
+    finally:
+        os.unlink(raw)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate speech fixtures for transcription benchmarks")
+    parser.add_argument("--force", action="store_true", help="regenerate existing files")
+    args = parser.parse_args()
+
+    for item in load_manifest():
+        path = os.path.join(AUDIO_DIR, item["file"])
+        if os.path.exists(path) and not args.force:
+            continue
+        synthesize(item["text"], path)
+        print(f"wrote {path}")
+
+if __name__ == "__main__":
+    main()
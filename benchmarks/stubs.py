@@ -0,0 +1,90 @@
+# File: benchmarks/stubs.py
+# Local stand-ins for external services used by the benchmarks
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+
+def load_fixture(*parts, mode="r"):
+    with open(os.path.join(FIXTURES, *parts), mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+        return f.read()
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serve routes from server.routes: path -> (status, headers, body bytes)
+
+    A route may set its own Content-Length (with "Connection: close") to
+    simulate a connection dropped mid-body.
+
+    POST bodies are read into self.body before the route is called.
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real origin
+    # Headers and body go out as separate writes; without TCP_NODELAY,
+    # Nagle plus delayed ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.do_GET()
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        server.clients.add(self.client_address)
+        if server.latency:
+            time.sleep(server.latency)
+        route = server.routes.get(self.path.split("?")[0]) or server.routes.get("*")
+        if route is None:
+            status, headers, body = 404, {}, b"not found"
+        else:
+            status, headers, body = route(self) if callable(route) else route
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if "Content-Length" not in headers:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not server.bandwidth:
+            self.wfile.write(body)
+            return
+        # Trickle the body out at `bandwidth` bytes/sec in 64 KiB slices
+        for start in range(0, len(body), 64 * 1024):
+            self.wfile.write(body[start:start + 64 * 1024])
+            time.sleep(min(64 * 1024, len(body) - start) / server.bandwidth)
+
+    def log_message(self, *args):
+        pass
+
+@contextmanager
+def stub_server(routes, latency=0.0, host="0.0.0.0", bandwidth=0):
+    """Run a threaded HTTP server in the background; yields it with .base_url set
+
+    The server binds to all interfaces so that 127.0.0.x aliases act as
+    distinct hosts for per-host rate limiting. bandwidth (bytes/sec, 0 =
+    unlimited) throttles response bodies like a slow download.
+    """
+    server = ThreadingHTTPServer((host, 0), StubHandler)
+    server.daemon_threads = True
+    server.routes = routes
+    server.latency = latency
+    server.bandwidth = bandwidth
+    server.requests = 0
+    server.clients = set()  # distinct (host, port) pairs = TCP connections
+    server.port = server.server_address[1]
+    server.base_url = f"http://127.0.0.1:{server.port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def html_route(html, headers=None):
+    body = html.encode("utf-8") if isinstance(html, str) else html
+    return (200, {"Content-Type": "text/html; charset=utf-8", **(headers or {})}, body)
@@ -0,0 +1,231 @@
+# File: benchmarks/suite.py
+# Offline benchmark of the analysis pipeline, stage by stage and end to
+# end: fixture pages served by a local stub server, the deterministic fake
+# chat model instead of ChatGroq, fake (or real) embeddings and the audio
+# fixtures. Writes a JSON report and compares it against a baseline.
+#
+# Usage: python -m benchmarks.suite [--repeat 20] [-o report.json]
+#        [--baseline baseline.json] [--tolerance 0.2] [--min-delta-ms 1]
+#        [--llm-latency 0] [--real-embeddings]
+#
+# Exits with status 1 when a stage's median is slower than the baseline by
+# more than the tolerance.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.stubs import ROOT, html_route, load_fixture, stub_server
+
+def isolate(cache_dir):
+    """Point every cache at an empty directory and switch off result caches,
+    so each stage does its full work. Must run before config is imported."""
+    os.environ.update(
+        CACHE_DIR=cache_dir,
+        KNOWLEDGE_INDEX_DIR=os.path.join(cache_dir, "knowledge_index"),
+        SCRAPE_CACHE_ENABLED="0",
+        TRANSCRIPT_CACHE_ENABLED="0",
+        LLM_CACHE_ENABLED="0",
+        SEMANTIC_CACHE_ENABLED="0",
+        DUPLICATE_DETECTION_ENABLED="0",  # every run analyzes the same fixture page
+        ATTACHMENTS_ENABLED="0",  # the fixture pages link to hosts that do not exist
+        TRACE_ENABLED="0",
+        MODEL_WARMUP="",
+        GROQ_API_KEY=os.getenv("GROQ_API_KEY", "bench"),
+    )
+
+def use_fake_embeddings(size=384):
+    """Deterministic hash-based vectors with the shape of MiniLM's output"""
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from config import EMBEDDING_MODEL
+    from model_registry import embeddings_key, registry
+    registry.register(embeddings_key(EMBEDDING_MODEL), lambda: DeterministicFakeEmbedding(size=size))
+
+def timed(func, repeat, warmup=1, setup=None):
+    """Wall-clock seconds of each call; setup() runs untimed before every call"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        "runs": len(ordered),
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "min_ms": ordered[0] * 1000,
+    }
+
+def long_transcript(words=4000):
+    """Transcript-sized text so split/embed/retrieve see several chunks"""
+    sentence = ("The client explains that the nightly import fails when a vendor changes "
+                "the column order, and they want alerts plus a retry instead of a silent gap. ")
+    return sentence * (words // len(sentence.split()))
+
+def run_stages(repeat, llm_latency, cache_dir):
+    from embedding_backends import embed_array
+    from fake_llm import FakeStreamingChatModel
+    from job_scraper import parse_job_html, scrape_job_post
+    from model_registry import get_embeddings
+    from pipeline import ANALYSIS_PROMPT, build_documents, build_sources, run_analysis, run_proposal
+    from rag_pipeline import RAGPipeline
+    from text_cleaner import default_cleaner
+
+    llm = FakeStreamingChatModel(first_token_delay=llm_latency)
+    rag = RAGPipeline(llm=llm)
+    html = load_fixture("pages", "job_post.html")
+    results = {}
+
+    with stub_server({"*": html_route(html)}) as server:
+        url = server.base_url + "/jobs/1"
+        scraped = scrape_job_post(url, polite_delay=False, cache=None)
+        assert "error" not in scraped, scraped
+        sources = build_sources(scraped, video_text=long_transcript())
+        documents = build_documents(sources)
+        chunks = rag.text_splitter.split_documents(documents)
+        texts = [chunk.page_content for chunk in chunks]
+        model = get_embeddings(rag.embedding_model)
+        vectors = embed_array(model, texts)
+        retriever = rag.build_knowledge_base([(chunks, vectors)], job_id="bench")
+        dirty = "\n".join([scraped["description"], "Budget: $1,500", "Proposals: 20 to 50"] * 200)
+
+        stages = [
+            ("scrape", lambda: scrape_job_post(url, polite_delay=False, cache=None)),
+            ("parse", lambda: parse_job_html(html)),
+            ("clean", lambda: default_cleaner.clean(dirty)),
+            ("split", lambda: rag.text_splitter.split_documents(documents)),
+            ("embed", lambda: embed_array(model, texts)),
+            ("index", lambda: rag.build_knowledge_base([(chunks, vectors)], job_id="bench")),
+            ("retrieve", lambda: retriever.invoke(ANALYSIS_PROMPT)),
+            ("generate", lambda: run_proposal(
+                rag.generate_response(ANALYSIS_PROMPT, retriever)["answer"], sources, llm=llm)),
+        ]
+        for name, func in stages:
+            results[name] = summarize(timed(func, repeat))
+
+        # The no-video path of app.py, with a cold embedding cache each run
+        def end_to_end():
+            job = build_sources(scrape_job_post(url, polite_delay=False, cache=None))
+            analysis = run_analysis(rag, job, job_id="bench")
+            run_proposal(analysis["answer"], job, llm=llm)
+        embedding_cache = os.path.join(cache_dir, "embeddings")
+        results["end_to_end"] = summarize(timed(
+            end_to_end, repeat, setup=lambda: shutil.rmtree(embedding_cache, ignore_errors=True)))
+
+    results["transcribe"] = run_transcribe(max(1, repeat // 10))
+    return results
+
+def run_transcribe(repeat):
+    """Whisper on the audio fixtures; skipped when Whisper or the clips are missing"""
+    from benchmarks.make_audio_fixtures import AUDIO_DIR, load_manifest
+    clips = [os.path.join(AUDIO_DIR, item["file"]) for item in load_manifest()]
+    if not all(os.path.exists(clip) for clip in clips):
+        return {"skipped": "audio fixtures missing (python -m benchmarks.make_audio_fixtures)"}
+    try:
+        from long_media import load_audio
+        from transcription_backends import get_backend
+        audio = [load_audio(clip) for clip in clips]
+        backend = get_backend()
+    except ImportError as e:
+        return {"skipped": f"transcription unavailable: {e}"}
+    return summarize(timed(lambda: [backend.transcribe(a) for a in audio], repeat))
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def compare(report, baseline, tolerance, min_delta_ms):
+    """Print per-stage change vs the baseline; returns the regressed stages
+
+    A stage regresses when its median is more than `tolerance` (relative)
+    and `min_delta_ms` (absolute) slower, so sub-millisecond jitter in the
+    fast stages does not fail a run.
+    """
+    regressed = []
+    print(f"{'stage':<12}{'baseline ms':>13}{'now ms':>10}{'change':>9}")
+    for name, now in report["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before or "median_ms" not in before or "median_ms" not in now:
+            continue
+        change = now["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+        flag = ""
+        if change > tolerance and now["median_ms"] - before["median_ms"] > min_delta_ms:
+            regressed.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<12}{before['median_ms']:>13.2f}{now['median_ms']:>10.2f}{change:>+9.1%}{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark suite")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-o", "--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed median slowdown before a stage counts as regressed")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore slowdowns smaller than this many milliseconds")
+    parser.add_argument("--llm-latency", type=float, default=0.0,
+                        help="simulated seconds per fake LLM call")
+    parser.add_argument("--real-embeddings", action="store_true",
+                        help="use the configured embedding model instead of fake vectors")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-cache-") as cache_dir:
+        isolate(cache_dir)
+        sys.path.insert(0, ROOT)
+        if not args.real_embeddings:
+            use_fake_embeddings()
+        stages = run_stages(args.repeat, args.llm_latency, cache_dir)
+
+    report = {
+        "environment": environment(),
+        "settings": {"repeat": args.repeat, "llm_latency": args.llm_latency,
+                     "embeddings": "real" if args.real_embeddings else "fake"},
+        "stages": stages,
+    }
+    for name, stats in stages.items():
+        if "skipped" in stats:
+            print(f"{name:<12} skipped: {stats['skipped']}")
+        else:
+            print(f"{name:<12}{stats['median_ms']:>10.2f} ms median{stats['p95_ms']:>10.2f} ms p95")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != report["settings"]:
+            print("warning: baseline was recorded with different settings", file=sys.stderr)
+        if compare(report, baseline, args.tolerance, args.min_delta_ms):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# File: chain_factory.py
+# Builds LLM clients and prompt chains once per process instead of on
+# every call; all Groq clients share one pooled HTTP connection pool
+
+import asyncio
+import threading
+
+import httpx
+
+from config import (LLM_MODEL, LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE, LLM_TIMEOUT,
+    LLM_CONNECT_TIMEOUT, LLM_MAX_RETRIES)
+
+_lock = threading.RLock()
+_http_client = None
+_async_http_client = None
+_loop = None
+_models = {}
+_chains = {}
+
+def _client_options():
+    return dict(
+        limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                            max_keepalive_connections=LLM_MAX_KEEPALIVE),
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+    )
+
+def http_client():
+    """Process-wide httpx client with keep-alive connections to the LLM API"""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(**_client_options())
+        return _http_client
+
+def async_http_client():
+    """Async counterpart of http_client; only used on the event_loop() thread"""
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(**_client_options())
+        return _async_http_client
+
+def event_loop():
+    """Process-wide event loop running in a daemon thread
+
+    Async LLM calls all run here, so pooled async connections stay bound
+    to one loop instead of a new asyncio.run() loop per Streamlit rerun.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+        return _loop
+
+def run_coroutine(coro):
+    """Run a coroutine on event_loop() and block until it finishes"""
+    return asyncio.run_coroutine_threadsafe(coro, event_loop()).result()
+
+def get_chat_model(temperature, model=LLM_MODEL):
+    """Cached ChatGroq client for (model, temperature)"""
+    with _lock:
+        key = (model, temperature)
+        if key not in _models:
+            from langchain_groq import ChatGroq
+            _models[key] = ChatGroq(
+                model_name=model,
+                temperature=temperature,
+                max_retries=LLM_MAX_RETRIES,
+                http_client=http_client(),
+                http_async_client=async_http_client()
+            )
+        return _models[key]
+
+def get_chain(name, build, llm=None, **params):
+    """Return the chain called `name` for these parameters, building it once
+
+    `build(llm)` receives the override model (or None). Chains built around
+    an override model are cached per model instance.
+    """
+    key = (name, id(llm) if llm is not None else None, tuple(sorted(params.items())))
+    with _lock:
+        if key not in _chains:
+            # Keep a reference to llm so its id cannot be reused
+            _chains[key] = (llm, build(llm))
+        return _chains[key][1]
+
+def clear():
+    """Drop cached chains and clients (e.g. after changing configuration)"""
+    global _http_client
+    with _lock:
+        _chains.clear()
+        _models.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
@@ -7,6 +7,157 @@ load_dotenv()
 # Environment Variables
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+# Model names
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3-70b-8192")
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# Model registry (shared across Streamlit reruns and sessions)
+MODEL_REGISTRY_ENABLED = os.getenv("MODEL_REGISTRY_ENABLED", "1") != "0"
+MODEL_MAX_LOADED = int(os.getenv("MODEL_MAX_LOADED", "4"))
+MODEL_IDLE_TTL = float(os.getenv("MODEL_IDLE_TTL", "0"))  # seconds, 0 = never evict idle models
+# Models to load at startup, comma-separated ("whisper", "embeddings").
+# Off by default: jobs that fit the context budget never embed, and
+# warming the embeddings loads PyTorch into every app and service process.
+MODEL_WARMUP = [m.strip() for m in os.getenv("MODEL_WARMUP", "").split(",") if m.strip()]
+
+# Embeddings: "huggingface" (sentence-transformers, PyTorch fp32) or "onnx"
+# (ONNX Runtime on CPU; the model's ONNX export is quantized to int8 once
+# and kept in CACHE_DIR). Requests from concurrent threads are merged into
+# batches of up to EMBEDDING_BATCH_SIZE texts, waiting at most
+# EMBEDDING_BATCH_WAIT_MS for more to arrive.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "huggingface")
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model.onnx")  # path inside the model repo/directory
+EMBEDDING_ONNX_QUANTIZE = os.getenv("EMBEDDING_ONNX_QUANTIZE", "1") != "0"  # 0 = file is already quantized
+EMBEDDING_MAX_TOKENS = int(os.getenv("EMBEDDING_MAX_TOKENS", "256"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # CPU threads, 0 = library default
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+
+# Video transcription
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "1"))  # Whisper worker processes
+# "whisper" (openai-whisper, PyTorch fp32) or "faster-whisper" (CTranslate2)
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "whisper")
+TRANSCRIBE_THREADS = int(os.getenv("TRANSCRIBE_THREADS", "0"))  # CPU threads per model, 0 = library default
+TRANSCRIBE_COMPUTE_TYPE = os.getenv("TRANSCRIBE_COMPUTE_TYPE", "int8")  # faster-whisper only
+# Media longer than this is split at silences and transcribed in parallel segments
+LONG_MEDIA_THRESHOLD = float(os.getenv("LONG_MEDIA_THRESHOLD", "300"))  # seconds, 0 = never split
+LONG_MEDIA_SEGMENT_SECONDS = float(os.getenv("LONG_MEDIA_SEGMENT_SECONDS", "60"))
+LONG_MEDIA_WORKERS = int(os.getenv("LONG_MEDIA_WORKERS", "0"))  # 0 = half the CPU cores
+
+# HTML parsing: "html.parser" (BeautifulSoup), "bs4-lxml", "lxml" or "selectolax"
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "html.parser")
+
+# On-disk caches
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+SCRAPE_CACHE_ENABLED = os.getenv("SCRAPE_CACHE_ENABLED", "1") != "0"
+SCRAPE_CACHE_TTL = float(os.getenv("SCRAPE_CACHE_TTL", str(6 * 3600)))  # seconds before revalidating
+SCRAPE_CACHE_MAX_MB = float(os.getenv("SCRAPE_CACHE_MAX_MB", "200"))
+TRANSCRIPT_CACHE_ENABLED = os.getenv("TRANSCRIPT_CACHE_ENABLED", "1") != "0"
+TRANSCRIPT_CACHE_MAX_MB = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "100"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds, 0 = never expire
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "50"))
+# Reuse the analysis of a near-identical earlier job (cosine similarity of
+# description embeddings) instead of calling the LLM
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0") != "0"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+# Reposted jobs: MinHash fingerprints of cleaned descriptions in an on-disk
+# LSH index, checked before any embedding or LLM work. A job whose
+# estimated Jaccard similarity (over word shingles) to an earlier one
+# reaches DUPLICATE_THRESHOLD is reported with a diff. Its analysis is
+# reused only at DUPLICATE_REUSE_THRESHOLD with the same video and
+# attachments; 1.0 requires an identical cleaned description.
+DUPLICATE_DETECTION_ENABLED = os.getenv("DUPLICATE_DETECTION_ENABLED", "1") != "0"
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+DUPLICATE_REUSE_THRESHOLD = float(os.getenv("DUPLICATE_REUSE_THRESHOLD", "1.0"))
+DUPLICATE_NUM_PERM = int(os.getenv("DUPLICATE_NUM_PERM", "128"))  # MinHash signature length
+DUPLICATE_SHINGLE_WORDS = int(os.getenv("DUPLICATE_SHINGLE_WORDS", "3"))
+# Knowledge index: every embedded job in one FAISS index; updates go to an
+# append-only journal that is folded into a snapshot once it reaches
+# KNOWLEDGE_INDEX_COMPACT_MB
+KNOWLEDGE_INDEX_ENABLED = os.getenv("KNOWLEDGE_INDEX_ENABLED", "1") != "0"
+KNOWLEDGE_INDEX_DIR = os.getenv("KNOWLEDGE_INDEX_DIR", os.path.join(CACHE_DIR, "knowledge_index"))
+KNOWLEDGE_INDEX_COMPACT_MB = float(os.getenv("KNOWLEDGE_INDEX_COMPACT_MB", "64"))
+
+# Attachments: documents from the job post are downloaded, converted to
+# text and added to the knowledge base while the other stages run. Other
+# links are followed only with ATTACHMENT_INCLUDE_LINKS=1. Whatever is not
+# ready when the time budget runs out is skipped.
+ATTACHMENTS_ENABLED = os.getenv("ATTACHMENTS_ENABLED", "1") != "0"
+ATTACHMENT_INCLUDE_LINKS = os.getenv("ATTACHMENT_INCLUDE_LINKS", "0") != "0"
+ATTACHMENT_MAX_COUNT = int(os.getenv("ATTACHMENT_MAX_COUNT", "10"))
+ATTACHMENT_MAX_MB = float(os.getenv("ATTACHMENT_MAX_MB", "10"))  # per download
+ATTACHMENT_MAX_CHARS = int(os.getenv("ATTACHMENT_MAX_CHARS", "100000"))  # text kept per attachment
+ATTACHMENT_CONCURRENCY = int(os.getenv("ATTACHMENT_CONCURRENCY", "4"))
+ATTACHMENT_WORKERS = int(os.getenv("ATTACHMENT_WORKERS", "2"))  # text extraction processes
+ATTACHMENT_TIME_BUDGET = float(os.getenv("ATTACHMENT_TIME_BUDGET", "20"))  # seconds, 0 = no limit
+ATTACHMENT_CACHE_ENABLED = os.getenv("ATTACHMENT_CACHE_ENABLED", "1") != "0"
+ATTACHMENT_CACHE_TTL = float(os.getenv("ATTACHMENT_CACHE_TTL", str(24 * 3600)))  # seconds before re-downloading
+ATTACHMENT_CACHE_MAX_MB = float(os.getenv("ATTACHMENT_CACHE_MAX_MB", "100"))
+
+# Analysis context: prompt-token budget for retrieved context (the whole job
+# is sent without retrieval when it fits), candidates considered and the
+# relevance/diversity trade-off of maximal marginal relevance
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+CONTEXT_FETCH_K = int(os.getenv("CONTEXT_FETCH_K", "20"))
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.5"))
+CONTEXT_BASELINE_K = int(os.getenv("CONTEXT_BASELINE_K", "5"))  # top-k the savings are reported against
+
+# Batch mode
+BATCH_SCRAPE_WORKERS = int(os.getenv("BATCH_SCRAPE_WORKERS", "4"))
+BATCH_ANALYSIS_WORKERS = int(os.getenv("BATCH_ANALYSIS_WORKERS", "2"))
+BATCH_PROPOSAL_WORKERS = int(os.getenv("BATCH_PROPOSAL_WORKERS", "2"))
+BATCH_QUEUE_SIZE = int(os.getenv("BATCH_QUEUE_SIZE", "16"))
+SCRAPE_RATE_LIMIT = float(os.getenv("SCRAPE_RATE_LIMIT", "0.5"))  # requests/sec, 0 = unlimited
+SCRAPE_RATE_BURST = float(os.getenv("SCRAPE_RATE_BURST", "1"))
+SCRAPE_MAX_CONNECTIONS = int(os.getenv("SCRAPE_MAX_CONNECTIONS", "32"))
+SCRAPE_MAX_PER_HOST = int(os.getenv("SCRAPE_MAX_PER_HOST", "4"))
+SCRAPE_TIMEOUT = float(os.getenv("SCRAPE_TIMEOUT", "25"))
+LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "0.5"))  # LLM calls/sec, 0 = unlimited
+
+# Feed watcher (feed_watcher.py): saved-search/RSS feeds are polled with
+# conditional GET. A feed's interval shrinks after a poll that finds new
+# or edited postings and grows by FEED_BACKOFF after one that does not;
+# failed postings are offered again up to FEED_MAX_ATTEMPTS times.
+FEED_STATE_FILE = os.getenv("FEED_STATE_FILE", os.path.join(CACHE_DIR, "feeds.sqlite3"))
+FEED_MIN_INTERVAL = float(os.getenv("FEED_MIN_INTERVAL", "60"))  # seconds
+FEED_MAX_INTERVAL = float(os.getenv("FEED_MAX_INTERVAL", "3600"))
+FEED_INITIAL_INTERVAL = float(os.getenv("FEED_INITIAL_INTERVAL", "300"))
+FEED_BACKOFF = float(os.getenv("FEED_BACKOFF", "1.5"))
+FEED_MAX_ATTEMPTS = int(os.getenv("FEED_MAX_ATTEMPTS", "3"))
+
+# Headless service (service.py): worker processes with warm models, and
+# how many jobs may wait in the queue before submissions are refused
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "2"))
+SERVICE_QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", "100"))
+SERVICE_JOB_HISTORY = int(os.getenv("SERVICE_JOB_HISTORY", "1000"))  # finished jobs kept for polling
+# Models each worker loads before it takes jobs (like MODEL_WARMUP, which
+# the app leaves empty so its first render stays fast)
+SERVICE_WARMUP = [m.strip() for m in os.getenv("SERVICE_WARMUP", "embeddings").split(",") if m.strip()]
+
+# LLM HTTP client (one connection pool per process, shared by all chains)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # seconds per request
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# Multi-tone proposals: concurrent LLM calls and attempts per proposal when
+# the API answers 429 (exponential backoff with jitter between attempts)
+PROPOSAL_CONCURRENCY = int(os.getenv("PROPOSAL_CONCURRENCY", "4"))
+PROPOSAL_RETRY_ATTEMPTS = int(os.getenv("PROPOSAL_RETRY_ATTEMPTS", "4"))
+
+# Tracing: per-stage spans appended to TRACE_FILE as OpenTelemetry-style JSONL.
+# Once the file passes TRACE_MAX_MB it is moved to TRACE_FILE.1 (replacing
+# the previous one) and a new file is started.
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") != "0"
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(CACHE_DIR, "traces.jsonl"))
+TRACE_MAX_MB = float(os.getenv("TRACE_MAX_MB", "50"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(CACHE_DIR, "profiles"))
+
 # User Agents List
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
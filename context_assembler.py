@@ -0,0 +1,128 @@
+# File: context_assembler.py
+# Builds the analysis context within a prompt-token budget: the whole job
+# when it fits, otherwise a diverse (MMR) set of chunks with the overlap
+# between neighbouring chunks removed
+
+from functools import lru_cache
+
+import numpy as np
+from langchain.docstore.document import Document
+
+from config import CONTEXT_TOKEN_BUDGET, CONTEXT_FETCH_K, CONTEXT_MMR_LAMBDA, CONTEXT_BASELINE_K
+from embedding_backends import embed_array
+from model_registry import use_embeddings
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token, like the LLM cache)"""
+    return (len(text) + 3) // 4
+
+@lru_cache(maxsize=64)
+def _query_vector(model_name, query):
+    # The analysis query is the same for every job; embed it once
+    with use_embeddings(model_name) as model:
+        vector = embed_array(model, [query])[0]
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+def _source_key(metadata):
+    return tuple(sorted((k, str(v)) for k, v in metadata.items() if k != "start_index"))
+
+def merge_chunks(chunks):
+    """One Document per source with overlapping/adjacent chunks joined
+
+    Chunks need the splitter's start_index metadata; the overlapping text
+    two neighbouring chunks share appears once. Sources keep the order in
+    which they first appear; chunks within a source are in text order.
+    """
+    groups = {}
+    for chunk in chunks:
+        groups.setdefault(_source_key(chunk.metadata), []).append(chunk)
+    merged = []
+    for group in groups.values():
+        group.sort(key=lambda c: c.metadata.get("start_index", 0))
+        parts, end = [], None
+        for chunk in group:
+            start = chunk.metadata.get("start_index")
+            text = chunk.page_content
+            if start is not None and end is not None and start < end:
+                text = text[end - start:]  # drop the overlap with the previous chunk
+            elif parts:
+                parts.append("\n...\n")
+            parts.append(text)
+            if start is not None:
+                end = max(end or 0, start + len(chunk.page_content))
+        metadata = {k: v for k, v in group[0].metadata.items() if k != "start_index"}
+        merged.append(Document(page_content="".join(parts), metadata=metadata))
+    return merged
+
+def mmr_order(query_vector, vectors, fetch_k=CONTEXT_FETCH_K, lambda_mult=CONTEXT_MMR_LAMBDA):
+    """Indexes of the fetch_k chunks most similar to the query, reordered by
+    maximal marginal relevance (relevance minus similarity to earlier picks)"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    # Not in place: the vectors may be the caller's array
+    matrix = matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12)
+    relevance = matrix @ query_vector
+    candidates = list(np.argsort(-relevance)[:fetch_k])
+    order = []
+    redundancy = np.full(len(matrix), -1.0, dtype=np.float32)
+    while candidates:
+        scores = [lambda_mult * relevance[i] - (1 - lambda_mult) * redundancy[i] for i in candidates]
+        best = candidates.pop(int(np.argmax(scores)))
+        order.append(int(best))
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+    return order, relevance
+
+class KnowledgeBase:
+    """One job's documents (or chunks and their vectors) for the analysis
+
+    assemble() returns the context for a query and a report of the prompt
+    tokens it used against what stuffing the top CONTEXT_BASELINE_K chunks
+    would have sent. invoke() returns just the documents, like a retriever.
+    """
+
+    def __init__(self, chunks, vectors=None, embedding_model=None, budget=CONTEXT_TOKEN_BUDGET):
+        self.chunks = chunks
+        self.vectors = vectors
+        self.embedding_model = embedding_model
+        self.budget = budget
+        self.merged = merge_chunks(chunks)
+        self.total_tokens = sum(estimate_tokens(d.page_content) for d in self.merged)
+
+    def fits(self):
+        return self.total_tokens <= self.budget
+
+    def invoke(self, query, config=None):
+        return self.assemble(query)[0]
+
+    def assemble(self, query):
+        """(documents, report) for the query within the token budget"""
+        if self.fits() or self.vectors is None:
+            # Everything fits (or nothing was embedded because it would):
+            # no query embedding or search needed
+            baseline = self._baseline(range(len(self.chunks)))
+            context = self.merged if self.fits() else self._pack(range(len(self.chunks)))
+            return context, self._report("full" if self.fits() else "truncated", context, baseline)
+
+        order, relevance = mmr_order(_query_vector(self.embedding_model, query), self.vectors)
+        baseline = self._baseline(np.argsort(-relevance))
+        context = self._pack(order)
+        return context, self._report("mmr", context, baseline)
+
+    def _pack(self, order):
+        """Add chunks in the given order while the merged context stays within budget"""
+        picked = []
+        for i in order:
+            candidate = picked + [self.chunks[i]]
+            if sum(estimate_tokens(d.page_content) for d in merge_chunks(candidate)) <= self.budget:
+                picked = candidate
+        return merge_chunks(picked)
+
+    def _baseline(self, ranked):
+        """Tokens the stuff-top-k retriever would have put in the prompt
+        (without vectors, the first k chunks stand in for the top k)"""
+        top = list(ranked)[:CONTEXT_BASELINE_K]
+        return sum(estimate_tokens(self.chunks[i].page_content) for i in top)
+
+    def _report(self, mode, context, baseline):
+        tokens = sum(estimate_tokens(d.page_content) for d in context)
+        return {"mode": mode, "context_tokens": tokens, "baseline_tokens": baseline,
+                "saved_tokens": baseline - tokens, "corpus_tokens": self.total_tokens}
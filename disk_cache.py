@@ -0,0 +1,145 @@
+# File: disk_cache.py
+# SQLite-backed key/value store with TTL and size-bounded LRU eviction,
+# shared by the on-disk caches
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+CacheEntry = namedtuple("CacheEntry", ["value", "meta", "size", "created", "expired"])
+
+class DiskCache:
+    """Persistent cache of bytes/str values with JSON metadata
+
+    Entries older than `ttl` seconds are still returned (flagged as
+    expired) so callers can revalidate them; `max_bytes` bounds the total
+    value size, evicting the least recently used entries first.
+    """
+
+    def __init__(self, path, max_bytes=None, ttl=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB,
+                meta TEXT,
+                size INTEGER,
+                created REAL,
+                accessed REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+
+    def get(self, key, touch=True):
+        """Return a CacheEntry or None; counts a hit or miss"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, meta, size, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            if touch:
+                self._conn.execute(
+                    "UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key)
+                )
+        value, meta, size, created = row
+        expired = bool(self.ttl) and time.time() - created > self.ttl
+        return CacheEntry(value, json.loads(meta or "{}"), size, created, expired)
+
+    def set(self, key, value, meta=None):
+        size = len(value) if value is not None else 0
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, meta, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, json.dumps(meta or {}), size, now, now)
+            )
+            self._evict()
+
+    def refresh(self, key, meta=None):
+        """Mark an entry as fresh again (e.g. after a 304), optionally updating its metadata"""
+        now = time.time()
+        with self._lock:
+            if meta is None:
+                self._conn.execute(
+                    "UPDATE entries SET created = ?, accessed = ? WHERE key = ?", (now, now, key)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE entries SET created = ?, accessed = ?, meta = ? WHERE key = ?",
+                    (now, now, json.dumps(meta), key)
+                )
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def purge_expired(self, max_age=None):
+        """Delete entries older than max_age (defaults to ttl); returns the count removed"""
+        max_age = max_age or self.ttl
+        if not max_age:
+            return 0
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM entries WHERE created < ?", (time.time() - max_age,)
+            )
+            return cur.rowcount
+
+    def items(self):
+        """Return (key, CacheEntry) pairs for all entries without touching them"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, meta, size, created FROM entries"
+            ).fetchall()
+        now = time.time()
+        return [
+            (key, CacheEntry(value, json.loads(meta or "{}"), size, created,
+                             bool(self.ttl) and now - created > self.ttl))
+            for key, value, meta, size, created in rows
+        ]
+
+    def total_bytes(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
@@ -0,0 +1,224 @@
+# File: duplicate_index.py
+# Near-duplicate job detection: MinHash signatures of cleaned descriptions
+# in a banded LSH index stored in SQLite, mapped to the earlier analyses
+
+import difflib
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+from config import (CACHE_DIR, DUPLICATE_DETECTION_ENABLED, DUPLICATE_THRESHOLD, DUPLICATE_NUM_PERM,
+    DUPLICATE_SHINGLE_WORDS)
+
+_MIX = np.uint64(0x100000001B3)  # FNV prime: combines word hashes into shingle hashes
+_EMPTY = np.iinfo(np.uint32).max
+_WORDS = re.compile(r"\w+")
+
+def shingles(text, size=DUPLICATE_SHINGLE_WORDS):
+    """64-bit hashes of the overlapping `size`-word runs of the lower-cased text"""
+    words = _WORDS.findall(text.lower())
+    codes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+    size = max(1, min(size, len(codes)))
+    hashes = np.zeros(max(0, len(codes) - size + 1), dtype=np.uint64)
+    for k in range(size):
+        # uint64 arithmetic wraps around, which is what the hash wants
+        hashes = hashes * _MIX + codes[k:k + len(hashes)]
+    return hashes
+
+def lsh_bands(threshold, num_perm):
+    """(bands, rows) with bands * rows == num_perm and the LSH S-curve's
+    steepest point, (1/bands) ** (1/rows), as close below threshold as
+    possible: near misses become candidates and are checked exactly"""
+    shapes = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    below = [s for s in shapes if (1 / s[0]) ** (1 / s[1]) <= threshold]
+    return max(below, key=lambda s: s[1]) if below else shapes[0]
+
+def description_diff(old, new):
+    """Unified line diff from an earlier description to the new one"""
+    return "\n".join(difflib.unified_diff(
+        old.splitlines(), new.splitlines(), "earlier", "this job", lineterm=""
+    ))
+
+class DuplicateIndex:
+    """MinHash signatures of job descriptions with an LSH band table
+
+    Each signature is cut into bands; a job becomes a candidate when any
+    band hashes to the same bucket as the new one, so a lookup is one
+    indexed query per band however many jobs are stored. Candidates are
+    confirmed by the share of equal signature values (the estimated
+    Jaccard similarity of the description shingles).
+    """
+
+    def __init__(self, path=None, threshold=DUPLICATE_THRESHOLD, num_perm=DUPLICATE_NUM_PERM):
+        self.path = path or os.path.join(CACHE_DIR, "duplicates.sqlite3")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        # Multiply-shift hash functions; the seed is fixed because stored
+        # signatures must stay comparable across runs
+        rng = np.random.default_rng(0)
+        self._a = (rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * 2 + 1)[:, None]
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)[:, None]
+        self._lock = threading.Lock()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                job_id TEXT UNIQUE,
+                title TEXT,
+                description TEXT,
+                signature BLOB,
+                extras TEXT,
+                analysis TEXT,
+                created REAL
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER,
+                bucket INTEGER,
+                job INTEGER,
+                PRIMARY KEY (band, bucket, job)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS bands_job ON bands(job);
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value INTEGER);
+        """)
+        self._check_settings()
+
+    def _check_settings(self):
+        settings = dict(self._conn.execute("SELECT key, value FROM settings"))
+        if settings.get("num_perm", self.num_perm) != self.num_perm:
+            # Signatures of another length cannot be compared: start over
+            self._conn.executescript("DELETE FROM bands; DELETE FROM jobs;")
+            settings = {}
+        if settings.get("bands", self.bands) != self.bands:
+            # A new threshold changes the banding; re-band the stored signatures
+            with self._transaction():
+                self._conn.execute("DELETE FROM bands")
+                for job, signature in self._conn.execute("SELECT id, signature FROM jobs").fetchall():
+                    self._conn.executemany("INSERT OR IGNORE INTO bands VALUES (?, ?, ?)",
+                                           [(band, bucket, job) for band, bucket in self._buckets(
+                                               np.frombuffer(signature, dtype=np.uint32))])
+        self._conn.executemany("INSERT OR REPLACE INTO settings VALUES (?, ?)",
+                               [("num_perm", self.num_perm), ("bands", self.bands)])
+
+    @contextmanager
+    def _transaction(self):
+        # The connection autocommits; group a job's rows explicitly
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def signature(self, text):
+        """num_perm minimum hashes of the text's shingles (uint32)"""
+        hashes = shingles(text)
+        if not len(hashes):
+            return np.full(self.num_perm, _EMPTY, dtype=np.uint32)
+        return ((self._a * hashes + self._b) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+    @staticmethod
+    def _blank(signature):
+        """Signature of a text without shingles; all such texts share it"""
+        return bool((signature == _EMPTY).all())
+
+    def _buckets(self, signature):
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            yield band, int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big", signed=True)
+
+    def find(self, text, signature=None):
+        """The most similar stored job at or above the threshold, or None
+
+        Returns {"job_id", "title", "description", "analysis", "extras",
+        "similarity"}; analysis is None until one was recorded for the job.
+        """
+        signature = self.signature(text) if signature is None else signature
+        if self._blank(signature):
+            return None
+        with self._lock:
+            # One primary-key lookup per band
+            candidates = {job for band, bucket in self._buckets(signature) for (job,) in self._conn.execute(
+                "SELECT job FROM bands WHERE band = ? AND bucket = ?", (band, bucket))}
+            best, similarity = None, self.threshold
+            for job in candidates:
+                stored, = self._conn.execute("SELECT signature FROM jobs WHERE id = ?", (job,)).fetchone()
+                score = float(np.mean(np.frombuffer(stored, dtype=np.uint32) == signature))
+                if score >= similarity:
+                    best, similarity = job, score
+            if best is None:
+                return None
+            job_id, title, description, extras, analysis = self._conn.execute(
+                "SELECT job_id, title, description, extras, analysis FROM jobs WHERE id = ?", (best,)
+            ).fetchone()
+        return {"job_id": job_id, "title": title, "description": description, "extras": extras,
+                "analysis": analysis, "similarity": similarity}
+
+    def add(self, job_id, text, title="", extras="", analysis=None, signature=None):
+        """Insert or replace a job's fingerprint (and its analysis); a text
+        without shingles is not indexed"""
+        signature = self.signature(text) if signature is None else signature
+        if self._blank(signature):
+            return
+        with self._lock, self._transaction():
+            self._insert(job_id, text, title, extras, analysis, signature)
+
+    def add_many(self, jobs):
+        """Insert (job_id, text, title) tuples in one transaction, e.g. to
+        backfill earlier postings"""
+        rows = [(job_id, text, title, self.signature(text)) for job_id, text, title in jobs]
+        rows = [row for row in rows if not self._blank(row[3])]
+        with self._lock, self._transaction():
+            for job_id, text, title, signature in rows:
+                self._insert(job_id, text, title, "", None, signature)
+
+    def _insert(self, job_id, text, title, extras, analysis, signature):
+        self._remove(job_id)
+        job = self._conn.execute(
+            "INSERT INTO jobs (job_id, title, description, signature, extras, analysis, created) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, title, text, signature.tobytes(), extras, analysis, time.time())
+        ).lastrowid
+        self._conn.executemany("INSERT OR IGNORE INTO bands VALUES (?, ?, ?)",
+                               [(band, bucket, job) for band, bucket in self._buckets(signature)])
+
+    def remove(self, job_id):
+        with self._lock, self._transaction():
+            return self._remove(job_id)
+
+    def _remove(self, job_id):
+        row = self._conn.execute("SELECT id FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return False
+        self._conn.execute("DELETE FROM bands WHERE job = ?", row)
+        self._conn.execute("DELETE FROM jobs WHERE id = ?", row)
+        return True
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+def get_duplicate_index():
+    """Process-wide duplicate index, or None when detection is disabled"""
+    global _default_index
+    if not DUPLICATE_DETECTION_ENABLED:
+        return None
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DuplicateIndex()
+        return _default_index
@@ -0,0 +1,284 @@
+# File: embedding_backends.py
+# Sentence embedding engines behind one interface: sentence-transformers
+# (PyTorch, fp32) and ONNX Runtime with int8 weights on CPU. A batcher
+# merges embedding requests from concurrent threads into shared batches.
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config import (CACHE_DIR, EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_ONNX_FILE,
+    EMBEDDING_ONNX_QUANTIZE, EMBEDDING_MAX_TOKENS, EMBEDDING_THREADS, EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BATCH_WAIT_MS)
+
+def embed_array(model, texts):
+    """(len(texts), dim) float32 array from any LangChain embeddings object"""
+    if hasattr(model, "embed_array"):
+        return model.embed_array(texts)
+    vectors = np.asarray(model.embed_documents(list(texts)), dtype=np.float32)
+    return vectors.reshape(len(texts), -1)
+
+def length_batches(lengths, batch_size):
+    """Index batches of similar token length: shortest first, at most
+    batch_size texts each, so padding within a batch stays small"""
+    order = np.argsort(lengths, kind="stable")
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+def bucket_length(length, max_tokens=EMBEDDING_MAX_TOKENS):
+    """Pad to the next power of two (at least 16, at most max_tokens) so the
+    runtime sees a handful of input shapes instead of one per batch"""
+    return min(max_tokens, max(16, 1 << max(0, length - 1).bit_length()))
+
+class SentenceTransformersBackend:
+    """sentence-transformers on PyTorch (fp32 on CPU)"""
+
+    name = "huggingface"
+
+    def __init__(self, model_name=EMBEDDING_MODEL, threads=EMBEDDING_THREADS,
+                 batch_size=EMBEDDING_BATCH_SIZE):
+        self.model_name = model_name
+        self.threads = threads
+        self.batch_size = batch_size
+        self.model = None
+
+    def load(self):
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(self.model_name, device="cpu")
+        return self
+
+    @property
+    def dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts):
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        vectors = self.model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True)
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+class OnnxBackend:
+    """The model's ONNX export on ONNX Runtime (CPU), weights quantized to int8
+
+    Mean pooling and L2 normalisation match the sentence-transformers
+    pipeline of MiniLM-style models. Texts are sorted by token length and
+    each batch is padded only to its length bucket.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_name=EMBEDDING_MODEL, threads=EMBEDDING_THREADS,
+                 batch_size=EMBEDDING_BATCH_SIZE, model_file=EMBEDDING_ONNX_FILE,
+                 quantize=EMBEDDING_ONNX_QUANTIZE, max_tokens=EMBEDDING_MAX_TOKENS):
+        self.model_name = model_name
+        self.threads = threads
+        self.batch_size = batch_size
+        self.model_file = model_file
+        self.quantize = quantize
+        self.max_tokens = max_tokens
+        self.session = None
+        self.tokenizer = None
+
+    def _resolve(self, filename):
+        # A local model directory, otherwise a file in the Hugging Face Hub repo
+        local = os.path.join(self.model_name, filename)
+        if os.path.exists(local):
+            return local
+        from huggingface_hub import hf_hub_download
+        return hf_hub_download(self.model_name, filename)
+
+    def _quantized(self, source):
+        """int8 copy of an fp32 ONNX model, quantized once and kept in CACHE_DIR"""
+        name = os.path.splitext(os.path.basename(source))[0] + ".int8.onnx"
+        target = os.path.join(CACHE_DIR, "onnx", self.model_name.replace("/", "__"), name)
+        if not os.path.exists(target):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Per-process temp name: service workers may load concurrently
+            tmp = f"{target}.{os.getpid()}.tmp"
+            quantize_dynamic(source, tmp, weight_type=QuantType.QInt8)
+            os.replace(tmp, target)
+        return target
+
+    def load(self):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        path = self._resolve(self.model_file)
+        if self.quantize:
+            path = self._quantized(path)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(self._resolve("tokenizer.json"))
+        self.tokenizer.enable_truncation(self.max_tokens)
+        self.tokenizer.no_padding()  # padded per batch in embed()
+        return self
+
+    @property
+    def dimension(self):
+        return self.session.get_outputs()[0].shape[-1]
+
+    def embed(self, texts):
+        encodings = self.tokenizer.encode_batch(list(texts))
+        lengths = [len(e.ids) for e in encodings]
+        vectors = None
+        for batch in length_batches(lengths, self.batch_size):
+            width = bucket_length(max(lengths[i] for i in batch), self.max_tokens)
+            input_ids = np.zeros((len(batch), width), dtype=np.int64)
+            attention_mask = np.zeros((len(batch), width), dtype=np.int64)
+            for row, i in enumerate(batch):
+                input_ids[row, :lengths[i]] = encodings[i].ids
+                attention_mask[row, :lengths[i]] = 1
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            if vectors is None:
+                vectors = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            vectors[batch] = pooled
+        if vectors is None:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return vectors
+
+class DynamicBatcher:
+    """Run embedding requests from many threads as shared batches
+
+    One worker thread takes the oldest request, waits up to max_wait
+    seconds for others until max_batch texts are queued, embeds them in a
+    single backend call and hands each caller its rows. The worker exits
+    after idle_timeout seconds without requests, or on close(), so a
+    discarded batcher does not keep its backend alive; the next request
+    starts a new one.
+    """
+
+    def __init__(self, backend, max_batch=EMBEDDING_BATCH_SIZE, max_wait=EMBEDDING_BATCH_WAIT_MS / 1000,
+                 idle_timeout=30.0):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.idle_timeout = idle_timeout
+        self.metrics = {"requests": 0, "batches": 0, "texts": 0}
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.backend.dimension), dtype=np.float32)
+        future = Future()
+        self._queue.put((texts, future))
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True, name="embedding-batcher")
+                self._worker.start()
+        return future.result()
+
+    def close(self):
+        """Let the worker exit once the queued requests are done (does not wait)"""
+        with self._lock:
+            if self._worker is not None:
+                self._queue.put(None)
+
+    def _collect(self):
+        """(batch, stop): stop when idle or a close() sentinel was taken"""
+        try:
+            item = self._queue.get(timeout=self.idle_timeout)
+        except queue.Empty:
+            return [], True
+        if item is None:
+            return [], True
+        batch, size = [item], len(item[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            try:
+                # Take whatever is already queued, then wait out the deadline
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            size += len(item[0])
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, stop = self._collect()
+            if batch:
+                self._embed(batch)
+            if stop:
+                with self._lock:
+                    # A request queued before this check is still served;
+                    # one queued after it sees no worker and starts one
+                    if self._queue.empty():
+                        self._worker = None
+                        return
+
+    def _embed(self, batch):
+        try:
+            vectors = self.backend.embed([text for texts, _ in batch for text in texts])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self.metrics["requests"] += len(batch)
+            self.metrics["batches"] += 1
+            self.metrics["texts"] += len(vectors)
+        offset = 0
+        for texts, future in batch:
+            # Row slices of a C-contiguous array stay contiguous
+            future.set_result(vectors[offset:offset + len(texts)])
+            offset += len(texts)
+
+class BatchedEmbeddings(Embeddings):
+    """LangChain embeddings over a backend and its dynamic batcher
+
+    embed_array returns float32 arrays for FAISS and the context
+    assembler; the list-returning methods exist for LangChain callers.
+    """
+
+    def __init__(self, backend, max_batch=EMBEDDING_BATCH_SIZE, max_wait=EMBEDDING_BATCH_WAIT_MS / 1000):
+        self.backend = backend
+        self.batcher = DynamicBatcher(backend, max_batch, max_wait)
+
+    def embed_array(self, texts):
+        return self.batcher.embed(texts)
+
+    def embed_documents(self, texts):
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text):
+        return self.embed_array([text])[0].tolist()
+
+    def close(self):
+        self.batcher.close()
+
+_BACKENDS = {
+    'huggingface': SentenceTransformersBackend,
+    'onnx': OnnxBackend,
+}
+
+def get_embedding_backend(name=None, model_name=EMBEDDING_MODEL, threads=EMBEDDING_THREADS):
+    """Return an (unloaded) embedding backend by name"""
+    name = name or EMBEDDING_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {name} (choose from {', '.join(_BACKENDS)})")
+    return _BACKENDS[name](model_name, threads)
@@ -0,0 +1,95 @@
+# File: fake_llm.py
+# Local stand-in for ChatGroq that streams a canned response word by word
+# with configurable delays; used by benchmarks, offline runs and demos
+
+import asyncio
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+DEFAULT_RESPONSE = (
+    "## Key technical requirements\n"
+    "- Python data pipeline with scheduled runs\n"
+    "- PostgreSQL loading and validation\n\n"
+    "## Client needs\n"
+    "- Replace manual spreadsheet merging\n\n"
+    "## Project goals\n"
+    "- Reliable weekly reporting with minimal maintenance"
+)
+
+_TOKEN = re.compile(r'\S+\s*|\s+')
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Chat model that returns `response` split into word tokens
+
+    first_token_delay simulates queueing/prefill time and token_delay the
+    gap between streamed tokens; invoke() pays the full cost at once.
+    """
+
+    response: str = DEFAULT_RESPONSE
+    first_token_delay: float = 0.0
+    token_delay: float = 0.0
+    model_name: str = "fake-streaming"
+    temperature: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat"
+
+    @property
+    def _identifying_params(self):
+        return {"model_name": self.model_name, "temperature": self.temperature,
+                "response": self.response}
+
+    def _tokens(self) -> List[str]:
+        return _TOKEN.findall(self.response)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens()
+        time.sleep(self.first_token_delay + self.token_delay * max(0, len(tokens) - 1))
+        message = AIMessage(content=self.response, usage_metadata=self._usage(messages, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens()
+        await asyncio.sleep(self.first_token_delay + self.token_delay * max(0, len(tokens) - 1))
+        message = AIMessage(content=self.response, usage_metadata=self._usage(messages, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        tokens = self._tokens()
+        for i, token in enumerate(tokens):
+            time.sleep(self.first_token_delay if i == 0 else self.token_delay)
+            # Like Groq, usage arrives with the last chunk of a stream
+            usage = self._usage(messages, tokens) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        tokens = self._tokens()
+        for i, token in enumerate(tokens):
+            await asyncio.sleep(self.first_token_delay if i == 0 else self.token_delay)
+            # Like Groq, usage arrives with the last chunk of a stream
+            usage = self._usage(messages, tokens) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    @staticmethod
+    def _usage(messages, tokens):
+        # Rough token counts (~4 characters per token) so cost reporting
+        # has realistic magnitudes.
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        return {"input_tokens": prompt_tokens, "output_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens)}
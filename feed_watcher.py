@@ -0,0 +1,426 @@
+# File: feed_watcher.py
+# Watches saved-search/RSS job feeds and passes only new or edited postings
+# to the scrape -> analysis -> proposal pipeline (batch_runner.BatchRunner).
+#
+# Usage:
+#   python feed_watcher.py feeds.txt -o results.jsonl
+#   python feed_watcher.py feeds.txt -o results.jsonl --once --skip-existing
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from config import (get_headers, SCRAPE_TIMEOUT, FEED_STATE_FILE, FEED_MIN_INTERVAL,
+    FEED_MAX_INTERVAL, FEED_INITIAL_INTERVAL, FEED_BACKOFF, FEED_MAX_ATTEMPTS)
+from scrape_cache import url_key
+
+_SPACE = re.compile(r"\s+")
+_SQL_VARIABLES = 500  # job ids per IN (...) lookup, below SQLite's limit
+
+def _local(tag):
+    """Tag name without its XML namespace"""
+    return tag.rsplit("}", 1)[-1]
+
+def _text(element):
+    return _SPACE.sub(" ", "".join(element.itertext())).strip() if element is not None else ""
+
+def parse_feed(body):
+    """Postings of an RSS 2.0 or Atom feed and the feed's <ttl> (minutes or None)
+
+    Each posting is {"job_id", "url", "title", "summary", "hash"}; job_id
+    is the scrape cache key of the posting URL (as used by the pipeline)
+    and hash covers the title and summary, so an edit changes it.
+    """
+    root = ET.fromstring(body)
+    ttl = next((_text(e) for e in root.iter() if _local(e.tag) == "ttl"), None)
+    postings = {}
+    for item in root.iter():
+        if _local(item.tag) not in ("item", "entry"):
+            continue
+        fields, url = {}, None
+        for child in item:
+            name = _local(child.tag)
+            if name == "link":
+                # RSS puts the URL in the text, Atom in href (rel="alternate" by default)
+                if child.get("rel", "alternate") == "alternate":
+                    url = url or (child.get("href") or child.text or "").strip()
+            else:
+                fields.setdefault(name, _text(child))
+        if not url:
+            continue
+        title = fields.get("title", "")
+        summary = fields.get("encoded") or fields.get("description") or fields.get("content") \
+            or fields.get("summary", "")
+        postings[url_key(url)] = {
+            "job_id": url_key(url),
+            "url": url,
+            "title": title,
+            "summary": summary,
+            "hash": hashlib.sha256(f"{title}\n{summary}".encode("utf-8")).hexdigest(),
+        }
+    return list(postings.values()), int(ttl) if ttl and ttl.isdigit() else None
+
+def _retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class FeedWatcher:
+    """Polls job feeds and remembers which postings were processed
+
+    Feeds are fetched with If-None-Match / If-Modified-Since, and a body
+    identical to the last one is skipped for servers without validators.
+    The seen-set (job id -> content hash of the processed version) lives
+    in SQLite and is only queried for the postings in the current feed,
+    so a poll costs the same however much history has built up.
+
+    poll() returns postings that are new, edited, or failed fewer than
+    max_attempts times; the caller reports them back with mark(). A
+    feed's validators are only stored once a poll finds nothing left to
+    process, so postings that were not marked (the watcher crashed or
+    processing failed) come back on the next poll.
+    """
+
+    def __init__(self, path=FEED_STATE_FILE, min_interval=FEED_MIN_INTERVAL,
+                 max_interval=FEED_MAX_INTERVAL, initial_interval=FEED_INITIAL_INTERVAL,
+                 backoff=FEED_BACKOFF, max_attempts=FEED_MAX_ATTEMPTS, timeout=SCRAPE_TIMEOUT):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.backoff = backoff
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.metrics = {"polls": 0, "not_modified": 0, "unchanged": 0, "errors": 0,
+                        "new": 0, "edited": 0, "retry": 0, "bytes": 0}
+        self._session = requests.Session()  # keep-alive across polls of the same host
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS feeds (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                interval REAL,
+                next_poll REAL,
+                last_poll REAL,
+                last_change REAL,
+                last_error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS seen (
+                job_id TEXT PRIMARY KEY,
+                url TEXT,
+                hash TEXT,
+                done INTEGER,
+                attempts INTEGER,
+                first_seen REAL,
+                updated REAL
+            ) WITHOUT ROWID;
+        """)
+
+    # --- feeds ------------------------------------------------------------
+
+    def add_feed(self, url):
+        """Start watching a feed (due immediately); existing state is kept"""
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO feeds (url, interval, next_poll) VALUES (?, ?, ?)",
+                               (url, self.initial_interval, time.time()))
+
+    def remove_feed(self, url):
+        with self._lock:
+            self._conn.execute("DELETE FROM feeds WHERE url = ?", (url,))
+
+    def feeds(self):
+        """State of every watched feed as dicts"""
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM feeds ORDER BY next_poll")
+            names = [d[0] for d in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def due(self, now=None):
+        """Feeds whose next poll is due"""
+        with self._lock:
+            return [url for (url,) in self._conn.execute(
+                "SELECT url FROM feeds WHERE next_poll <= ? ORDER BY next_poll", (now or time.time(),))]
+
+    def next_due(self):
+        """Seconds until the next feed is due (0 if one is overdue), or None without feeds"""
+        with self._lock:
+            (next_poll,) = self._conn.execute("SELECT MIN(next_poll) FROM feeds").fetchone()
+        return None if next_poll is None else max(0.0, next_poll - time.time())
+
+    # --- polling ----------------------------------------------------------
+
+    def poll(self, url):
+        """Fetch a feed and return its postings that need processing
+
+        Each returned posting has "change": "new", "edited" or "retry" (it
+        failed before). Network and feed errors are recorded on the feed
+        and back it off; they return [].
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body_hash, interval FROM feeds WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            raise ValueError(f"Feed is not watched: {url}")
+        etag, last_modified, body_hash, interval = row
+        self._count("polls")
+
+        headers = get_headers()
+        headers["Accept"] = "application/rss+xml, application/atom+xml, application/xml;q=0.9, */*;q=0.8"
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            response = self._session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            return self._failed(url, interval, f"Request failed: {e}")
+        self._count("bytes", len(response.content))
+        if response.status_code == 304:
+            self._count("not_modified")
+            self._schedule(url, interval * self.backoff)
+            return []
+        if response.status_code >= 400:
+            return self._failed(url, interval, f"HTTP Error {response.status_code}: {response.reason}",
+                                _retry_after(response.headers.get("Retry-After")))
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        if digest == body_hash:
+            self._count("unchanged")
+            self._schedule(url, interval * self.backoff)
+            return []
+        try:
+            postings, ttl = parse_feed(response.content)
+        except ET.ParseError as e:
+            return self._failed(url, interval, f"Invalid feed: {e}")
+
+        pending = self._pending(postings)
+        for posting in pending:
+            self._count(posting["change"])
+        floor = ttl * 60 if ttl else 0
+        if pending:
+            self._schedule(url, max(floor, interval / 2), changed=True)
+        else:
+            # Everything in the feed is processed: from now on an
+            # unchanged feed can be answered with a 304
+            self._schedule(url, max(floor, interval * self.backoff),
+                           validators=(response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                                       digest))
+        return pending
+
+    def poll_due(self):
+        """Poll every due feed; returns the postings to process from all of them"""
+        postings = {}
+        for url in self.due():
+            for posting in self.poll(url):
+                postings.setdefault(posting["job_id"], posting)  # a job can be in several feeds
+        return list(postings.values())
+
+    def _pending(self, postings):
+        """Postings that are not yet processed in their current version"""
+        known = {}
+        with self._lock:
+            for start in range(0, len(postings), _SQL_VARIABLES):
+                ids = [p["job_id"] for p in postings[start:start + _SQL_VARIABLES]]
+                known.update((job_id, (content_hash, done, attempts)) for job_id, content_hash, done, attempts
+                             in self._conn.execute(
+                                 f"SELECT job_id, hash, done, attempts FROM seen WHERE job_id IN "
+                                 f"({','.join('?' * len(ids))})", ids))
+        pending = []
+        for posting in postings:
+            content_hash, done, attempts = known.get(posting["job_id"], (None, 0, 0))
+            if content_hash is None:
+                pending.append(dict(posting, change="new"))
+            elif content_hash != posting["hash"]:
+                pending.append(dict(posting, change="edited"))
+            elif not done and attempts < self.max_attempts:
+                pending.append(dict(posting, change="retry"))
+        return pending
+
+    def _failed(self, url, interval, error, retry_after=None):
+        self._count("errors")
+        self._schedule(url, interval * 2, error=error, delay=retry_after)
+        return []
+
+    def _schedule(self, url, interval, changed=False, validators=None, error=None, delay=None):
+        """Store the feed's new interval and next poll time"""
+        now = time.time()
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        # Jitter keeps feeds added together from being polled in lockstep
+        next_poll = now + max(delay or 0.0, interval * random.uniform(0.9, 1.1))
+        with self._lock:
+            self._conn.execute(
+                "UPDATE feeds SET interval = ?, next_poll = ?, last_poll = ?, last_error = ? WHERE url = ?",
+                (interval, next_poll, now, error, url))
+            if changed:
+                self._conn.execute("UPDATE feeds SET last_change = ? WHERE url = ?", (now, url))
+            if validators is not None:
+                self._conn.execute("UPDATE feeds SET etag = ?, last_modified = ?, body_hash = ? WHERE url = ?",
+                                   (*validators, url))
+
+    # --- seen-set ---------------------------------------------------------
+
+    def mark(self, postings, ok=True):
+        """Record the outcome of processing postings returned by poll()
+
+        Successful postings are not offered again until their content
+        changes; failed ones are retried up to max_attempts times.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("""
+                    INSERT INTO seen (job_id, url, hash, done, attempts, first_seen, updated)
+                    VALUES (?, ?, ?, ?, 1, ?, ?)
+                    ON CONFLICT (job_id) DO UPDATE SET
+                        attempts = CASE WHEN hash = excluded.hash THEN attempts + 1 ELSE 1 END,
+                        url = excluded.url, hash = excluded.hash, done = excluded.done,
+                        updated = excluded.updated
+                """, [(p["job_id"], p["url"], p["hash"], int(ok), now, now) for p in postings])
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def get_metrics(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["feeds"] = len(self.feeds())
+        metrics["seen"] = len(self)
+        return metrics
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.metrics[name] += amount
+
+    # --- loop -------------------------------------------------------------
+
+    def run(self, process, stop=None, once=False):
+        """Poll due feeds and hand their postings to process(postings), which
+        returns the postings that succeeded; sleeps until the next feed is
+        due. Runs until stop (a threading.Event) is set, or one round if once.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            postings = self.poll_due()
+            if postings:
+                succeeded = {p["job_id"] for p in process(postings)}
+                self.mark([p for p in postings if p["job_id"] in succeeded])
+                self.mark([p for p in postings if p["job_id"] not in succeeded], ok=False)
+            if once:
+                return
+            wait = self.next_due()
+            stop.wait(self.max_interval if wait is None else wait)
+
+    def close(self):
+        self._session.close()
+        self._conn.close()
+
+def forget_job(url):
+    """Drop what the pipeline cached for an edited posting, so it is scraped
+    again and not matched against its own earlier analysis"""
+    from duplicate_index import get_duplicate_index
+    from scrape_cache import get_scrape_cache
+    if (cache := get_scrape_cache()) is not None:
+        cache.invalidate(url)
+    if (index := get_duplicate_index()) is not None:
+        index.remove(url_key(url))
+
+def main(argv=None):
+    from batch_runner import BatchRunner, read_urls, to_output
+    from config import BATCH_SCRAPE_WORKERS, BATCH_ANALYSIS_WORKERS, BATCH_PROPOSAL_WORKERS
+    from llm_cache import install_llm_cache
+
+    parser = argparse.ArgumentParser(description="Watch job feeds and analyze new or edited postings")
+    parser.add_argument("input", help="file with one feed URL per line, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--tone", default="default",
+                        choices=["default", "formal", "casual", "technical"])
+    parser.add_argument("--state", default=FEED_STATE_FILE, help="SQLite file with feed state and seen jobs")
+    parser.add_argument("--once", action="store_true", help="poll every feed once and exit")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="mark postings already in newly added feeds as seen without analyzing them")
+    parser.add_argument("--scrape-workers", type=int, default=BATCH_SCRAPE_WORKERS)
+    parser.add_argument("--analysis-workers", type=int, default=BATCH_ANALYSIS_WORKERS)
+    parser.add_argument("--proposal-workers", type=int, default=BATCH_PROPOSAL_WORKERS)
+    args = parser.parse_args(argv)
+
+    watcher = FeedWatcher(args.state)
+    known = {feed["url"] for feed in watcher.feeds()}
+    for url in read_urls(args.input):
+        watcher.add_feed(url)
+        if args.skip_existing and url not in known:
+            watcher.mark(watcher.poll(url))
+
+    install_llm_cache()
+    runner = BatchRunner(
+        tone=args.tone,
+        scrape_workers=args.scrape_workers,
+        analysis_workers=args.analysis_workers,
+        proposal_workers=args.proposal_workers,
+    )
+    out = open(args.output, "a", encoding="utf-8") if args.output != "-" else sys.stdout
+
+    def process(postings):
+        by_url = {p["url"]: p for p in postings}
+        for posting in postings:
+            if posting["change"] == "edited":
+                forget_job(posting["url"])
+        succeeded = []
+
+        def on_result(record):
+            posting = by_url[record["url"]]
+            out.write(json.dumps(dict(to_output(record), change=posting["change"]), ensure_ascii=False) + "\n")
+            out.flush()
+            if record["status"] == "ok":
+                succeeded.append(posting)
+            print(f"{record['status']:5s} {posting['change']:6s} {record['url']}", file=sys.stderr)
+
+        runner.run(list(by_url), on_result)
+        return succeeded
+
+    try:
+        watcher.run(process, once=args.once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        metrics = watcher.get_metrics()
+        print(f"Feeds: {metrics['polls']} polls, {metrics['not_modified']} not modified, "
+              f"{metrics['errors']} errors; {metrics['new']} new and {metrics['edited']} edited postings, "
+              f"{metrics['seen']} jobs seen", file=sys.stderr)
+        watcher.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+# File: html_parsers.py
+# Pluggable HTML parser backends for job pages. Every backend finds the
+# same title and job-description elements as the original BeautifulSoup
+# code and yields the same section events, so job_scraper produces
+# identical output whichever backend is used.
+
+from bs4 import BeautifulSoup
+from config import HTML_PARSER_BACKEND
+
+TITLE_SELECTORS = ['h1[data-test="job-title"]', 'h2.job-title', 'h1']
+
+# Order matters: the first selector with a match wins. These mirror
+# soup.find('div', X) or soup.find(X) for the original selector list,
+# where a string X means "div with class X" followed by a "<X>" tag.
+CONTENT_SELECTORS = [
+    'div[data-test="job-description"]',
+    'div.job-description',
+    'div.main', 'main',
+    'div.article', 'article'
+]
+
+SECTION_TAGS = ('h2', 'h3', 'p', 'ul', 'ol', 'a')
+
+# BeautifulSoup's get_text() skips strings inside these tags (and comments)
+HIDDEN_TEXT_TAGS = frozenset(['script', 'style', 'template'])
+
+def _section_event(tag, text_of, items_of, href_of, element):
+    if tag in ('h2', 'h3'):
+        return ('header', text_of(element))
+    if tag in ('ul', 'ol'):
+        return ('list', [text_of(li) for li in items_of(element)])
+    if tag == 'a':
+        return ('href', href_of(element))
+    return ('text', text_of(element))
+
+class SoupBackend:
+    """BeautifulSoup backend (the original html.parser code path)"""
+
+    def __init__(self, features='html.parser'):
+        self.name = features
+        self.features = features
+
+    def parse(self, html):
+        """Return (title, sections); sections is None when no description is found"""
+        soup = BeautifulSoup(html, self.features)
+
+        title = "Job Title Not Found"
+        for selector in TITLE_SELECTORS:
+            if title_tag := soup.select_one(selector):
+                title = title_tag.get_text(strip=True)
+                break
+
+        main_content = None
+        for selector in [
+            {'data-test': 'job-description'},
+            {'class': 'job-description'},
+            'main', 'article'
+        ]:
+            if content := soup.find('div', selector) or soup.find(selector):
+                main_content = content
+                break
+        if not main_content:
+            return title, None
+
+        def sections():
+            for element in main_content.find_all(list(SECTION_TAGS)):
+                yield _section_event(
+                    element.name,
+                    lambda el: el.get_text(strip=True),
+                    lambda el: el.find_all('li'),
+                    lambda el: el.get('href', ''),
+                    element
+                )
+        return title, sections()
+
+class LxmlBackend:
+    """lxml backend: the tree is built in C and only the nodes of the
+    description subtree are turned into Python objects"""
+
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree, html as lxml_html
+        self._etree = etree
+        self._lxml_html = lxml_html
+        self._parser = lxml_html.HTMLParser(encoding='utf-8')
+        self._title_xpaths = [
+            etree.XPath('(//h1[@data-test="job-title"])[1]'),
+            etree.XPath(f'(//h2[{_xpath_class("job-title")}])[1]'),
+            etree.XPath('(//h1)[1]'),
+        ]
+        self._content_xpaths = [
+            etree.XPath('(//div[@data-test="job-description"])[1]'),
+            etree.XPath(f'(//div[{_xpath_class("job-description")}])[1]'),
+            etree.XPath(f'(//div[{_xpath_class("main")}])[1]'),
+            etree.XPath('(//main)[1]'),
+            etree.XPath(f'(//div[{_xpath_class("article")}])[1]'),
+            etree.XPath('(//article)[1]'),
+        ]
+        hidden = ' or '.join(f'ancestor::{tag}' for tag in sorted(HIDDEN_TEXT_TAGS))
+        # Relative to the context node; text under hidden tags above the
+        # context node cannot occur because such tags only hold text.
+        self._texts = etree.XPath(f'.//text()[not({hidden})]', smart_strings=False)
+
+    def _text(self, element):
+        return ''.join(s.strip() for s in self._texts(element))
+
+    def parse(self, html):
+        try:
+            root = self._lxml_html.document_fromstring(html.encode('utf-8'), parser=self._parser)
+        except self._etree.ParserError:
+            return "Job Title Not Found", None  # empty document
+
+        title = "Job Title Not Found"
+        for xpath in self._title_xpaths:
+            if found := xpath(root):
+                title = self._text(found[0])
+                break
+
+        main_content = None
+        for xpath in self._content_xpaths:
+            if found := xpath(root):
+                main_content = found[0]
+                break
+        if main_content is None:
+            return title, None
+
+        def sections():
+            for element in main_content.iterdescendants(*SECTION_TAGS):
+                yield _section_event(
+                    element.tag, self._text,
+                    lambda el: el.iterdescendants('li'),
+                    lambda el: el.get('href', ''),
+                    element
+                )
+        return title, sections()
+
+class SelectolaxBackend:
+    """selectolax (lexbor) backend: fastest parse, CSS selectors in C"""
+
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser_cls = LexborHTMLParser
+
+    @staticmethod
+    def _text(node):
+        parts = []
+        stack = list(reversed(list(node.iter(include_text=True))))
+        while stack:
+            current = stack.pop()
+            if current.tag == '-text':
+                if text := current.text_content.strip():
+                    parts.append(text)
+            elif current.tag not in HIDDEN_TEXT_TAGS and not current.tag.startswith('-'):
+                # Children are pushed in reverse so they pop in document order
+                stack.extend(reversed(list(current.iter(include_text=True))))
+        return ''.join(parts)
+
+    def parse(self, html):
+        tree = self._parser_cls(html)
+
+        title = "Job Title Not Found"
+        for selector in TITLE_SELECTORS:
+            if title_node := tree.css_first(selector):
+                title = self._text(title_node)
+                break
+
+        main_content = None
+        for selector in CONTENT_SELECTORS:
+            if node := tree.css_first(selector):
+                main_content = node
+                break
+        if main_content is None:
+            return title, None
+
+        def descendants(node, selector):
+            # node.css() includes the node itself; find_all() does not
+            own_id = node.mem_id
+            return (n for n in node.css(selector) if n.mem_id != own_id)
+
+        def sections():
+            for element in descendants(main_content, ', '.join(SECTION_TAGS)):
+                yield _section_event(
+                    element.tag, self._text,
+                    lambda el: descendants(el, 'li'),
+                    lambda el: el.attributes.get('href') or '',
+                    element
+                )
+        return title, sections()
+
+def _xpath_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+_BACKENDS = {
+    'html.parser': lambda: SoupBackend('html.parser'),
+    'bs4-lxml': lambda: SoupBackend('lxml'),
+    'lxml': LxmlBackend,
+    'selectolax': SelectolaxBackend,
+}
+_instances = {}
+
+def get_backend(name=None):
+    """Return a (cached) parser backend by name"""
+    name = name or HTML_PARSER_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {name} (choose from {', '.join(_BACKENDS)})")
+    if name not in _instances:
+        _instances[name] = _BACKENDS[name]()
+    return _instances[name]
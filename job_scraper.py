@@ -3,9 +3,15 @@ import requests
 import random
 import time
 import re
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-from config import UNWANTED_PATTERNS, get_headers, get_proxy
+from config import get_headers, get_proxy, HTML_PARSER_BACKEND
+from text_cleaner import default_cleaner
+from html_parsers import get_backend
+from scrape_cache import get_scrape_cache
+from tracing import annotate, span, traced
+
+USE_DEFAULT_CACHE = object()
+DOCUMENT_LINK = re.compile(r'\.(pdf|docx?|xlsx?)$', re.I)
 
 def is_excluded(url):
     """Check if URL should be excluded"""
@@ -20,105 +26,126 @@ def is_excluded(url):
 
 def clean_scraped_content(text):
     """Clean and format scraped content"""
-    cleaned = []
-    for line in text.split('\n'):
-        line = line.strip()
-        if not line or any(re.search(p, line) for p in UNWANTED_PATTERNS):
+    return default_cleaner.clean(text)
+
+def random_cookies():
+    """Simulated browser session cookies"""
+    return {
+        'session_id': str(random.randint(1000000, 10000000)),  # Explicit integers
+        'ak_bmsc': ''.join(random.choices('abcdef0123456789', k=256))
+    }
+
+def is_blocked(html):
+    """Check for bot-protection pages"""
+    return any(p in html for p in ['Incapsula incident', 'Access Denied', 'cloudflare'])
+
+@traced("parse")
+def parse_job_html(html, backend=None):
+    """Extract title, description, links and documents from a job page
+
+    backend selects the HTML parser (see html_parsers.get_backend);
+    defaults to config.HTML_PARSER_BACKEND.
+    """
+    annotate(backend=backend or HTML_PARSER_BACKEND, bytes=len(html))
+    # Check for blocking pages
+    if is_blocked(html):
+        return {"error": "Blocked by security system. Use VPN/proxy."}
+
+    # Parse content: title plus the sections of the job description
+    title, sections = get_backend(backend).parse(html)
+    if sections is None:
+        return {"error": "Job description section not found"}
+
+    # Process content sections
+    description = []
+    links = []
+    documents = []
+    
+    for kind, value in sections:
+        try:
+            if kind == 'header':
+                if value: description.append(f"\n## {value}")
+            elif kind == 'list':
+                items = [f"- {item}" for item in value if item]
+                if items: description.append('\n'.join(items))
+            elif kind == 'href':
+                if value and value.startswith(('http://', 'https://')) and not is_excluded(value):
+                    if DOCUMENT_LINK.search(value):
+                        documents.append(value)
+                    else:
+                        links.append(value)
+            elif value:
+                description.append(value)
+        except Exception:
             continue
-        cleaned.append(re.sub(r'\s{2,}', ' ', line))
-    return '\n'.join(cleaned) if cleaned else 'No description available'
 
-def scrape_job_post(url):
-    """Main scraping function with error handling"""
+    # Process final output
+    full_description = clean_scraped_content('\n'.join(description))
+    links = list(set(links))
+    documents = list(set(documents))
+
+    return {
+        "title": title,
+        "description": full_description,
+        "links": links,
+        "documents": documents
+    }
+
+@traced("scrape")
+def scrape_job_post(url, polite_delay=True, cache=USE_DEFAULT_CACHE):
+    """Main scraping function with error handling
+
+    Pass polite_delay=False when the caller already paces requests
+    (e.g. through a rate limiter). Results are served from the scrape
+    cache when fresh and revalidated with the origin when expired;
+    pass cache=None to always fetch.
+    """
     try:
+        if cache is USE_DEFAULT_CACHE:
+            cache = get_scrape_cache()
+        entry = cache.lookup(url) if cache else None
+        if entry and not entry.expired:
+            annotate(cache="hit", bytes=entry.size)
+            return cache.hit(entry)
+
         # Initialize session with random delay
-        time.sleep(random.uniform(1, 4))
+        if polite_delay:
+            time.sleep(random.uniform(1, 4))
         session = requests.Session()
         
         # Configure request parameters
         headers = get_headers()
+        if entry:
+            headers.update(cache.conditional_headers(entry))
         proxies = get_proxy()
         
         # Fixed cookie simulation (explicit integers)
-        session.cookies.update({
-            'session_id': str(random.randint(1000000, 10000000)),  # Explicit integers
-            'ak_bmsc': ''.join(random.choices('abcdef0123456789', k=256))
-        })
+        session.cookies.update(random_cookies())
 
         # Make request with error handling
         try:
-            response = session.get(url, headers=headers, proxies=proxies, timeout=25)
+            with span("fetch", url=url):
+                response = session.get(url, headers=headers, proxies=proxies, timeout=25)
+            if entry and response.status_code == 304:
+                annotate(cache="revalidated", bytes=entry.size)
+                return cache.not_modified(url, entry)
             response.raise_for_status()
         except requests.HTTPError as e:
             return {"error": f"HTTP Error {e.response.status_code}: {e.response.reason}"}
         except requests.Timeout:
             return {"error": "Request timed out after 25 seconds"}
         
-        # Check for blocking pages
-        if any(p in response.text for p in ['Incapsula incident', 'Access Denied', 'cloudflare']):
-            return {"error": "Blocked by security system. Use VPN/proxy."}
-
-        # Parse content
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract job title
-        title = "Job Title Not Found"
-        for selector in ['h1[data-test="job-title"]', 'h2.job-title', 'h1']:
-            if title_tag := soup.select_one(selector):
-                title = title_tag.get_text(strip=True)
-                break
-
-        # Extract main content
-        main_content = None
-        for selector in [
-            {'data-test': 'job-description'},
-            {'class': 'job-description'},
-            'main', 'article'
-        ]:
-            if content := soup.find('div', selector) or soup.find(selector):
-                main_content = content
-                break
-        
-        if not main_content:
-            return {"error": "Job description section not found"}
-
-        # Process content sections
-        description = []
-        links = []
-        documents = []
-        
-        for element in main_content.find_all(['h2', 'h3', 'p', 'ul', 'ol', 'a']):
-            try:
-                if element.name in ['h2', 'h3']:
-                    header = element.get_text(strip=True)
-                    if header: description.append(f"\n## {header}")
-                elif element.name in ['ul', 'ol']:
-                    items = [f"- {li.get_text(strip=True)}" for li in element.find_all('li') if li.get_text(strip=True)]
-                    if items: description.append('\n'.join(items))
-                elif element.name == 'a':
-                    if href := element.get('href', ''):
-                        if href.startswith(('http://', 'https://')) and not is_excluded(href):
-                            if re.search(r'\.(pdf|docx?|xlsx?)$', href, re.I):
-                                documents.append(href)
-                            else:
-                                links.append(href)
-                else:
-                    if text := element.get_text(strip=True):
-                        description.append(text)
-            except Exception:
-                continue
-
-        # Process final output
-        full_description = clean_scraped_content('\n'.join(description))
-        links = list(set(links))
-        documents = list(set(documents))
-
-        return {
-            "title": title,
-            "description": full_description,
-            "links": links,
-            "documents": documents
-        }
+        annotate(cache="miss" if cache else "off", bytes=len(response.content))
+        result = parse_job_html(response.text)
+        if cache:
+            cache.miss()
+            if "error" not in result:
+                cache.store_page(
+                    url, response.text, result,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified")
+                )
+        return result
 
     except Exception as e:
         return {"error": f"Scraping failed: {str(e)}"}
\ No newline at end of file
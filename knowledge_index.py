@@ -0,0 +1,360 @@
+# File: knowledge_index.py
+# Long-lived FAISS index over every analyzed job, plus an on-disk cache of
+# chunk embeddings keyed by content hash
+
+import hashlib
+import os
+import pickle
+import struct
+import threading
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+from langchain.storage import LocalFileStore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from config import (CACHE_DIR, EMBEDDING_MODEL, EMBEDDING_BACKEND, KNOWLEDGE_INDEX_DIR, KNOWLEDGE_INDEX_ENABLED,
+    KNOWLEDGE_INDEX_COMPACT_MB)
+from embedding_backends import embed_array
+from model_registry import use_embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, a single app process writes
+    fcntl = None
+
+_RECORD = struct.Struct("<Q")  # length prefix of a pickled journal record
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings that only compute vectors for chunks never seen before
+
+    Vectors are stored as raw float32 bytes under the SHA-256 of the text,
+    one namespace per model and backend; embed_array returns a single
+    contiguous (n, dim) float32 array. The model is taken from the
+    registry per call and held only while it computes vectors.
+    """
+
+    def __init__(self, model_name, backend, store, namespace):
+        self.model_name = model_name
+        self.backend = backend
+        self.store = store
+        self.namespace = namespace
+
+    def _embed(self, texts):
+        with use_embeddings(self.model_name, self.backend) as model:
+            return embed_array(model, texts)
+
+    def embed_array(self, texts):
+        keys = [self.namespace + hashlib.sha256(t.encode("utf-8")).hexdigest() for t in texts]
+        cached = self.store.mget(keys)
+        missing = [i for i, value in enumerate(cached) if value is None]
+        computed = self._embed([texts[i] for i in missing]) if missing else None
+        if computed is not None:
+            self.store.mset([(keys[i], computed[n].tobytes()) for n, i in enumerate(missing)])
+            dim = computed.shape[1]
+        elif texts:
+            dim = len(cached[0]) // 4
+        else:
+            return np.empty((0, 0), dtype=np.float32)
+
+        vectors = np.empty((len(texts), dim), dtype=np.float32)
+        if computed is not None:
+            vectors[missing] = computed
+        for i, value in enumerate(cached):
+            if value is not None:
+                vectors[i] = np.frombuffer(value, dtype=np.float32)
+        return vectors
+
+    def embed_documents(self, texts):
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text):
+        # Queries are not cached (the context assembler keeps its own)
+        return self._embed([text])[0].tolist()
+
+def cached_embeddings(model_name=EMBEDDING_MODEL, cache_dir=None, backend=EMBEDDING_BACKEND):
+    """Shared embedding model behind the on-disk vector cache"""
+    store = LocalFileStore(cache_dir or os.path.join(CACHE_DIR, "embeddings"))
+    namespace = f"{backend}/{model_name.replace('/', '__')}/"
+    return CachedEmbeddings(model_name, backend, store, namespace)
+
+class _Docstore(InMemoryDocstore):
+    """InMemoryDocstore whose add and delete cost O(documents changed); the
+    base class copies and intersects the whole store on every add"""
+
+    def add(self, texts):
+        if any(key in self._dict for key in texts):
+            raise ValueError(f"Tried to add ids that already exist: {[k for k in texts if k in self._dict]}")
+        self._dict.update(texts)
+
+    def delete(self, ids):
+        missing = [i for i in ids if i not in self._dict]
+        if missing:
+            raise ValueError(f"Tried to delete ids that do not exist: {missing}")
+        for i in ids:
+            del self._dict[i]
+
+class KnowledgeIndex:
+    """Persistent FAISS index of chunks from all jobs, addressable by job id
+
+    Chunks are stored with ids "<job_id>:<n>" and a job_id metadata field,
+    so a job can be replaced or removed without rebuilding the index.
+    Updates are appended to a journal, so recording a job costs the same
+    however large the index has grown; once the journal passes
+    compact_bytes it is folded into a new snapshot on a background
+    thread. A snapshot (FAISS file plus docstore pickle) is published by
+    rewriting CURRENT, memory-mapped on load and only copied into RAM
+    when it is first modified.
+
+    Processes sharing the directory (service workers) write under an
+    exclusive file lock and first replay what the others appended or
+    compacted, so every process's jobs end up in the index.
+    """
+
+    def __init__(self, embeddings, path=KNOWLEDGE_INDEX_DIR,
+                 compact_bytes=KNOWLEDGE_INDEX_COMPACT_MB * 1024 * 1024):
+        self.embeddings = embeddings
+        self.path = path
+        self.compact_bytes = compact_bytes
+        self._store = None
+        self._jobs = {}  # job_id -> chunk ids
+        self._mmapped = False
+        self._generation = 0  # snapshot the store was loaded from
+        self._offset = 0  # journal bytes already applied
+        self._compactor = None
+        self._lock = threading.RLock()
+        self.load()
+
+    def _files(self, generation):
+        """(FAISS file, docstore pickle, journal) of a snapshot generation"""
+        if generation == 0:
+            # Also the layout written before the journal existed
+            names = ("index.faiss", "index.pkl", "journal.0.log")
+        else:
+            names = (f"index.{generation}.faiss", f"index.{generation}.pkl", f"journal.{generation}.log")
+        return tuple(os.path.join(self.path, name) for name in names)
+
+    def _current(self):
+        try:
+            with open(os.path.join(self.path, "CURRENT"), encoding="utf-8") as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    @contextmanager
+    def _locked(self):
+        """The thread lock plus an exclusive lock shared with other
+        processes; never nested (flock locks per open file)"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, "lock"), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def load(self):
+        """Load the current snapshot and replay the journal written since"""
+        with self._locked():
+            self._generation = self._current()
+            self._load_snapshot()
+            self._replay()
+
+    def _sync(self):
+        """Catch up with what other processes wrote since the last call"""
+        generation = self._current()
+        if generation != self._generation:
+            # Another process compacted; its snapshot holds everything
+            # this one had applied, since writers sync before appending
+            self._generation = generation
+            self._load_snapshot()
+        self._replay()
+
+    def _load_snapshot(self):
+        index_file, meta_file, _ = self._files(self._generation)
+        self._store, self._jobs, self._mmapped, self._offset = None, {}, False, 0
+        if not os.path.exists(index_file):
+            return
+        try:
+            index = faiss.read_index(index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            self._mmapped = True
+        except RuntimeError:
+            index = faiss.read_index(index_file)
+        with open(meta_file, "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        if not isinstance(docstore, _Docstore):
+            docstore = _Docstore(docstore._dict)  # snapshot written before _Docstore
+        self._store = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
+        )
+        for chunk_id in index_to_docstore_id.values():
+            self._jobs.setdefault(chunk_id.rsplit(":", 1)[0], []).append(chunk_id)
+
+    def _replay(self):
+        """Apply the journal records past the current offset"""
+        try:
+            with open(self._files(self._generation)[2], "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        pos = 0
+        while pos + _RECORD.size <= len(data):
+            (length,) = _RECORD.unpack_from(data, pos)
+            end = pos + _RECORD.size + length
+            if end > len(data):
+                break  # a record cut short by a crash; overwritten by the next append
+            self._apply(pickle.loads(data[pos + _RECORD.size:end]))
+            pos = end
+        self._offset += pos
+
+    def _append(self, record):
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._files(self._generation)[2], "ab") as f:
+            if f.tell() > self._offset:
+                f.truncate(self._offset)
+            f.write(_RECORD.pack(len(payload)) + payload)
+        self._offset += _RECORD.size + len(payload)
+
+    def _apply(self, record):
+        if record[0] == "add":
+            _, job_id, ids, texts, metadatas, vectors = record
+            self._remove(job_id)
+            self._add(job_id, ids, texts, metadatas, vectors)
+        else:
+            self._remove(record[1])
+
+    def compact(self, min_bytes=0):
+        """Write the index as a new snapshot generation and drop the journal
+        (if it holds at least min_bytes)"""
+        with self._locked():
+            self._sync()
+            if not self._offset or self._offset < min_bytes or self._store is None:
+                return
+            generation = self._generation + 1
+            index_file, meta_file, _ = self._files(generation)
+            suffix = f".{os.getpid()}.tmp"
+            faiss.write_index(self._store.index, index_file + suffix)
+            with open(meta_file + suffix, "wb") as f:
+                pickle.dump((self._store.docstore, self._store.index_to_docstore_id), f)
+            os.replace(index_file + suffix, index_file)
+            os.replace(meta_file + suffix, meta_file)
+            # Publishing CURRENT switches readers to the new pair at once
+            current = os.path.join(self.path, "CURRENT")
+            with open(current + suffix, "w", encoding="utf-8") as f:
+                f.write(str(generation))
+            os.replace(current + suffix, current)
+            for name in self._files(self._generation):
+                if os.path.exists(name):
+                    os.remove(name)
+            self._generation, self._offset = generation, 0
+
+    def _maybe_compact(self):
+        with self._lock:
+            if self._offset < self.compact_bytes or (self._compactor and self._compactor.is_alive()):
+                return
+            # Off the request path: the snapshot rewrites the whole index
+            self._compactor = threading.Thread(target=self.compact, args=(self.compact_bytes,), daemon=True,
+                                               name="knowledge-index-compact")
+            self._compactor.start()
+
+    def __len__(self):
+        with self._lock:
+            return self._store.index.ntotal if self._store else 0
+
+    def job_ids(self, job_id):
+        """Chunk ids stored for a job"""
+        with self._lock:
+            return list(self._jobs.get(job_id, ()))
+
+    def add_job(self, job_id, chunks, vectors):
+        """Insert or replace a job's chunks using precomputed vectors"""
+        ids = [f"{job_id}:{n}" for n in range(len(chunks))]
+        record = ("add", job_id, ids, [c.page_content for c in chunks],
+                  [{**c.metadata, "job_id": job_id} for c in chunks],
+                  np.ascontiguousarray(vectors, dtype=np.float32))
+        with self._locked():
+            self._sync()
+            self._apply(record)
+            self._append(record)
+        self._maybe_compact()
+        return ids
+
+    def remove_job(self, job_id):
+        """Delete a job's chunks; returns the number removed"""
+        with self._locked():
+            self._sync()
+            removed = self._remove(job_id)
+            if removed:
+                self._append(("remove", job_id))
+        return removed
+
+    def _add(self, job_id, ids, texts, metadatas, vectors):
+        if self._store is None:
+            # What FAISS.from_embeddings builds, without per-vector lists
+            self._store = FAISS(embedding_function=self.embeddings, index=faiss.IndexFlatL2(vectors.shape[1]),
+                                docstore=_Docstore(), index_to_docstore_id={})
+        else:
+            self._ensure_writable()
+        start = self._store.index.ntotal
+        self._store.index.add(vectors)
+        self._store.docstore.add({i: Document(id=i, page_content=t, metadata=m)
+                                  for i, t, m in zip(ids, texts, metadatas)})
+        self._store.index_to_docstore_id.update(zip(range(start, start + len(ids)), ids))
+        self._jobs[job_id] = ids
+
+    def _remove(self, job_id):
+        ids = self._jobs.pop(job_id, None)
+        if ids:
+            self._ensure_writable()
+            self._store.delete(ids)
+        return len(ids or ())
+
+    def as_retriever(self, **kwargs):
+        """Retriever across every indexed job"""
+        with self._locked():
+            self._sync()
+            if self._store is None:
+                raise ValueError("Knowledge index is empty")
+            return self._store.as_retriever(**kwargs)
+
+    def _ensure_writable(self):
+        # A memory-mapped index is read-only; copy it into RAM before the
+        # first modification.
+        if self._mmapped:
+            self._store.index = faiss.read_index(self._files(self._generation)[0])
+            self._mmapped = False
+
+def content_job_id(documents):
+    """Stable id for a set of documents when the caller has no job URL"""
+    digest = hashlib.sha256()
+    for doc in documents:
+        digest.update(doc.page_content.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_knowledge_index(embeddings, model_name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND):
+    """Process-wide index for an embedding model and backend, or None when disabled"""
+    if not KNOWLEDGE_INDEX_ENABLED:
+        return None
+    with _indexes_lock:
+        if (model_name, backend) not in _indexes:
+            # Quantized and fp32 vectors differ slightly; keep them apart
+            path = os.path.join(KNOWLEDGE_INDEX_DIR, backend, model_name.replace("/", "__"))
+            _indexes[model_name, backend] = KnowledgeIndex(embeddings, path=path)
+        return _indexes[model_name, backend]
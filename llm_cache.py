@@ -0,0 +1,296 @@
+# File: llm_cache.py
+# Persistent LLM response cache (a LangChain BaseCache over DiskCache) and
+# an optional semantic cache that reuses analyses of near-identical jobs
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from langchain_core.caches import BaseCache
+from langchain_core.globals import get_llm_cache as get_global_llm_cache, set_llm_cache
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, convert_to_messages
+from langchain_core.outputs import ChatGeneration, Generation
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import RunnableGenerator
+
+from config import (CACHE_DIR, LLM_CACHE_ENABLED, LLM_CACHE_TTL, LLM_CACHE_MAX_MB,
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD)
+from disk_cache import DiskCache
+from tracing import count
+
+def _tokens(generation):
+    """Total tokens a generation cost (usage metadata, else ~4 chars/token)"""
+    message = getattr(generation, "message", None)
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return token_usage.get("total_tokens") or len(generation.text) // 4
+
+class LLMCache(BaseCache):
+    """LLM/chat responses keyed by the rendered prompt and the model
+    configuration (model name, temperature, ...), stored in SQLite with
+    TTL and size-bounded LRU eviction
+
+    A miss remembers when the lookup happened so the matching update can
+    record how long the call took; hits then report the tokens and
+    latency they saved. Concurrent misses on the same prompt are paired
+    with their updates first-in first-out; a call that fails never
+    updates, so its lookup time is dropped after pending_ttl seconds.
+    """
+
+    pending_ttl = 600.0
+
+    def __init__(self, path=None, ttl=LLM_CACHE_TTL, max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024):
+        self.store = DiskCache(path or os.path.join(CACHE_DIR, "llm.sqlite3"),
+                               max_bytes=max_bytes, ttl=ttl)
+        self.metrics = {"hits": 0, "misses": 0, "saved_tokens": 0, "saved_seconds": 0.0}
+        self._pending = {}  # key -> deque of lookup times of calls in flight
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        key = self.key(prompt, llm_string)
+        entry = self.store.get(key)
+        if entry is None or entry.expired:
+            now = time.perf_counter()
+            with self._lock:
+                self.metrics["misses"] += 1
+                self._prune(now)
+                self._pending.setdefault(key, deque()).append(now)
+            count(llm_cache_misses=1)
+            return None
+        count(llm_cache_hits=1)
+        with self._lock:
+            self.metrics["hits"] += 1
+            self.metrics["saved_tokens"] += entry.meta.get("tokens", 0)
+            self.metrics["saved_seconds"] += entry.meta.get("latency", 0.0)
+        return [
+            ChatGeneration(message=AIMessage(content=g["text"])) if g["chat"] else Generation(text=g["text"])
+            for g in json.loads(entry.value)
+        ]
+
+    def update(self, prompt, llm_string, return_val):
+        key = self.key(prompt, llm_string)
+        started = self.discard(prompt, llm_string)
+        value = json.dumps([
+            {"text": g.text, "chat": isinstance(g, ChatGeneration)} for g in return_val
+        ]).encode("utf-8")
+        self.store.set(key, value, {
+            "tokens": sum(_tokens(g) for g in return_val),
+            "latency": time.perf_counter() - started if started else 0.0
+        })
+
+    def discard(self, prompt, llm_string):
+        """Forget the oldest pending miss for a prompt; returns its lookup
+        time, or None"""
+        key = self.key(prompt, llm_string)
+        with self._lock:
+            started = self._pending.get(key)
+            if not started:
+                return None
+            value = started.popleft()
+            if not started:
+                del self._pending[key]
+            return value
+
+    def _prune(self, now):
+        for key in [k for k, times in self._pending.items() if now - times[-1] > self.pending_ttl]:
+            del self._pending[key]
+
+    def clear(self, **kwargs):
+        self.store.clear()
+
+    def get_metrics(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["entries"] = len(self.store)
+        metrics["bytes"] = self.store.total_bytes()
+        metrics["evictions"] = self.store.stats["evictions"]
+        return metrics
+
+def with_stream_cache(llm, cache=None):
+    """Wrap a chat model so .stream() also reads and fills the LLM cache
+
+    LangChain only consults the cache on invoke/batch; streaming calls go
+    straight to the model. Unless `cache` is given, the wrapper uses the
+    cache registered with install_llm_cache at call time. A hit is
+    replayed as one chunk.
+
+    Keys are the serialized messages plus the model configuration from
+    public API (see _llm_string). Streamed entries are kept apart from
+    those invoke writes.
+    """
+    def transform(inputs):
+        active = cache or get_global_llm_cache()
+        for value in inputs:
+            if active is None:
+                yield from llm.stream(value)
+                continue
+            prompt, llm_string = dumps(_to_messages(value)), _llm_string(llm)
+            cached = active.lookup(prompt, llm_string)
+            if cached is not None:
+                yield AIMessageChunk(content=cached[0].text)
+                continue
+            message, finished = None, False
+            try:
+                for chunk in llm.stream(value):
+                    message = chunk if message is None else message + chunk
+                    yield chunk
+                finished = True
+            finally:
+                # A stream that failed or was abandoned leaves no pending miss
+                if not finished and isinstance(active, LLMCache):
+                    active.discard(prompt, llm_string)
+            if message is not None:
+                active.update(prompt, llm_string, [ChatGeneration(message=message)])
+            elif isinstance(active, LLMCache):
+                active.discard(prompt, llm_string)
+
+    return RunnableGenerator(transform)
+
+def _llm_string(llm):
+    """Model configuration part of a streaming cache key: the serialized
+    constructor arguments (model, temperature, ...) plus the identifying
+    parameters, which carry them for models that do not serialize"""
+    return json.dumps({"model": json.loads(dumps(llm)), "params": llm.dict()}, sort_keys=True, default=str)
+
+def _to_messages(value):
+    """Messages a chat model sends for a stream() input (a prompt value,
+    a string or a list of messages)"""
+    if isinstance(value, PromptValue):
+        return value.to_messages()
+    if isinstance(value, str):
+        return [HumanMessage(content=value)]
+    return convert_to_messages(value)
+
+class SemanticAnalysisCache:
+    """Analyses indexed by an embedding of the job description
+
+    A job whose description vector has cosine similarity >= threshold to
+    an earlier one (and the same video transcript and attachments, given
+    as an extras hash) reuses that analysis instead of calling the LLM
+    again.
+
+    The vectors are kept in memory in a matrix with spare rows, so add()
+    costs O(1) amortized. Rows of entries the store has evicted are only
+    dropped once they make up half the matrix.
+    """
+
+    def __init__(self, path=None, threshold=SEMANTIC_CACHE_THRESHOLD, max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024):
+        self.store = DiskCache(path or os.path.join(CACHE_DIR, "analyses.sqlite3"), max_bytes=max_bytes)
+        self.threshold = threshold
+        self.metrics = {"hits": 0, "misses": 0}
+        self._keys = None  # row -> store key
+        self._rows = {}  # store key -> row
+        self._matrix = None  # the first len(self._keys) rows are in use
+        self._stale = set()  # rows whose entry the store has evicted
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def document_vector(vectors):
+        """Unit-length mean of a document's chunk vectors"""
+        vector = np.mean(np.asarray(vectors, dtype=np.float32), axis=0)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _load(self):
+        if self._keys is None:
+            rows = [(key, entry.meta["vector"]) for key, entry in self.store.items()]
+            self._keys = [key for key, _ in rows]
+            self._rows = {key: i for i, key in enumerate(self._keys)}
+            vectors = np.asarray([v for _, v in rows], dtype=np.float32).reshape(len(rows), -1)
+            self._matrix = np.empty((max(16, 2 * len(rows)), vectors.shape[1]), dtype=np.float32)
+            self._matrix[:len(rows)] = vectors
+            self._stale = set()
+
+    def find(self, vector, extras=""):
+        """Return (analysis, similarity) of the closest earlier job, or None"""
+        with self._lock:
+            self._load()
+            if not self._keys or self._matrix.shape[1] != len(vector):
+                self.metrics["misses"] += 1
+                return None
+            scores = self._matrix[:len(self._keys)] @ vector
+            for i in np.argsort(-scores):
+                if scores[i] < self.threshold:
+                    break
+                entry = self.store.get(self._keys[i])
+                if entry is None:
+                    # Evicted from the store; rebuild once half the rows are stale
+                    self._stale.add(i)
+                    if len(self._stale) * 2 > len(self._keys):
+                        self._keys = None
+                        break
+                    continue
+                # Entries written before attachments were hashed in stored
+                # the video hash, which equals the extras hash of a job
+                # without attachments
+                if entry.meta.get("extras", entry.meta.get("video")) == extras:
+                    self.metrics["hits"] += 1
+                    return entry.value.decode("utf-8"), float(scores[i])
+            self.metrics["misses"] += 1
+            return None
+
+    def add(self, vector, analysis, extras=""):
+        key = hashlib.sha256(vector.tobytes()).hexdigest()
+        self.store.set(key, analysis.encode("utf-8"), {
+            "vector": [float(x) for x in vector], "extras": extras
+        })
+        with self._lock:
+            if self._keys is None:
+                return  # loaded with this entry on the next find
+            if self._matrix.shape[1] != len(vector):
+                self._keys = None  # another embedding model: reload
+                return
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self._keys)
+                if row == len(self._matrix):
+                    grown = np.empty((2 * row, self._matrix.shape[1]), dtype=np.float32)
+                    grown[:row] = self._matrix
+                    self._matrix = grown
+                self._keys.append(key)
+                self._rows[key] = row
+            self._matrix[row] = vector
+
+    def get_metrics(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["entries"] = len(self.store)
+        return metrics
+
+_default_caches = {}
+_default_lock = threading.Lock()
+
+def get_llm_cache():
+    """Process-wide LLM cache, or None when caching is disabled"""
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if "llm" not in _default_caches:
+            _default_caches["llm"] = LLMCache()
+        return _default_caches["llm"]
+
+def get_semantic_cache():
+    """Process-wide semantic analysis cache, or None unless enabled"""
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if "semantic" not in _default_caches:
+            _default_caches["semantic"] = SemanticAnalysisCache()
+        return _default_caches["semantic"]
+
+def install_llm_cache():
+    """Make LangChain consult the LLM cache for every model call"""
+    cache = get_llm_cache()
+    if cache is not None:
+        set_llm_cache(cache)
+    return cache
@@ -0,0 +1,155 @@
+# File: long_media.py
+# Long-media transcription: split audio at silences, transcribe the
+# segments across a process pool and stitch them back with timestamps
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from config import (WHISPER_MODEL, TRANSCRIBE_BACKEND, LONG_MEDIA_SEGMENT_SECONDS,
+    LONG_MEDIA_WORKERS)
+
+SAMPLE_RATE = 16000  # whisper.audio.SAMPLE_RATE
+_FRAME = SAMPLE_RATE // 50  # 20 ms energy frames
+
+def load_audio(path):
+    """Decode any media file to 16 kHz mono float32 (needs ffmpeg)"""
+    import whisper
+    return whisper.load_audio(path)
+
+def silence_splits(audio, segment_seconds=LONG_MEDIA_SEGMENT_SECONDS, search_seconds=None):
+    """Return (start, end) sample ranges of roughly segment_seconds each
+
+    Each cut is moved to the quietest 20 ms frame within search_seconds of
+    the target boundary so words are not split across segments.
+    """
+    total = len(audio)
+    target = int(segment_seconds * SAMPLE_RATE)
+    if total <= target * 1.5:
+        return [(0, total)]
+    search = int((search_seconds or segment_seconds / 4) * SAMPLE_RATE)
+
+    frames = total // _FRAME
+    energy = np.sqrt(np.mean(
+        audio[:frames * _FRAME].reshape(frames, _FRAME).astype(np.float32) ** 2, axis=1
+    ))
+
+    bounds = [0]
+    while total - bounds[-1] > target * 1.5:
+        lo = (bounds[-1] + target - search) // _FRAME
+        hi = min(frames, (bounds[-1] + target + search) // _FRAME)
+        window = energy[lo:hi]
+        # Among (near-)silent frames prefer the one closest to the target
+        distance = np.abs(np.arange(lo, hi) - (bounds[-1] + target) // _FRAME)
+        cut = (lo + int(np.argmin(window + 1e-6 * distance))) * _FRAME + _FRAME // 2
+        bounds.append(cut)
+    bounds.append(total)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+_worker_backend = None
+
+def _init_worker(backend, model_size, threads):
+    global _worker_backend
+    from transcription_backends import get_backend
+    _worker_backend = get_backend(backend, model_size, threads)
+
+def _transcribe_segment(index, audio, offset):
+    result = _worker_backend.transcribe(audio)
+    segments = [
+        {"start": s["start"] + offset, "end": s["end"] + offset, "text": s["text"]}
+        for s in result["segments"]
+    ]
+    return index, result["text"], segments
+
+class ChunkedTranscriber:
+    """Transcribe long audio in parallel segments
+
+    Each worker process loads its own model (of the given transcription
+    backend) and gets an equal share of the CPU cores, so the pool does not
+    oversubscribe threads.
+    """
+
+    def __init__(self, model_size=WHISPER_MODEL, workers=LONG_MEDIA_WORKERS,
+                 segment_seconds=LONG_MEDIA_SEGMENT_SECONDS, backend=TRANSCRIBE_BACKEND):
+        self.model_size = model_size
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.segment_seconds = segment_seconds
+        self.backend = backend
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.backend, self.model_size, threads)
+            )
+        return self._pool
+
+    def warm_up(self):
+        """Start every worker and load its model ahead of the first video"""
+        pool = self._get_pool()
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        futures = [pool.submit(_transcribe_segment, i, silence, 0.0)
+                   for i in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def iter_segments(self, media):
+        """Yield each segment's result as soon as it completes (not in order)
+
+        media is a file path or a 16 kHz float32 array. Each item is a dict
+        with index, start/end seconds, text and timestamped sub-segments.
+        """
+        audio = load_audio(media) if isinstance(media, str) else media
+        pool = self._get_pool()
+        futures = {}
+        for index, (start, end) in enumerate(silence_splits(audio, self.segment_seconds)):
+            future = pool.submit(
+                _transcribe_segment, index, audio[start:end], start / SAMPLE_RATE
+            )
+            futures[future] = (start / SAMPLE_RATE, end / SAMPLE_RATE)
+        try:
+            for future in as_completed(futures):
+                index, text, segments = future.result()
+                start, end = futures[future]
+                yield {"index": index, "start": start, "end": end, "text": text, "segments": segments}
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def transcribe(self, media, on_segment=None):
+        """Whisper-style result dict: stitched text plus all timestamped segments"""
+        parts = []
+        for part in self.iter_segments(media):
+            parts.append(part)
+            if on_segment:
+                on_segment(part)
+        parts.sort(key=lambda p: p["index"])
+        return {
+            "text": " ".join(p["text"] for p in parts if p["text"]),
+            "segments": [s for p in parts for s in p["segments"]]
+        }
+
+_transcribers = {}
+_transcribers_lock = threading.Lock()
+
+def get_chunked_transcriber(model_size=WHISPER_MODEL, workers=LONG_MEDIA_WORKERS,
+                            backend=TRANSCRIBE_BACKEND):
+    """Shared transcriber per backend and model size so worker processes
+    (and their loaded models) survive between videos"""
+    with _transcribers_lock:
+        key = (backend, model_size, workers)
+        if key not in _transcribers:
+            _transcribers[key] = ChunkedTranscriber(model_size, workers, backend=backend)
+        return _transcribers[key]
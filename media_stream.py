@@ -0,0 +1,134 @@
+# File: media_stream.py
+# Streams remote audio through ffmpeg into 16 kHz mono PCM in memory: the
+# download feeds ffmpeg's stdin while its output is read, so decoding
+# overlaps the transfer and nothing is written to disk
+
+import os
+import re
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+import requests
+
+from config import get_headers, SCRAPE_TIMEOUT
+from long_media import SAMPLE_RATE
+
+DOWNLOAD_CHUNK = 64 * 1024
+
+class DecodeError(RuntimeError):
+    """ffmpeg could not decode the media"""
+
+def _bitrate(stream):
+    if getattr(stream, "bitrate", None):
+        return stream.bitrate
+    digits = re.sub(r"\D", "", getattr(stream, "abr", None) or "")
+    return int(digits) * 1000 if digits else float("inf")
+
+def lowest_bitrate_audio(streams):
+    """The audio-only stream of a pytube StreamQuery with the lowest
+    bitrate; speech recognition needs no more than the smallest one"""
+    audio = list(streams.filter(only_audio=True))
+    if not audio:
+        raise ValueError("No audio-only stream available")
+    # abr is a string such as "48kbps", so it cannot be sorted on directly
+    return min(audio, key=_bitrate)
+
+def iter_download(url, chunk_size=DOWNLOAD_CHUNK, timeout=SCRAPE_TIMEOUT):
+    """Yield the body of url in chunks as it arrives"""
+    with requests.get(url, headers=get_headers(), stream=True, timeout=timeout) as response:
+        if response.status_code >= 400:
+            raise ValueError(f"HTTP Error {response.status_code}: {response.reason}")
+        yield from response.iter_content(chunk_size)
+
+def _ffmpeg(source, sample_rate):
+    return subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0", "-i", source,
+         "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+        stdin=subprocess.PIPE if source == "pipe:0" else subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+def _pcm(process, feeder=None):
+    """Collect ffmpeg's output; the process is killed if anything fails"""
+    stderr = []
+    drain = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+    drain.start()
+    try:
+        pcm = process.stdout.read()
+        process.wait()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        drain.join()
+        if feeder is not None:
+            feeder.join()
+    if process.returncode != 0:
+        message = b"".join(stderr).decode("utf-8", errors="replace").strip()
+        raise DecodeError(f"ffmpeg failed: {message.splitlines()[-1] if message else process.returncode}")
+    if not pcm:
+        # e.g. MP4 read from a pipe with its index at the end: ffmpeg
+        # reports the demuxing error but still exits 0
+        raise DecodeError("ffmpeg decoded no audio")
+    # Same scaling as whisper.load_audio
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+def decode_stream(chunks, sample_rate=SAMPLE_RATE):
+    """Decode media bytes with ffmpeg while they are still arriving;
+    returns mono float32 samples at sample_rate"""
+    process = _ffmpeg("pipe:0", sample_rate)
+    errors = []
+
+    def feed():
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; its status says why
+        except Exception as e:
+            errors.append(e)
+            process.kill()  # a truncated download must not decode as shorter audio
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=feed, daemon=True, name="media-feed")
+    feeder.start()
+    try:
+        audio = _pcm(process, feeder)
+    except DecodeError:
+        if errors:
+            raise errors[0]  # the download failure explains the decode failure
+        raise
+    if errors:
+        raise errors[0]
+    return audio
+
+def decode_file(path, sample_rate=SAMPLE_RATE):
+    """Decode a media file with ffmpeg; returns mono float32 samples at sample_rate"""
+    return _pcm(_ffmpeg(path, sample_rate))
+
+def stream_audio(url, sample_rate=SAMPLE_RATE):
+    """Download and decode url concurrently into 16 kHz float32 samples
+
+    Containers that ffmpeg cannot read from a pipe (e.g. MP4 with its
+    index at the end) are downloaded again to a temporary file, which is
+    removed whether or not decoding succeeds.
+    """
+    try:
+        return decode_stream(iter_download(url), sample_rate)
+    except DecodeError:
+        pass
+    with tempfile.NamedTemporaryFile(suffix=".media", delete=False) as tmp:
+        path = tmp.name
+    try:
+        with open(path, "wb") as f:
+            for chunk in iter_download(url):
+                f.write(chunk)
+        return decode_file(path, sample_rate)
+    finally:
+        os.unlink(path)
@@ -0,0 +1,221 @@
+# File: model_registry.py
+# Process-wide registry that loads heavyweight models once and shares them
+# across Streamlit reruns and sessions
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from config import (MODEL_REGISTRY_ENABLED, MODEL_MAX_LOADED, MODEL_IDLE_TTL,
+    WHISPER_MODEL, EMBEDDING_MODEL, EMBEDDING_BACKEND, TRANSCRIBE_BACKEND, TRANSCRIBE_COMPUTE_TYPE,
+    TRANSCRIBE_THREADS)
+
+class ModelRegistry:
+    """Lazily load named models once, with LRU and idle-time eviction"""
+
+    def __init__(self, max_loaded=MODEL_MAX_LOADED, idle_ttl=MODEL_IDLE_TTL,
+                 enabled=MODEL_REGISTRY_ENABLED):
+        self.max_loaded = max_loaded
+        self.idle_ttl = idle_ttl
+        self.enabled = enabled
+        self._loaders = {}
+        self._models = OrderedDict()  # name -> model, most recently used last
+        self._last_used = {}
+        self._in_use = {}
+        self._load_locks = {}
+        self._lock = threading.RLock()
+        self._warmup_thread = None
+
+    def register(self, name, loader):
+        """Register a zero-argument loader for a model name (idempotent)"""
+        with self._lock:
+            self._loaders.setdefault(name, loader)
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def is_loaded(self, name):
+        with self._lock:
+            return name in self._models
+
+    def loaded(self):
+        """Names of the models currently held in memory"""
+        with self._lock:
+            return list(self._models)
+
+    def get(self, name):
+        """Return the model, loading it on first use"""
+        return self._get(name)
+
+    @contextmanager
+    def use(self, name):
+        """Hold a model for the duration of a block so it cannot be evicted"""
+        model = self._get(name, pin=True)
+        try:
+            yield model
+        finally:
+            if self.enabled:
+                with self._lock:
+                    self._in_use[name] -= 1
+                    if not self._in_use[name]:
+                        del self._in_use[name]
+                    self._last_used[name] = time.monotonic()
+
+    def _get(self, name, pin=False):
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+        if not self.enabled:
+            return self._loaders[name]()
+
+        with self._lock:
+            # Every lookup sweeps idle models, so they are released even
+            # when no new model is loaded
+            self.evict_idle()
+            if name in self._models:
+                return self._touch(name, pin)
+
+        # Load outside the registry lock so other models stay available;
+        # the per-model lock makes concurrent sessions share a single load.
+        with self._load_locks[name]:
+            with self._lock:
+                if name in self._models:
+                    return self._touch(name, pin)
+            model = self._loaders[name]()
+            with self._lock:
+                self._models[name] = model
+                self._touch(name, pin)
+                self._evict(keep=name)
+            return model
+
+    def warm_up(self, names, background=False):
+        """Load the given models ahead of the first request"""
+        names = [n for n in names if n in self._loaders and not self.is_loaded(n)]
+        if not self.enabled or not names:
+            return
+        if not background:
+            for name in names:
+                self.get(name)
+            return
+        with self._lock:
+            if self._warmup_thread and self._warmup_thread.is_alive():
+                return
+            self._warmup_thread = threading.Thread(
+                target=self.warm_up, args=(names,), daemon=True, name="model-warmup"
+            )
+            self._warmup_thread.start()
+
+    def unload(self, name):
+        """Drop a model from memory; it is reloaded on next use"""
+        with self._lock:
+            self._last_used.pop(name, None)
+            model = self._models.pop(name, None)
+        # Models with background threads (the embedding batcher) stop them
+        if model is not None and callable(getattr(model, "close", None)):
+            model.close()
+        return model is not None
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._models):
+                if name not in self._in_use:
+                    self.unload(name)
+
+    def evict_idle(self):
+        """Unload models that have not been used within idle_ttl seconds"""
+        if not self.idle_ttl:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                name for name, used in self._last_used.items()
+                if name not in self._in_use and now - used > self.idle_ttl
+            ]
+            for name in idle:
+                self.unload(name)
+            return idle
+
+    def _touch(self, name, pin=False):
+        # Pinned under the same lock as the lookup, so an eviction cannot
+        # slip in between
+        if pin:
+            self._in_use[name] = self._in_use.get(name, 0) + 1
+        self._models.move_to_end(name)
+        self._last_used[name] = time.monotonic()
+        return self._models[name]
+
+    def _evict(self, keep=None):
+        self.evict_idle()
+        for name in list(self._models):
+            if len(self._models) <= self.max_loaded:
+                break
+            # Never the model being returned to the caller
+            if name not in self._in_use and name != keep:
+                self.unload(name)
+
+registry = ModelRegistry()
+
+def whisper_key(size=WHISPER_MODEL):
+    return f"whisper:{size}"
+
+def faster_whisper_key(size=WHISPER_MODEL, compute_type=TRANSCRIBE_COMPUTE_TYPE, threads=TRANSCRIBE_THREADS):
+    return f"faster-whisper:{size}:{compute_type}:{threads}"
+
+def embeddings_key(model_name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND):
+    return f"embeddings:{backend}:{model_name}"
+
+def register_whisper(size=WHISPER_MODEL):
+    def load():
+        import whisper
+        return whisper.load_model(size)
+    registry.register(whisper_key(size), load)
+    return whisper_key(size)
+
+def register_faster_whisper(size=WHISPER_MODEL, compute_type=TRANSCRIBE_COMPUTE_TYPE,
+                            threads=TRANSCRIBE_THREADS):
+    def load():
+        from faster_whisper import WhisperModel
+        return WhisperModel(size, device="cpu", compute_type=compute_type, cpu_threads=threads)
+    key = faster_whisper_key(size, compute_type, threads)
+    registry.register(key, load)
+    return key
+
+def register_embeddings(model_name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND):
+    def load():
+        from embedding_backends import BatchedEmbeddings, get_embedding_backend
+        return BatchedEmbeddings(get_embedding_backend(backend, model_name).load())
+    key = embeddings_key(model_name, backend)
+    registry.register(key, load)
+    return key
+
+def get_whisper_model(size=WHISPER_MODEL):
+    return registry.get(register_whisper(size))
+
+def get_faster_whisper_model(size=WHISPER_MODEL, compute_type=TRANSCRIBE_COMPUTE_TYPE,
+                             threads=TRANSCRIBE_THREADS):
+    return registry.get(register_faster_whisper(size, compute_type, threads))
+
+def get_embeddings(model_name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND):
+    return registry.get(register_embeddings(model_name, backend))
+
+# Context managers for inference: the model stays loaded until the block ends
+
+def use_whisper_model(size=WHISPER_MODEL):
+    return registry.use(register_whisper(size))
+
+def use_faster_whisper_model(size=WHISPER_MODEL, compute_type=TRANSCRIBE_COMPUTE_TYPE,
+                             threads=TRANSCRIBE_THREADS):
+    return registry.use(register_faster_whisper(size, compute_type, threads))
+
+def use_embeddings(model_name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND):
+    return registry.use(register_embeddings(model_name, backend))
+
+def warm_up_defaults(kinds, background=True):
+    """Warm up the configured models by kind ("whisper", "embeddings")"""
+    names = []
+    if "whisper" in kinds:
+        if TRANSCRIBE_BACKEND == "faster-whisper":
+            names.append(register_faster_whisper())
+        else:
+            names.append(register_whisper())
+    if "embeddings" in kinds:
+        names.append(register_embeddings())
+    registry.warm_up(names, background=background)
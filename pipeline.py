@@ -0,0 +1,268 @@
+# File: pipeline.py
+# Analysis stages shared by the Streamlit app and the headless runners
+
+import asyncio
+import hashlib
+
+from langchain.docstore.document import Document
+from chain_factory import run_coroutine
+from config import PROPOSAL_CONCURRENCY, DUPLICATE_REUSE_THRESHOLD
+from duplicate_index import description_diff, get_duplicate_index
+from text_cleaner import NO_DESCRIPTION
+from llm_cache import SemanticAnalysisCache, get_semantic_cache
+from tracing import annotate, span, trace_callbacks, traced_stream
+from proposal_generator import (extract_bullet_points, generate_human_sounding_proposal,
+    stream_human_sounding_proposal, agenerate_human_sounding_proposal)
+
+ANALYSIS_PROMPT = (
+    "Analyze this job post and, if present, any video content to extract "
+    "key requirements, client needs, and project goals. If no video is "
+    "provided, ignore video references."
+)
+
+TONE_MAP = {
+    "Default": "default",
+    "Formal": "formal",
+    "Casual": "casual",
+    "Technical": "technical"
+}
+
+# Default for the duplicate argument: look the job up in the duplicate index
+_FIND = object()
+
+def resolve_tone(selected_template):
+    """Map a UI template name to a proposal tone ("Custom" falls back to default)"""
+    return TONE_MAP.get(selected_template, "default")
+
+def empty_sources():
+    return {
+        "job": {
+            "title": "",
+            "description": "",
+            "links": [],
+            "documents": []
+        },
+        "video": "",
+        "attachments": []
+    }
+
+def build_sources(scraped_data, video_text="", attachments=None):
+    """Turn a successful scrape_job_post result into the sources dict"""
+    sources = empty_sources()
+    sources["job"]["title"] = scraped_data["title"]
+    sources["job"]["description"] = scraped_data["description"]
+    sources["job"]["links"] = scraped_data["links"]
+    sources["job"]["documents"] = scraped_data["documents"]
+    sources["video"] = video_text or ""
+    sources["attachments"] = attachments or []
+    return sources
+
+def attachment_documents(attachments):
+    """Documents for the attachments whose text was extracted"""
+    return [Document(
+        page_content=attachment["text"],
+        metadata={"source": "attachment", "url": attachment["url"], "kind": attachment["kind"]}
+    ) for attachment in attachments if attachment.get("text")]
+
+def build_documents(sources):
+    docs = [Document(
+        page_content=sources["job"]["description"],
+        metadata={"source": "job_post"}
+    )]
+    if sources["video"]:
+        docs.append(Document(
+            page_content=sources["video"],
+            metadata={"source": "video"}
+        ))
+    docs.extend(attachment_documents(sources.get("attachments", [])))
+    return docs
+
+def _extras_key(sources):
+    """Hash of what feeds the analysis besides the description"""
+    digest = hashlib.sha256((sources["video"] or "").encode("utf-8"))
+    for attachment in sources.get("attachments", []):
+        digest.update(b"\0" + attachment.get("text", "").encode("utf-8"))
+    return digest.hexdigest()
+
+def _fingerprintable(description):
+    # Every page the scraper cannot parse gets the same placeholder; such
+    # jobs would all match each other
+    return bool(description) and description != NO_DESCRIPTION
+
+def find_duplicate(sources):
+    """Earlier job whose cleaned description is a near-duplicate of this one
+
+    Returns the duplicate index match plus "diff" (earlier description ->
+    this one) and "reusable" (its analysis is stored, the similarity
+    reaches DUPLICATE_REUSE_THRESHOLD and the video and attachments are
+    the same), or None.
+    """
+    index = get_duplicate_index()
+    description = sources["job"]["description"]
+    if index is None or not _fingerprintable(description):
+        return None
+    with span("duplicates") as stage:
+        match = index.find(description)
+        stage.set(found=match is not None)
+        if match is None:
+            return None
+        mark_reusable(match, sources)
+        stage.set(duplicate_of=match["job_id"], similarity=match["similarity"], reusable=match["reusable"])
+    match["diff"] = description_diff(match["description"], description)
+    return match
+
+def reuse_possible(match, description):
+    """Whether a duplicate match can be reused once the video and the
+    attachments are known to be the same"""
+    return bool(match["analysis"]) and _reuse_similar(match, description)
+
+def mark_reusable(match, sources):
+    """(Re)compute a find_duplicate match's "reusable" for the sources as
+    they are now, e.g. after the transcript arrived"""
+    match["reusable"] = (reuse_possible(match, sources["job"]["description"])
+                         and match["extras"] == _extras_key(sources))
+    return match["reusable"]
+
+def _reuse_similar(match, description, threshold=DUPLICATE_REUSE_THRESHOLD):
+    # MinHash can estimate 1.0 for texts that differ in a few words, so
+    # the strictest setting compares the descriptions themselves
+    if threshold >= 1.0:
+        return match["description"] == description
+    return match["similarity"] >= threshold
+
+def remember_job(sources, job_id, analysis):
+    """Fingerprint the job with its analysis so reposts can reuse it"""
+    index = get_duplicate_index()
+    description = sources["job"]["description"]
+    if index is None or not _fingerprintable(description):
+        return
+    job_id = job_id or hashlib.sha256(description.encode("utf-8")).hexdigest()[:32]
+    index.add(job_id, description, title=sources["job"]["title"], extras=_extras_key(sources),
+              analysis=analysis)
+
+def _reusable_analysis(rag, sources):
+    """Look up an analysis of a near-identical earlier job in the semantic
+    cache; returns (cache, description vector, (analysis, similarity) or None)"""
+    cache = get_semantic_cache()
+    if cache is None or not sources["job"]["description"]:
+        return None, None, None
+    # The chunk vectors come from the embedding cache, so this is cheap
+    # once the knowledge base has been built
+    _, vectors = rag.embed_documents(build_documents(sources)[:1])
+    vector = SemanticAnalysisCache.document_vector(vectors)
+    return cache, vector, cache.find(vector, _extras_key(sources))
+
+def run_analysis(rag, sources, job_id=None, retriever=None, duplicate=_FIND):
+    """Run the RAG analysis, building the knowledge base unless a retriever is given
+
+    A near-duplicate of an earlier job reuses its analysis; the match is
+    returned under "duplicate" either way. A caller that already ran
+    find_duplicate(sources) passes its result (None included) as duplicate.
+    """
+    if duplicate is _FIND:
+        duplicate = find_duplicate(sources)
+    if duplicate and duplicate["reusable"]:
+        remember_job(sources, job_id, duplicate["analysis"])
+        return {"input": ANALYSIS_PROMPT, "context": [], "answer": duplicate["analysis"],
+                "duplicate": duplicate}
+    cache, vector, reused = _reusable_analysis(rag, sources)
+    if reused:
+        analysis, similarity = reused
+        annotate(semantic_cache_similarity=similarity)
+        remember_job(sources, job_id, analysis)
+        return {"input": ANALYSIS_PROMPT, "context": [], "answer": analysis,
+                "reused_similarity": similarity, "duplicate": duplicate}
+    if retriever is None:
+        retriever = rag.create_knowledge_base(build_documents(sources), job_id=job_id)
+    result = rag.generate_response(ANALYSIS_PROMPT, retriever)
+    if cache is not None:
+        cache.add(vector, result["answer"], _extras_key(sources))
+    remember_job(sources, job_id, result["answer"])
+    result["duplicate"] = duplicate
+    return result
+
+def stream_analysis(rag, sources, job_id=None, retriever=None, duplicate=_FIND):
+    """Build the knowledge base now and return a stream of analysis text chunks
+    (duplicate as for run_analysis)"""
+    if duplicate is _FIND:
+        duplicate = find_duplicate(sources)
+    if duplicate and duplicate["reusable"]:
+        remember_job(sources, job_id, duplicate["analysis"])
+        return iter([duplicate["analysis"]])
+    cache, vector, reused = _reusable_analysis(rag, sources)
+    if reused:
+        annotate(semantic_cache_similarity=reused[1])
+        remember_job(sources, job_id, reused[0])
+        return iter([reused[0]])
+    if retriever is None:
+        retriever = rag.create_knowledge_base(build_documents(sources), job_id=job_id)
+    return _record_analysis(rag.stream_response(ANALYSIS_PROMPT, retriever), sources, job_id,
+                            cache, vector)
+
+def _record_analysis(stream, sources, job_id, cache, vector):
+    parts = []
+    for chunk in stream:
+        parts.append(chunk)
+        yield chunk
+    analysis = "".join(parts)
+    if cache is not None:
+        cache.add(vector, analysis, _extras_key(sources))
+    remember_job(sources, job_id, analysis)
+
+def _proposal_args(analysis_text, sources, tone, has_video):
+    if has_video is None:
+        has_video = bool(sources["video"])
+    return dict(
+        bullet_points=extract_bullet_points(analysis_text),
+        job_title=sources["job"]["title"] or "Client",
+        has_video=has_video,
+        tone=tone
+    )
+
+def run_proposal(analysis_text, sources, tone="default", has_video=None, llm=None):
+    """Generate the final proposal from an analysis"""
+    with span("proposal", tone=tone):
+        return generate_human_sounding_proposal(
+            **_proposal_args(analysis_text, sources, tone, has_video), llm=llm,
+            callbacks=trace_callbacks()
+        )
+
+def stream_proposal(analysis_text, sources, tone="default", has_video=None, llm=None):
+    """Stream the final proposal as text chunks"""
+    def chunks():
+        # Evaluated on the first chunk, inside the stream's span
+        yield from stream_human_sounding_proposal(
+            **_proposal_args(analysis_text, sources, tone, has_video), llm=llm,
+            callbacks=trace_callbacks()
+        )
+    return traced_stream("proposal", chunks(), tone=tone)
+
+async def agenerate_proposals(analysis_text, sources, tones, has_video=None, llm=None,
+                              concurrency=PROPOSAL_CONCURRENCY, callbacks=None):
+    """Generate one proposal per tone from the same analysis, at most
+    `concurrency` LLM calls at a time
+
+    Returns {tone: proposal text or the exception that tone failed with}.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(tone):
+        async with semaphore:
+            return await agenerate_human_sounding_proposal(
+                **_proposal_args(analysis_text, sources, tone, has_video), llm=llm,
+                callbacks=callbacks
+            )
+
+    results = await asyncio.gather(*(one(tone) for tone in tones), return_exceptions=True)
+    return dict(zip(tones, results))
+
+def run_proposals(analysis_text, sources, tones, has_video=None, llm=None,
+                  concurrency=PROPOSAL_CONCURRENCY):
+    """Blocking wrapper around agenerate_proposals for sync callers"""
+    with span("proposals", tones=len(tones)):
+        # The coroutine runs on the event loop thread, so the span for its
+        # token counts is captured here
+        return run_coroutine(agenerate_proposals(
+            analysis_text, sources, tones, has_video=has_video, llm=llm, concurrency=concurrency,
+            callbacks=trace_callbacks()
+        ))
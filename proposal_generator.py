@@ -1,10 +1,13 @@
 # File: proposal_generator.py
 
-from typing import Optional
+from typing import Iterator, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import (ChatPromptTemplate,
     SystemMessagePromptTemplate, HumanMessagePromptTemplate)
 from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
+from chain_factory import get_chain, get_chat_model
+from config import PROPOSAL_RETRY_ATTEMPTS
+from llm_cache import with_stream_cache
 
 def extract_bullet_points(analysis_text: str) -> str:
     if "-" in analysis_text or "•" in analysis_text:
@@ -14,42 +17,28 @@ def extract_bullet_points(analysis_text: str) -> str:
         bulletified = "\n".join(f"- {l.strip()}" for l in lines if l.strip())
         return bulletified
 
-def generate_human_sounding_proposal(
-    bullet_points: str,
-    job_title: str,
-    has_video: bool,
-    tone: str = "default"
-) -> str:
-
-    llm = ChatGroq(
-        temperature=0.75,  # Slightly higher for more personality
-        model_name="llama3-70b-8192"
-    )
-
-    # 1. Enhanced style instructions based on tone
-    if tone.lower() == "formal":
-        style_instructions = (
-            "Write professionally but warmly. Use phrases like 'I noticed', 'I specialize in', "
-            "'I've successfully delivered'. Show confidence while maintaining professionalism."
-        )
-    elif tone.lower() == "casual":
-        style_instructions = (
-            "Write like you're having a coffee chat. Use phrases like 'Hey there', 'I'd love to help', "
-            "'Let's chat'. Be friendly and enthusiastic while showing expertise."
-        )
-    elif tone.lower() == "technical":
-        style_instructions = (
-            "Write like a seasoned technical expert. Use relevant terminology naturally. "
-            "Include phrases like 'I've implemented', 'Based on my experience with similar projects'."
-        )
-    else:
-        style_instructions = (
-            "Write confidently and conversationally. Use phrases like 'I noticed', 'Here's what I can do', "
-            "'Let me handle this for you'. Show genuine interest and expertise."
-        )
-
-    # 2. Enhanced system prompt for more compelling proposals
-    system_prompt_text = f"""
+# 1. Enhanced style instructions based on tone
+STYLE_INSTRUCTIONS = {
+    "formal": (
+        "Write professionally but warmly. Use phrases like 'I noticed', 'I specialize in', "
+        "'I've successfully delivered'. Show confidence while maintaining professionalism."
+    ),
+    "casual": (
+        "Write like you're having a coffee chat. Use phrases like 'Hey there', 'I'd love to help', "
+        "'Let's chat'. Be friendly and enthusiastic while showing expertise."
+    ),
+    "technical": (
+        "Write like a seasoned technical expert. Use relevant terminology naturally. "
+        "Include phrases like 'I've implemented', 'Based on my experience with similar projects'."
+    ),
+    "default": (
+        "Write confidently and conversationally. Use phrases like 'I noticed', 'Here's what I can do', "
+        "'Let me handle this for you'. Show genuine interest and expertise."
+    ),
+}
+
+# 2. Enhanced system prompt for more compelling proposals
+SYSTEM_PROMPT = """
     You are an experienced freelancer writing a winning Upwork proposal. Write as if you're having a real conversation.
 
     Follow this structure:
@@ -81,8 +70,8 @@ def generate_human_sounding_proposal(
     - Desperate or needy language
     """
 
-    # 3. Enhanced user prompt for better results
-    user_prompt_text = f"""
+# 3. Enhanced user prompt for better results
+USER_PROMPT = """
     Job Title: '{job_title}'
 
     Key Points to Address:
@@ -101,19 +90,80 @@ def generate_human_sounding_proposal(
     Make it sound like a confident expert who's excited about their project.
     """
 
-    # 4. Use the older pattern: we explicitly create prompt objects:
-    system_msg = SystemMessagePromptTemplate.from_template(system_prompt_text)
-    user_msg   = HumanMessagePromptTemplate.from_template(user_prompt_text)
+# 4. The job details are template variables, so the prompt is parsed once
+#    and braces in scraped text are never mistaken for placeholders
+PROPOSAL_PROMPT = ChatPromptTemplate(messages=[
+    SystemMessagePromptTemplate.from_template(SYSTEM_PROMPT),
+    HumanMessagePromptTemplate.from_template(USER_PROMPT),
+])
+
+def _proposal_chain(
+    tone: str = "default",
+    llm: Optional[BaseChatModel] = None,
+    stream: bool = False
+):
+    """Prompt | LLM | parser for one tone, built once per process"""
+    tone = tone.lower() if tone.lower() in STYLE_INSTRUCTIONS else "default"
+
+    def build(llm):
+        # Slightly higher temperature for more personality
+        llm = llm or get_chat_model(temperature=0.75)
+        if stream:
+            llm = with_stream_cache(llm)
+        prompt = PROPOSAL_PROMPT.partial(style_instructions=STYLE_INSTRUCTIONS[tone])
+        return prompt | llm | StrOutputParser()
+
+    return get_chain("proposal", build, llm, tone=tone, stream=stream)
+
+def _proposal_inputs(bullet_points: str, job_title: str, has_video: bool) -> dict:
+    return {"bullet_points": bullet_points, "job_title": job_title, "has_video": has_video}
 
-    # 5. Build ChatPromptTemplate with 'messages=[...]'
-    prompt_template = ChatPromptTemplate(
-        messages=[system_msg, user_msg],
-        # If your version requires listing input variables, do so; 
-        # but typically the placeholders are in the template text itself.
-    )
-
-    chain = prompt_template | llm | StrOutputParser()
+def generate_human_sounding_proposal(
+    bullet_points: str,
+    job_title: str,
+    has_video: bool,
+    tone: str = "default",
+    llm: Optional[BaseChatModel] = None,
+    callbacks: Optional[list] = None
+) -> str:
+    chain = _proposal_chain(tone, llm)
 
-    # 6. Invoke
-    result = chain.invoke({})
+    # 5. Invoke
+    result = chain.invoke(_proposal_inputs(bullet_points, job_title, has_video),
+                          config={"callbacks": callbacks})
     return result
+
+def stream_human_sounding_proposal(
+    bullet_points: str,
+    job_title: str,
+    has_video: bool,
+    tone: str = "default",
+    llm: Optional[BaseChatModel] = None,
+    callbacks: Optional[list] = None
+) -> Iterator[str]:
+    """Same as generate_human_sounding_proposal, yielding text chunks as they arrive"""
+    chain = _proposal_chain(tone, llm, stream=True)
+    yield from chain.stream(_proposal_inputs(bullet_points, job_title, has_video),
+                            config={"callbacks": callbacks})
+
+def _rate_limit_errors() -> tuple:
+    from groq import RateLimitError
+    return (RateLimitError,)
+
+async def agenerate_human_sounding_proposal(
+    bullet_points: str,
+    job_title: str,
+    has_video: bool,
+    tone: str = "default",
+    llm: Optional[BaseChatModel] = None,
+    callbacks: Optional[list] = None
+) -> str:
+    """Async generate_human_sounding_proposal that retries 429s with
+    exponential backoff and jitter"""
+    chain = _proposal_chain(tone, llm).with_retry(
+        retry_if_exception_type=_rate_limit_errors(),
+        wait_exponential_jitter=True,
+        stop_after_attempt=PROPOSAL_RETRY_ATTEMPTS
+    )
+    return await chain.ainvoke(_proposal_inputs(bullet_points, job_title, has_video),
+                               config={"callbacks": callbacks})
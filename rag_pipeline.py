@@ -1,40 +1,19 @@
 # File: rag_pipeline.py
 # Handles RAG (Retrieval Augmented Generation) pipeline for analysis
 
+from functools import lru_cache
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.chains import create_retrieval_chain
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.output_parsers import StrOutputParser
+from config import EMBEDDING_MODEL, CONTEXT_TOKEN_BUDGET
+from chain_factory import get_chain, get_chat_model
+from context_assembler import KnowledgeBase
+from llm_cache import with_stream_cache
+from tracing import count, span, trace_callbacks, traced_stream
 
-class RAGPipeline:
-    def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
-        )
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
-        
-    def create_knowledge_base(self, documents):
-        chunks = self.text_splitter.split_documents(documents)
-        vectorstore = FAISS.from_documents(
-            documents=chunks,
-            embedding=self.embeddings
-        )
-        return vectorstore.as_retriever(search_kwargs={"k": 5})
-    
-    def generate_response(self, query, retriever):
-        llm = ChatGroq(
-            temperature=0.7,
-            model_name="llama3-70b-8192"
-        )
-        
-        prompt = ChatPromptTemplate.from_template("""
+ANALYSIS_TEMPLATE = ChatPromptTemplate.from_template("""
         Please carefully analyze all provided documents and relevant data:
 
         CONTEXT:
@@ -52,24 +31,8 @@ class RAGPipeline:
         If no video content is provided, do not mention it.
         Separate your findings with clear headings or bullet points.
         """)
-        
-        document_chain = create_stuff_documents_chain(llm, prompt)
-        retrieval_chain = create_retrieval_chain(retriever, document_chain)
-        return retrieval_chain.invoke({"input": query})
-    
-    def generate_proposal(self, analysis_result, retriever, template=None, has_video=False):
-        """
-        Create a proposal either using the default prompt or a user-provided template.
-        The user-provided template must contain '{analysis}' to embed the analysis results.
-        If has_video=False, do not mention or assume video references.
-        """
-        llm = ChatGroq(
-            temperature=0.3,
-            model_name="llama3-70b-8192"
-        )
 
-        # Build a more human-sounding default prompt dynamically
-        base_prompt = """
+PROPOSAL_TEMPLATE = """
         You are an experienced freelancer. Write a clear, client-focused proposal:
         
         ANALYSIS: {analysis}
@@ -88,20 +51,136 @@ class RAGPipeline:
         - Try to sound natural and conversational, not AI-generated.
         """
 
+@lru_cache(maxsize=32)
+def _prompt(template):
+    """Parse a prompt template once per distinct text"""
+    return ChatPromptTemplate.from_template(template)
+
+class RAGPipeline:
+    def __init__(self, embedding_model=EMBEDDING_MODEL, llm=None, context_budget=CONTEXT_TOKEN_BUDGET):
+        # llm overrides the Groq models (e.g. fake_llm.FakeStreamingChatModel)
+        self.llm = llm
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200,
+            add_start_index=True  # lets the context assembler drop the overlap
+        )
+        self.embedding_model = embedding_model
+        self.context_budget = context_budget
+
+    @property
+    def embeddings(self):
+        """Shared embedding model behind an on-disk cache keyed by chunk content"""
+        # Imported on first use: FAISS and the embedding stack are not
+        # needed for jobs that fit the context budget
+        from knowledge_index import cached_embeddings
+        return cached_embeddings(self.embedding_model)
+
+    def embed_documents(self, documents):
+        """Split documents and embed the chunks; returns (chunks, vectors),
+        vectors being one (len(chunks), dim) float32 array
+
+        Parts of a job (e.g. the description and a video transcript) can
+        be embedded separately as they become available and combined with
+        build_knowledge_base.
+        """
+        with span("embed") as stage:
+            chunks = self.text_splitter.split_documents(documents)
+            texts = [chunk.page_content for chunk in chunks]
+            stage.set(chunks=len(texts), chars=sum(map(len, texts)))
+            vectors = self.embeddings.embed_array(texts)
+        return chunks, vectors
+
+    def build_knowledge_base(self, parts, job_id=None):
+        """Record embedded parts in the persistent index and return the
+        job's KnowledgeBase"""
+        from knowledge_index import content_job_id, get_knowledge_index
+        chunks = [chunk for part_chunks, _ in parts for chunk in part_chunks]
+        arrays = [part_vectors for _, part_vectors in parts if len(part_vectors)]
+        vectors = np.concatenate(arrays) if arrays else None
+
+        index = get_knowledge_index(self.embeddings, self.embedding_model)
+        if index is not None and vectors is not None:
+            with span("knowledge_index", vectors=len(vectors)):
+                index.add_job(job_id or content_job_id(chunks), chunks, vectors)
+        return KnowledgeBase(chunks, vectors, self.embedding_model, budget=self.context_budget)
+
+    def fits_context(self, documents):
+        """Whether the documents fit the context budget without retrieval"""
+        return KnowledgeBase(self.text_splitter.split_documents(documents), budget=self.context_budget).fits()
+
+    def create_knowledge_base(self, documents, job_id=None):
+        """Knowledge base for a job's documents
+
+        A job that fits the context budget is sent whole, so its chunks
+        are neither embedded nor indexed.
+        """
+        chunks = self.text_splitter.split_documents(documents)
+        knowledge_base = KnowledgeBase(chunks, budget=self.context_budget)
+        if knowledge_base.fits():
+            return knowledge_base
+        return self.build_knowledge_base([self.embed_documents(documents)], job_id=job_id)
+
+    def _analysis_chain(self, stream=False):
+        def build(llm):
+            llm = llm or get_chat_model(temperature=0.7)
+            if stream:
+                llm = with_stream_cache(llm)
+            return create_stuff_documents_chain(llm, ANALYSIS_TEMPLATE)
+
+        # The prompt/LLM chain is built once per process
+        return get_chain("analysis", build, self.llm, stream=stream)
+
+    def _context(self, query, retriever):
+        """Documents for the prompt; a KnowledgeBase also reports its token savings"""
+        with span("context") as stage:
+            if isinstance(retriever, KnowledgeBase):
+                documents, report = retriever.assemble(query)
+                stage.set(**report)
+                count(prompt_tokens_saved=report["saved_tokens"])
+            else:
+                documents = retriever.invoke(query)
+            stage.set(documents=len(documents))
+        return documents
+
+    def generate_response(self, query, retriever):
+        """Run the analysis; returns {"input", "context", "answer"}"""
+        with span("analysis"):
+            context = self._context(query, retriever)
+            answer = self._analysis_chain().invoke(
+                {"input": query, "context": context}, config={"callbacks": trace_callbacks()}
+            )
+        return {"input": query, "context": context, "answer": answer}
+
+    def stream_response(self, query, retriever):
+        """Yield the analysis answer as text chunks while the LLM generates it"""
+        return traced_stream("analysis", self._stream_answer(query, retriever))
+
+    def _stream_answer(self, query, retriever):
+        context = self._context(query, retriever)
+        chain = self._analysis_chain(stream=True)
+        for chunk in chain.stream({"input": query, "context": context},
+                                  config={"callbacks": trace_callbacks()}):
+            if chunk:
+                yield chunk
+    
+    def generate_proposal(self, analysis_result, retriever, template=None, has_video=False):
+        """
+        Create a proposal either using the default prompt or a user-provided template.
+        The user-provided template must contain '{analysis}' to embed the analysis results.
+        If has_video=False, do not mention or assume video references.
+        """
         if has_video:
             video_line = "If applicable, briefly mention insights gained from the video."
         else:
             video_line = "If no video is mentioned, skip any reference to it."
 
-        # Insert the correct line for referencing video or not
-        final_prompt = base_prompt.replace("{video_line}", video_line)
-
         if template and "{analysis}" in template:
             # If user provided a custom template with {analysis}, we use that
-            prompt = ChatPromptTemplate.from_template(template)
+            prompt = _prompt(template)
         else:
-            # Use the dynamic default prompt
-            prompt = ChatPromptTemplate.from_template(final_prompt)
-        
-        chain = prompt | llm | StrOutputParser()
+            # Use the default prompt with the correct line for referencing video or not
+            prompt = _prompt(PROPOSAL_TEMPLATE).partial(video_line=video_line)
+
+        chain = prompt | (self.llm or get_chat_model(temperature=0.3)) | StrOutputParser()
         return chain.invoke({"analysis": analysis_result})
@@ -0,0 +1,88 @@
+# File: rate_limiter.py
+# Token-bucket rate limiting for outbound scraping and LLM calls
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1.0):
+        """Take tokens if available; return the seconds to wait otherwise (0 on success)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1.0):
+        """Block until tokens are available"""
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1.0):
+        """Wait for tokens without blocking the event loop"""
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+class Unlimited:
+    """Stand-in limiter used when a rate limit is disabled"""
+
+    def try_acquire(self, tokens=1.0):
+        return 0.0
+
+    def acquire(self, tokens=1.0):
+        return
+
+    async def acquire_async(self, tokens=1.0):
+        return
+
+def make_limiter(rate, capacity=None):
+    """Return a TokenBucket, or an Unlimited limiter when rate <= 0"""
+    return TokenBucket(rate, capacity) if rate and rate > 0 else Unlimited()
+
+class PerHostLimiter:
+    """One token bucket per host, created on first use"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = make_limiter(self.rate, self.capacity)
+            return self._buckets[host]
+
+    def acquire(self, url):
+        self.for_url(url).acquire()
+
+    async def acquire_async(self, url):
+        await self.for_url(url).acquire_async()
@@ -0,0 +1,119 @@
+# File: scrape_cache.py
+# Persistent cache of scraped job posts keyed by normalized URL, with
+# ETag/Last-Modified revalidation
+
+import hashlib
+import os
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from config import (SCRAPE_CACHE_ENABLED, CACHE_DIR, SCRAPE_CACHE_TTL,
+    SCRAPE_CACHE_MAX_MB)
+from disk_cache import DiskCache
+
+# Query parameters that never change the page content: exact names, plus
+# the utm_ family by prefix (a prefix match on "ref" or "source" would also
+# drop real parameters such as refId or sourceId)
+TRACKING_PARAMS = {"ref", "referrer_url_path", "source", "fbclid", "gclid"}
+TRACKING_PREFIXES = ("utm_",)
+
+def normalize_url(url):
+    """Canonical form of a URL: lowercase host, no fragment/tracking params, sorted query"""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+def url_key(url):
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+class ScrapeCache:
+    """Raw HTML plus the parsed scrape_job_post result for each job URL
+
+    Fresh entries (younger than ttl) are served without touching the
+    network. Expired entries are revalidated with If-None-Match /
+    If-Modified-Since and refreshed in place on a 304.
+    """
+
+    def __init__(self, path=None, ttl=SCRAPE_CACHE_TTL, max_bytes=SCRAPE_CACHE_MAX_MB * 1024 * 1024):
+        self.store = DiskCache(path or os.path.join(CACHE_DIR, "scrape.sqlite3"),
+                               max_bytes=max_bytes, ttl=ttl)
+        self.metrics = {"hits": 0, "misses": 0, "revalidated": 0, "bytes_saved": 0}
+        self._lock = threading.Lock()
+
+    def lookup(self, url):
+        """Return the cached entry (possibly expired) or None"""
+        return self.store.get(url_key(url))
+
+    def conditional_headers(self, entry):
+        """Validators to send when revalidating an expired entry"""
+        headers = {}
+        if entry.meta.get("etag"):
+            headers["If-None-Match"] = entry.meta["etag"]
+        if entry.meta.get("last_modified"):
+            headers["If-Modified-Since"] = entry.meta["last_modified"]
+        return headers
+
+    def hit(self, entry, revalidated=False):
+        """Record a cache hit and return a copy of the parsed result"""
+        self._count("revalidated" if revalidated else "hits", entry.size)
+        return dict(entry.meta["parsed"])
+
+    def not_modified(self, url, entry):
+        """Handle a 304: refresh the entry and serve it"""
+        self.store.refresh(url_key(url))
+        return self.hit(entry, revalidated=True)
+
+    def miss(self):
+        """Record a full download of a page that was not cached or has changed"""
+        self._count("misses")
+
+    def store_page(self, url, html, parsed, etag=None, last_modified=None):
+        """Cache a fetched page with its parsed result; returns parsed"""
+        body = html.encode("utf-8")
+        self.store.set(url_key(url), body, {
+            "url": normalize_url(url),
+            "content_hash": hashlib.sha256(body).hexdigest(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "parsed": parsed
+        })
+        return parsed
+
+    def invalidate(self, url):
+        """Drop a page so the next scrape fetches it (e.g. the job was edited)"""
+        self.store.delete(url_key(url))
+
+    def html(self, url):
+        """Raw HTML of a cached page, or None"""
+        entry = self.store.get(url_key(url), touch=False)
+        return entry.value.decode("utf-8") if entry else None
+
+    def get_metrics(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["entries"] = len(self.store)
+        metrics["bytes"] = self.store.total_bytes()
+        metrics["evictions"] = self.store.stats["evictions"]
+        return metrics
+
+    def _count(self, name, saved=0):
+        with self._lock:
+            self.metrics[name] += 1
+            self.metrics["bytes_saved"] += saved
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_scrape_cache():
+    """Process-wide cache instance, or None when caching is disabled"""
+    global _default_cache
+    if not SCRAPE_CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ScrapeCache()
+        return _default_cache
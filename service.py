@@ -0,0 +1,395 @@
+# File: service.py
+# Headless HTTP service: submit a job URL, then poll or stream the result.
+# Jobs wait in a local work queue and run in worker processes that each
+# keep their models and LLM clients warm between jobs.
+#
+# Usage:
+#   python service.py --workers 4 --port 8080
+#   curl -X POST localhost:8080/jobs -d '{"url": "https://www.upwork.com/jobs/...", "tone": "formal"}'
+#   curl localhost:8080/jobs/<id>           # poll: status, analysis, proposal
+#   curl localhost:8080/jobs/<id>/events    # stream: one JSON event per line
+#
+# Events: running, scraped, duplicate (of an earlier job), analysis/proposal
+# (text deltas), done, error.
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import (SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS, SERVICE_QUEUE_SIZE,
+    SERVICE_JOB_HISTORY, SERVICE_WARMUP, SCRAPE_RATE_LIMIT, LLM_RATE_LIMIT)
+
+TONES = ("default", "formal", "casual", "technical")
+_FINISHED = ("done", "error")
+
+def _worker_main(jobs, events, setup, workers):
+    """Worker process: load models once, then run jobs until a None arrives"""
+    if setup is not None:
+        setup()
+    from job_scraper import scrape_job_post
+    from llm_cache import install_llm_cache
+    from model_registry import warm_up_defaults
+    from pipeline import stream_analysis, stream_proposal
+    from rag_pipeline import RAGPipeline
+    from rate_limiter import make_limiter
+    from scrape_cache import url_key
+    from stage_scheduler import StageScheduler
+    from tracing import start_trace
+
+    warm_up_defaults(SERVICE_WARMUP, background=False)
+    install_llm_cache()
+    rag = RAGPipeline()
+    stages = StageScheduler(rag)
+    # The configured rates are for the whole service
+    scrape_limiter = make_limiter(SCRAPE_RATE_LIMIT / workers)
+    llm_limiter = make_limiter(LLM_RATE_LIMIT / workers)
+    pid = os.getpid()
+    events.put((None, {"event": "ready", "worker": pid}))
+
+    while (job := jobs.get()) is not None:
+        job_id = job["id"]
+        events.put((job_id, {"event": "running", "worker": pid}))
+        stage = "scrape"
+        try:
+            with start_trace("service_job", url=job["url"]) as trace:
+                scrape_limiter.acquire()
+                scraped = scrape_job_post(job["url"], polite_delay=False)
+                if "error" in scraped:
+                    raise RuntimeError(scraped["error"])
+                events.put((job_id, {"event": "scraped", "title": scraped["title"]}))
+                # Attachments download while the description is embedded
+                prepared = stages.prepare(scraped, job_id=url_key(job["url"]))
+                sources, duplicate = prepared.sources, prepared.duplicate
+                if duplicate:
+                    events.put((job_id, {"event": "duplicate", "job_id": duplicate["job_id"],
+                                         "title": duplicate["title"], "similarity": duplicate["similarity"],
+                                         "reused": duplicate["reusable"], "diff": duplicate["diff"]}))
+
+                stage = "analysis"
+                llm_limiter.acquire()
+                analysis = ""
+                for chunk in stream_analysis(rag, sources, job_id=url_key(job["url"]),
+                                             retriever=prepared.retriever, duplicate=duplicate):
+                    analysis += chunk
+                    events.put((job_id, {"event": "analysis", "delta": chunk}))
+
+                stage = "proposal"
+                llm_limiter.acquire()
+                for chunk in stream_proposal(analysis, sources, tone=job["tone"]):
+                    events.put((job_id, {"event": "proposal", "delta": chunk}))
+            events.put((job_id, {"event": "done", "timings": {
+                s["stage"]: round(s["seconds"], 3) for s in trace.summary()
+            }}))
+        except Exception as e:
+            events.put((job_id, {"event": "error", "stage": stage, "error": str(e)}))
+
+class JobQueue:
+    """Jobs submitted to the service, the worker processes running them and
+    the event log clients poll or stream
+
+    Jobs wait in the parent and are handed to one idle worker at a time,
+    so the parent always knows which job each worker holds. A collector
+    thread applies worker events to the job records and, at least every
+    reap_interval seconds, fails the job of a worker process that died
+    and starts a replacement.
+    """
+
+    reap_interval = 1.0
+
+    def __init__(self, workers=SERVICE_WORKERS, queue_size=SERVICE_QUEUE_SIZE,
+                 history=SERVICE_JOB_HISTORY, setup=None):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.history = history
+        self.setup = setup
+        self._context = multiprocessing.get_context("spawn")
+        self._events = self._context.Queue()
+        self._pending = deque()  # jobs not yet handed to a worker
+        self._workers = {}  # pid -> {"process", "inbox", "ready", "job"}
+        self._records = OrderedDict()
+        self._changed = threading.Condition()
+        self._collector = None
+        self._started = False
+        self._closed = False
+
+    def start(self, timeout=300):
+        """Start the workers and wait until each has loaded its models"""
+        for _ in range(self.workers):
+            self._spawn()
+        self._collector = threading.Thread(target=self._collect, name="service-events", daemon=True)
+        self._collector.start()
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while (ready := sum(w["ready"] for w in self._workers.values())) < self.workers:
+                if any(not w["process"].is_alive() for w in self._workers.values()):
+                    raise RuntimeError("A worker process exited during startup")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Only {ready} of {self.workers} workers started")
+                self._changed.wait(1.0)
+        self._started = True
+        return self
+
+    def _spawn(self):
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main, args=(inbox, self._events, self.setup, self.workers), daemon=True
+        )
+        # Registered before the collector can see the worker's "ready"
+        with self._changed:
+            process.start()
+            self._workers[process.pid] = {"process": process, "inbox": inbox, "ready": False, "job": None}
+
+    def close(self):
+        self._closed = True
+        with self._changed:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker["inbox"].put(None)
+        for worker in workers:
+            worker["process"].join(timeout=10)
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+
+    def submit(self, url, tone="default"):
+        """Queue a job; raises queue.Full when the queue is at capacity"""
+        job_id = secrets.token_hex(8)
+        record = {"id": job_id, "url": url, "tone": tone, "status": "queued",
+                  "submitted": time.time(), "started": None, "finished": None, "worker": None,
+                  "title": None, "duplicate_of": None, "analysis": "", "proposal": "", "stage": None,
+                  "error": None, "timings": {}, "events": []}
+        with self._changed:
+            if len(self._pending) >= self.queue_size:
+                raise queue.Full
+            self._records[job_id] = record
+            self._pending.append({"id": job_id, "url": url, "tone": tone})
+            self._dispatch()
+        return job_id
+
+    def get(self, job_id):
+        """Snapshot of a job without its event log, or None"""
+        with self._changed:
+            record = self._records.get(job_id)
+            if record is None:
+                return None
+            return {k: v for k, v in record.items() if k != "events"}
+
+    def events(self, job_id, heartbeat=15.0):
+        """Yield the job's events from the start, then live until it finishes
+
+        Yields None after `heartbeat` seconds without news so a streaming
+        client can keep its connection alive.
+        """
+        sent = 0
+        while True:
+            timed_out = False
+            with self._changed:
+                record = self._records.get(job_id)
+                if record is None:
+                    return
+                if sent >= len(record["events"]) and record["status"] not in _FINISHED:
+                    timed_out = not self._changed.wait(heartbeat)
+                new = record["events"][sent:]
+                finished = record["status"] in _FINISHED
+            sent += len(new)
+            if timed_out and not new:
+                yield None
+            yield from new
+            if finished and sent >= len(record["events"]):
+                return
+
+    def stats(self):
+        with self._changed:
+            counts = {}
+            for record in self._records.values():
+                counts[record["status"]] = counts.get(record["status"], 0) + 1
+            alive = sum(w["process"].is_alive() for w in self._workers.values())
+        return {"workers": alive, "jobs": counts}
+
+    def _collect(self):
+        reaped = time.monotonic()
+        while not self._closed:
+            try:
+                job_id, event = self._events.get(timeout=self.reap_interval)
+            except queue.Empty:
+                job_id = event = None
+            if event is not None:
+                with self._changed:
+                    if job_id is None:
+                        self._workers.get(event["worker"], {})["ready"] = True
+                    else:
+                        if event["event"] in _FINISHED:
+                            self._release(job_id)
+                        if job_id in self._records:
+                            self._apply(self._records[job_id], event)
+                    self._dispatch()
+                    self._changed.notify_all()
+            # Checked on a clock, not only when the event queue is quiet
+            if time.monotonic() - reaped >= self.reap_interval:
+                reaped = time.monotonic()
+                self._reap()
+
+    def _dispatch(self):
+        """Hand waiting jobs to idle workers (called with the lock held)"""
+        for worker in self._workers.values():
+            if not self._pending:
+                return
+            if worker["ready"] and worker["job"] is None and worker["process"].is_alive():
+                worker["job"] = self._pending.popleft()
+                worker["inbox"].put(worker["job"])
+
+    def _release(self, job_id):
+        for worker in self._workers.values():
+            if worker["job"] is not None and worker["job"]["id"] == job_id:
+                worker["job"] = None
+
+    def _apply(self, record, event):
+        kind = event["event"]
+        record["events"].append(event)
+        if kind == "running":
+            record.update(status="running", started=time.time(), worker=event["worker"])
+        elif kind == "scraped":
+            record["title"] = event["title"]
+        elif kind == "duplicate":
+            record["duplicate_of"] = {k: event[k] for k in ("job_id", "title", "similarity", "reused")}
+        elif kind in ("analysis", "proposal"):
+            record["stage"] = kind
+            record[kind] += event["delta"]
+        elif kind in _FINISHED:
+            record.update(status=kind, finished=time.time(), stage=event.get("stage"),
+                          error=event.get("error"), timings=event.get("timings", {}))
+            self._forget_old()
+
+    def _forget_old(self):
+        finished = [k for k, r in self._records.items() if r["status"] in _FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._records[job_id]
+
+    def _reap(self):
+        """Fail the jobs of dead workers and start replacements"""
+        if not self._started or self._closed:
+            return
+        with self._changed:
+            dead = [pid for pid, w in self._workers.items() if not w["process"].is_alive()]
+            for pid in dead:
+                job = self._workers.pop(pid)["job"]
+                # The job may have been handed over without a "running" event yet
+                record = self._records.get(job["id"]) if job else None
+                if record is not None and record["status"] not in _FINISHED:
+                    self._apply(record, {"event": "error", "stage": record["stage"],
+                                         "error": "worker process exited"})
+            if dead:
+                self._changed.notify_all()
+        for _ in dead:
+            self._spawn()
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._json(404, {"error": "not found"})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except ValueError:
+            return self._json(400, {"error": "body must be JSON"})
+        url = body.get("url")
+        tone = body.get("tone", "default")
+        if not url:
+            return self._json(400, {"error": "url is required"})
+        if tone not in TONES:
+            return self._json(400, {"error": f"tone must be one of {', '.join(TONES)}"})
+        try:
+            job_id = self.server.jobs.submit(url, tone)
+        except queue.Full:
+            return self._json(503, {"error": "queue is full, retry later"}, {"Retry-After": "5"})
+        self._json(202, {"id": job_id, "status": "queued"}, {"Location": f"/jobs/{job_id}"})
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts == ["health"]:
+            return self._json(200, self.server.jobs.stats())
+        if len(parts) == 2 and parts[0] == "jobs":
+            record = self.server.jobs.get(parts[1])
+            if record is None:
+                return self._json(404, {"error": "unknown job"})
+            return self._json(200, record)
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            if self.server.jobs.get(parts[1]) is None:
+                return self._json(404, {"error": "unknown job"})
+            return self._stream(self.server.jobs.events(parts[1]))
+        self._json(404, {"error": "not found"})
+
+    def _json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, events):
+        """NDJSON over chunked transfer encoding; empty lines are heartbeats"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for event in events:
+                line = (json.dumps(event) if event is not None else "").encode("utf-8") + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+class ServiceServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # A client that stops reading an event stream (e.g. after "done")
+        # resets its connection; that is not a server error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+def make_server(jobs, host=SERVICE_HOST, port=SERVICE_PORT):
+    """HTTP server for a started JobQueue (port 0 picks a free port)"""
+    server = ServiceServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.jobs = jobs
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Job analyzer HTTP service")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=SERVICE_QUEUE_SIZE)
+    args = parser.parse_args(argv)
+
+    jobs = JobQueue(workers=args.workers, queue_size=args.queue_size)
+    print(f"Starting {jobs.workers} workers...")
+    jobs.start()
+    server = make_server(jobs, args.host, args.port)
+    print(f"Listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.close()
+
+if __name__ == "__main__":
+    main()
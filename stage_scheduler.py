@@ -0,0 +1,198 @@
+# File: stage_scheduler.py
+# Runs the job scrape and the video transcription in parallel, embedding
+# the job description while Whisper and the attachment downloads are
+# still working
+
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from langchain.docstore.document import Document
+
+from attachments import attachment_urls, ingest_attachments
+from config import TRANSCRIBE_WORKERS, WHISPER_MODEL
+from job_scraper import scrape_job_post
+from pipeline import (attachment_documents, build_documents, build_sources, find_duplicate,
+    mark_reusable, reuse_possible)
+from tracing import record_span
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Attachment ingestion is I/O-bound here; extraction has its own process pool
+_attachment_threads = ThreadPoolExecutor(max_workers=4, thread_name_prefix="attachments")
+
+def _transcribe(media, model_size):
+    """Process-pool entry point; the worker keeps its Whisper model warm
+    in its own model registry between jobs"""
+    from video_processor import VideoProcessor
+    return VideoProcessor(model_size).transcribe_video(media)
+
+def transcription_pool(workers=TRANSCRIBE_WORKERS):
+    """Long-lived process pool for Whisper, shared by all sessions"""
+    with _pools_lock:
+        if workers not in _pools:
+            # spawn: forking a process that already runs torch/Streamlit
+            # threads is unsafe
+            _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pools[workers]
+
+class StageResult:
+    def __init__(self):
+        self.sources = None
+        self.retriever = None
+        self.duplicate = None
+        self.error = None
+        self.video_error = None
+        self.timings = {}
+
+    @property
+    def serial_time(self):
+        """What the same stages would have taken run one after another"""
+        return sum(v for k, v in self.timings.items() if k != "wall")
+
+class StageScheduler:
+    """Overlap scrape, transcription and embedding before retrieval
+
+    Whisper runs in a separate process while the calling thread scrapes,
+    so transcription holds neither the GIL nor the Streamlit script
+    thread. As soon as the scrape finishes, the job description is
+    embedded while the transcript and the attachments are still being
+    produced; the parts are joined into one knowledge base at the end.
+    Without a video, a description that fits the context budget is not
+    embedded early: the attachments decide whether the job needs
+    embedding at all (see create_knowledge_base).
+
+    The duplicate index is consulted right after the scrape. When an
+    earlier posting's analysis may be reused, nothing is embedded until
+    the transcript and the attachments show whether they match too.
+    """
+
+    def __init__(self, rag, model_size=WHISPER_MODEL, workers=TRANSCRIBE_WORKERS):
+        self.rag = rag
+        self.model_size = model_size
+        self.workers = workers
+
+    def run(self, job_url, video_source=None, job_id=None, on_progress=None):
+        """Run the pre-retrieval stages; returns a StageResult"""
+        progress = on_progress or (lambda message: None)
+        result = StageResult()
+        start = time.perf_counter()
+
+        upload_path = None
+        video_future = None
+        submitted = time.time()
+        if video_source:
+            media = video_source
+            if not isinstance(media, str):
+                # Uploaded files cannot be pickled into the worker process
+                from video_processor import save_upload
+                media = upload_path = save_upload(media)
+            video_future = transcription_pool(self.workers).submit(
+                _timed, _transcribe, media, self.model_size
+            )
+            progress("🎬 Frame-by-Frame Video Analysis...")
+
+        try:
+            progress("🔍 Deep Scanning Job Post...")
+            scraped, result.timings["scrape"] = _timed(scrape_job_post, job_url)
+            if "error" in scraped:
+                result.error = scraped["error"]
+                if video_future:
+                    video_future.cancel()
+                return result
+
+            self._prepare(result, scraped, job_id, video_future, submitted, progress)
+            return result
+        finally:
+            result.timings["wall"] = time.perf_counter() - start
+            if upload_path:
+                _cleanup_when_done(video_future, upload_path)
+
+    def prepare(self, scraped, job_id=None, on_progress=None):
+        """Run the stages after the scrape for a job scraped elsewhere (e.g.
+        behind a rate limiter) without a video; returns a StageResult"""
+        result = StageResult()
+        start = time.perf_counter()
+        try:
+            self._prepare(result, scraped, job_id, None, None, on_progress or (lambda message: None))
+        finally:
+            result.timings["wall"] = time.perf_counter() - start
+        return result
+
+    def _prepare(self, result, scraped, job_id, video_future, submitted, progress):
+        result.sources = build_sources(scraped)
+        attachments_future = None
+        if urls := attachment_urls(scraped):
+            progress(f"📎 Reading {len(urls)} attachments and links...")
+            # Copy the context so the attachment span joins this run's trace
+            attachments_future = _attachment_threads.submit(
+                contextvars.copy_context().run, _timed, ingest_attachments, urls
+            )
+
+        result.duplicate = find_duplicate(result.sources)
+        candidate = result.duplicate and reuse_possible(result.duplicate, scraped["description"])
+
+        # Embed the description while the downloads (and Whisper) run, unless
+        # the job may still fit the context budget or reuse an earlier
+        # analysis: then nothing is embedded until everything is known
+        parts = None
+        documents = build_documents(result.sources)
+        if not candidate and (video_future or not self.rag.fits_context(documents)):
+            progress("🧠 Building Context-Aware Database...")
+            part, result.timings["embed_job"] = _timed(self.rag.embed_documents, documents)
+            parts = [part]
+
+        if video_future:
+            try:
+                transcript, result.timings["transcribe"] = video_future.result()
+                record_span("transcribe", submitted, result.timings["transcribe"],
+                            chars=len(transcript))
+                result.sources["video"] = transcript
+                if parts is not None:
+                    part, result.timings["embed_video"] = _timed(
+                        self.rag.embed_documents,
+                        [Document(page_content=transcript, metadata={"source": "video"})]
+                    )
+                    parts.append(part)
+            except Exception as e:
+                result.video_error = str(e)
+
+        if attachments_future:
+            result.sources["attachments"], result.timings["attachments"] = attachments_future.result()
+
+        if result.duplicate and mark_reusable(result.duplicate, result.sources):
+            # The analysis of the earlier posting is reused: no knowledge base
+            return
+        if parts is None:
+            progress("🧠 Building Context-Aware Database...")
+            result.retriever, result.timings["index"] = _timed(
+                self.rag.create_knowledge_base, build_documents(result.sources), job_id
+            )
+            return
+        if documents := attachment_documents(result.sources["attachments"]):
+            part, result.timings["embed_attachments"] = _timed(self.rag.embed_documents, documents)
+            parts.append(part)
+        result.retriever, result.timings["index"] = _timed(
+            self.rag.build_knowledge_base, parts, job_id
+        )
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+def _cleanup_when_done(future, path):
+    def remove(_):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    if future is None:
+        remove(None)
+    else:
+        future.add_done_callback(remove)
@@ -0,0 +1,44 @@
+# File: streaming.py
+# Helpers for streaming LLM output: latency recording per stage
+
+import time
+
+class StageLatency:
+    """Time-to-first-token and total latency of one streamed stage"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.started = None
+        self.first_token = None
+        self.finished = None
+        self.tokens = 0
+
+    @property
+    def ttft(self):
+        if self.started is None or self.first_token is None:
+            return None
+        return self.first_token - self.started
+
+    @property
+    def total(self):
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def as_dict(self):
+        return {"stage": self.stage, "ttft": self.ttft, "total": self.total, "chunks": self.tokens}
+
+def timed_stream(chunks, latency):
+    """Pass text chunks through while recording latency; the clock starts
+    when the consumer first pulls from the stream"""
+    latency.started = time.perf_counter()
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if latency.first_token is None:
+                latency.first_token = time.perf_counter()
+            latency.tokens += 1
+            yield chunk
+    finally:
+        latency.finished = time.perf_counter()
@@ -0,0 +1,83 @@
+# File: text_cleaner.py
+# Single-pass cleaner for scraped text: UNWANTED_PATTERNS are compiled once
+# into one alternation, so each line is scanned a single time
+
+import re
+from config import UNWANTED_PATTERNS
+
+_WHITESPACE_RUN = re.compile(r'\s{2,}')
+
+# What clean() returns when nothing is left of the text
+NO_DESCRIPTION = 'No description available'
+
+def iter_lines(text):
+    """Yield the lines of text lazily, without building a list"""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+def _is_anchored(pattern):
+    # A top-level '|' could make only one branch anchored; keep such rules
+    # in the unanchored scan where search() handles them correctly.
+    return pattern.startswith('^') and '|' not in pattern
+
+def _alternation(patterns):
+    return re.compile('|'.join(f'(?:{p})' for p in patterns)) if patterns else None
+
+class TextCleaner:
+    """Drop lines matching any unwanted pattern and collapse whitespace runs
+
+    Rules anchored with '^' are kept in a separate alternation that is only
+    tried at the start of the line. Mixing them into the main alternation
+    (or wrapping rules in capturing groups) stops the regex engine from
+    skipping ahead on the rules' leading characters, which makes the
+    combined scan slower than running the rules one by one.
+    """
+
+    def __init__(self, patterns=UNWANTED_PATTERNS):
+        self.patterns = list(patterns)
+        self._rules = [re.compile(p) for p in self.patterns]
+        self._anywhere = _alternation([p for p in self.patterns if not _is_anchored(p)])
+        self._anchored = _alternation([p for p in self.patterns if _is_anchored(p)])
+
+    def is_unwanted(self, line):
+        return bool(
+            (self._anywhere and self._anywhere.search(line))
+            or (self._anchored and self._anchored.match(line))
+        )
+
+    def matching_rule(self, line):
+        """Pattern that drops this (stripped) line, or None"""
+        if not self.is_unwanted(line):
+            return None
+        # Only reached for dropped lines, so the per-rule scan stays off
+        # the hot path.
+        for pattern, rule in zip(self.patterns, self._rules):
+            if rule.search(line):
+                return pattern
+
+    def explain(self, text):
+        """Yield (line, rule) for every non-empty line; rule is None for kept lines"""
+        for line in iter_lines(text):
+            line = line.strip()
+            if line:
+                yield line, self.matching_rule(line)
+
+    def iter_clean(self, text):
+        """Yield cleaned lines lazily"""
+        is_unwanted = self.is_unwanted
+        for line in iter_lines(text):
+            line = line.strip()
+            if line and not is_unwanted(line):
+                yield _WHITESPACE_RUN.sub(' ', line)
+
+    def clean(self, text):
+        cleaned = '\n'.join(self.iter_clean(text))
+        return cleaned if cleaned else NO_DESCRIPTION
+
+default_cleaner = TextCleaner()
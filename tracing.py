@@ -0,0 +1,265 @@
+# File: tracing.py
+# Per-stage spans for one analysis run (durations, bytes, tokens, cache
+# hits), exported as OpenTelemetry-style JSONL, plus optional cProfile /
+# tracemalloc capture
+
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import secrets
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from config import TRACE_ENABLED, TRACE_FILE, TRACE_MAX_MB, PROFILE_DIR
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    def __init__(self, trace, name, parent=None, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes or {})
+        self.start = time.time()
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, **counters):
+        """Increment numeric attributes (e.g. tokens, cache hits)"""
+        with self.trace.lock:
+            for name, value in counters.items():
+                self.attributes[name] = self.attributes.get(name, 0) + value
+
+    def end(self, duration=None):
+        self.duration = duration if duration is not None else time.time() - self.start
+
+    def to_otel(self):
+        start_ns = int(self.start * 1e9)
+        return {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": start_ns,
+            "endTimeUnixNano": start_ns + int((self.duration or 0) * 1e9),
+            "attributes": [{"key": k, "value": _otel_value(v)} for k, v in self.attributes.items()],
+        }
+
+class Trace:
+    """All spans of one run; spans from worker threads attach to it explicitly"""
+
+    def __init__(self, name, **attributes):
+        self.trace_id = secrets.token_hex(16)
+        self.lock = threading.Lock()
+        self.spans = []
+        self.profile = None
+        self.root = self.start_span(name, None, attributes)
+
+    def start_span(self, name, parent, attributes=None):
+        span = Span(self, name, parent, attributes)
+        with self.lock:
+            self.spans.append(span)
+        return span
+
+    def summary(self):
+        """Finished non-root spans as plain dicts, in start order"""
+        with self.lock:
+            spans = [s for s in self.spans if s is not self.root and s.duration is not None]
+        return [{"stage": s.name, "seconds": s.duration, **s.attributes}
+                for s in sorted(spans, key=lambda s: s.start)]
+
+    def write(self, path=TRACE_FILE, max_bytes=TRACE_MAX_MB * 1024 * 1024):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.lock:
+            lines = [json.dumps(s.to_otel()) for s in self.spans]
+        _rotate(path, max_bytes)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+def _rotate(path, max_bytes):
+    """Move a trace file past max_bytes to path.1 (0 = never rotate)"""
+    try:
+        if max_bytes and os.path.getsize(path) >= max_bytes:
+            os.replace(path, path + ".1")
+    except FileNotFoundError:
+        pass  # not written yet, or another process just rotated it
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+# Owner of spans opened outside any trace; they are never recorded
+_detached = Trace("detached")
+
+@contextmanager
+def start_trace(name, **attributes):
+    """Record a run; spans opened inside (in this thread) become its children"""
+    trace = Trace(name, **attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.end()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        if TRACE_ENABLED:
+            trace.write()
+
+@contextmanager
+def span(name, **attributes):
+    """Time a stage as a child of the current span; a no-op outside a trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield Span(_detached, name)
+        return
+    current = trace.start_span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.set(error=str(e))
+        raise
+    finally:
+        current.end()
+        _current_span.reset(token)
+
+def traced(name):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_span():
+    return _current_span.get()
+
+def annotate(**attributes):
+    """Set attributes on the current span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+def count(**counters):
+    """Increment counters on the current span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.add(**counters)
+
+def record_span(name, start, duration, **attributes):
+    """Add a span for work timed elsewhere (e.g. in a worker process)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        recorded = trace.start_span(name, _current_span.get(), attributes)
+        recorded.start = start
+        recorded.end(duration)
+
+def traced_stream(name, chunks, **attributes):
+    """Wrap a text stream in a span covering its consumption, with the
+    time to the first chunk and the number of characters"""
+    trace = _current_trace.get()
+    if trace is None:
+        return chunks
+    return _traced_chunks(trace, _current_span.get(), name, chunks, attributes)
+
+def _traced_chunks(trace, parent, name, chunks, attributes):
+    # Runs on the first next(), i.e. when the consumer starts reading
+    recorded = trace.start_span(name, parent, attributes)
+    chunks = iter(chunks)
+    chars = 0
+    try:
+        while True:
+            # The stream's own span is current while it produces a chunk,
+            # so trace_callbacks() inside a generator records on it
+            token = _current_span.set(recorded)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                _current_span.reset(token)
+            if not chars:
+                recorded.set(ttft=time.time() - recorded.start)
+            chars += len(chunk)
+            yield chunk
+    finally:
+        recorded.set(chars=chars)
+        recorded.end()
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Adds LLM token usage to the span that was current when it was made
+
+    The span is captured explicitly because LangChain may run callbacks on
+    other threads.
+    """
+
+    def __init__(self, target):
+        self.target = target
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                self.target.add(llm_calls=1,
+                                input_tokens=usage.get("input_tokens", 0),
+                                output_tokens=usage.get("output_tokens", 0))
+
+def trace_callbacks():
+    """LangChain callbacks that record token usage on the current span"""
+    current = _current_span.get()
+    return [TokenUsageHandler(current)] if current is not None else []
+
+@contextmanager
+def profile_run(trace, top=15, directory=PROFILE_DIR):
+    """cProfile (calling thread only) and tracemalloc for one run
+
+    The .prof file is written to `directory`; trace.profile gets the top
+    functions by cumulative time and the largest allocation sites.
+    """
+    profiler = cProfile.Profile()
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{trace.trace_id}.prof")
+        profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        trace.profile = {
+            "path": path,
+            "functions": out.getvalue(),
+            "peak_mb": peak / (1024 * 1024),
+            "allocations": [str(stat) for stat in snapshot.statistics("lineno")[:10]],
+        }
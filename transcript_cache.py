@@ -0,0 +1,81 @@
+# File: transcript_cache.py
+# Persistent cache of video transcripts keyed by media identity (content
+# hash or YouTube video id), Whisper model and transcription options
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from config import TRANSCRIPT_CACHE_ENABLED, CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB
+from disk_cache import DiskCache
+
+CHUNK_SIZE = 1 << 20
+
+_YOUTUBE_ID = re.compile(r'(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})')
+
+def youtube_id(url):
+    """The 11-character video id of a YouTube URL, or None"""
+    match = _YOUTUBE_ID.search(url)
+    return match.group(1) if match else None
+
+def hash_file(path, chunk_size=CHUNK_SIZE):
+    """SHA-256 of a file read in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def media_id(source):
+    """Stable identity of a media source: 'youtube:<id>' or 'sha256:<hash>'"""
+    if isinstance(source, str) and not os.path.isfile(source):
+        vid = youtube_id(source)
+        return f"youtube:{vid}" if vid else None
+    return f"sha256:{hash_file(source)}"
+
+class TranscriptCache:
+    """Transcripts by (media id, model, options), LRU-evicted by size"""
+
+    def __init__(self, path=None, max_bytes=TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024):
+        self.store = DiskCache(path or os.path.join(CACHE_DIR, "transcripts.sqlite3"),
+                               max_bytes=max_bytes)
+
+    @staticmethod
+    def key(media, model, options=None):
+        raw = json.dumps([media, model, options or {}], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, media, model, options=None):
+        """Cached transcript text or None"""
+        if media is None:
+            return None
+        entry = self.store.get(self.key(media, model, options))
+        return entry.value.decode("utf-8") if entry else None
+
+    def set(self, media, model, text, options=None):
+        if media is None:
+            return text
+        self.store.set(self.key(media, model, options), text.encode("utf-8"),
+                       {"media": media, "model": model, "options": options or {}})
+        return text
+
+    def get_metrics(self):
+        metrics = dict(self.store.stats)
+        metrics["entries"] = len(self.store)
+        metrics["bytes"] = self.store.total_bytes()
+        return metrics
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_transcript_cache():
+    """Process-wide cache instance, or None when caching is disabled"""
+    global _default_cache
+    if not TRANSCRIPT_CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = TranscriptCache()
+        return _default_cache
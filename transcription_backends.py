@@ -0,0 +1,67 @@
+# File: transcription_backends.py
+# Speech-to-text engines behind one interface: openai-whisper (default)
+# and faster-whisper (CTranslate2, int8 on CPU)
+
+from config import WHISPER_MODEL, TRANSCRIBE_BACKEND, TRANSCRIBE_THREADS, TRANSCRIBE_COMPUTE_TYPE
+from model_registry import use_faster_whisper_model, use_whisper_model
+
+class WhisperBackend:
+    """openai-whisper on PyTorch (fp32 on CPU)"""
+
+    name = "whisper"
+
+    def __init__(self, model_size=WHISPER_MODEL, threads=TRANSCRIBE_THREADS):
+        self.model_size = model_size
+        self.threads = threads
+
+    @property
+    def options(self):
+        """Settings that change the output text (part of transcript cache keys)"""
+        return {"backend": self.name}
+
+    def transcribe(self, audio):
+        """Transcribe a path or 16 kHz float32 array; returns {text, segments}"""
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+        with use_whisper_model(self.model_size) as model:
+            result = model.transcribe(audio, fp16=False)
+        return {
+            "text": result["text"].strip(),
+            "segments": [{"start": s["start"], "end": s["end"], "text": s["text"]}
+                         for s in result.get("segments", [])]
+        }
+
+class FasterWhisperBackend:
+    """faster-whisper (CTranslate2) with quantized weights on CPU"""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_size=WHISPER_MODEL, threads=TRANSCRIBE_THREADS,
+                 compute_type=TRANSCRIBE_COMPUTE_TYPE):
+        self.model_size = model_size
+        self.threads = threads
+        self.compute_type = compute_type
+
+    @property
+    def options(self):
+        return {"backend": self.name, "compute_type": self.compute_type}
+
+    def transcribe(self, audio):
+        with use_faster_whisper_model(self.model_size, self.compute_type, self.threads) as model:
+            segments, _ = model.transcribe(audio)
+            # segments is a lazy generator; decoding happens while iterating
+            segments = [{"start": s.start, "end": s.end, "text": s.text} for s in segments]
+        return {"text": "".join(s["text"] for s in segments).strip(), "segments": segments}
+
+_BACKENDS = {
+    'whisper': WhisperBackend,
+    'faster-whisper': FasterWhisperBackend,
+}
+
+def get_backend(name=None, model_size=WHISPER_MODEL, threads=TRANSCRIBE_THREADS):
+    """Return a transcription backend by name; models load lazily through the registry"""
+    name = name or TRANSCRIBE_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name} (choose from {', '.join(_BACKENDS)})")
+    return _BACKENDS[name](model_size, threads)
@@ -1,7 +1,6 @@
 # File: ui.py
 
 import streamlit as st
-from langchain.docstore.document import Document
 
 def setup_ui():
     st.set_page_config(
@@ -40,27 +39,74 @@ def sidebar_inputs():
                 placeholder="Type your custom proposal template here..."
             )
         
+        compare_tones = st.multiselect(
+            "Compare tones side by side", template_options[:-1],
+            help="Generate a proposal for each selected tone from the same analysis"
+        )
+
+        stream_output = st.checkbox("Stream responses", value=True,
+                                    help="Show the analysis and proposal as they are generated")
+        profile = st.checkbox("Profile this run",
+                              help="Capture cProfile and tracemalloc data for the next analysis")
         analyze_btn = st.button("Analyze Job", type="primary")
         
     # Return all sidebar inputs, including template selection
-    return job_url, video_input, uploaded_file, analyze_btn, selected_template, custom_template_text
+    return (job_url, video_input, uploaded_file, analyze_btn, selected_template,
+            custom_template_text, stream_output, compare_tones, profile)
+
+def display_results(analysis, proposal, sources, latencies=None):
+    """Render the report.
 
-def display_results(analysis, proposal, sources):
+    analysis is either the RAG result dict or an iterator of text chunks;
+    proposal is either the final text, a {tone: text} dict of proposals to
+    compare, or a callable that takes the finished analysis text and
+    returns an iterator of text chunks or such a dict. Streams are
+    rendered token by token as they arrive.
+    """
     st.subheader("🔬 Precision Analysis Report")
-    st.markdown(analysis["answer"])
+    if isinstance(analysis, dict):
+        analysis_text = analysis["answer"]
+        st.markdown(analysis_text)
+    else:
+        analysis_text = st.write_stream(analysis)
 
     st.markdown("---")
     st.subheader("📝 Laser-Targeted Proposal")
 
     tab1, tab2 = st.tabs(["Formatted View", "Plain Text"])
     with tab1:
-        st.markdown(proposal)
+        if callable(proposal):
+            proposal = proposal(analysis_text)
+            if not isinstance(proposal, dict):
+                proposal = st.write_stream(proposal)
+        elif not isinstance(proposal, dict):
+            st.markdown(proposal)
+        if isinstance(proposal, dict):
+            for column, (tone, text) in zip(st.columns(len(proposal)), proposal.items()):
+                with column:
+                    st.markdown(f"#### {tone}")
+                    if isinstance(text, Exception):
+                        st.error(f"Proposal failed: {text}")
+                    else:
+                        st.markdown(text)
     with tab2:
-        clean_proposal = proposal.replace("**", "").replace("*", "")
-        st.code(clean_proposal, language="text")
-        if st.button("📋 Copy Proposal"):
-            st.session_state.proposal = clean_proposal
-            st.success("Proposal copied to clipboard (in session).")
+        if isinstance(proposal, dict):
+            for tone, text in proposal.items():
+                if not isinstance(text, Exception):
+                    st.markdown(f"**{tone}**")
+                    st.code(text.replace("**", "").replace("*", ""), language="text")
+        else:
+            clean_proposal = proposal.replace("**", "").replace("*", "")
+            st.code(clean_proposal, language="text")
+            if st.button("📋 Copy Proposal"):
+                st.session_state.proposal = clean_proposal
+                st.success("Proposal copied to clipboard (in session).")
+
+    if latencies:
+        st.caption(" · ".join(
+            f"{l.stage}: first token {l.ttft:.2f}s, total {l.total:.2f}s"
+            for l in latencies if l.total is not None and l.ttft is not None
+        ))
 
     with st.expander("🔍 Full Source Materials"):
         st.subheader("Complete Job Post Analysis")
@@ -79,7 +125,38 @@ def display_results(analysis, proposal, sources):
             for doc in sources["job"]["documents"]:
                 st.markdown(f"- {doc}")
 
+        if sources.get("attachments"):
+            st.markdown("---")
+            st.subheader("Attachment Text")
+            for attachment in sources["attachments"]:
+                if attachment.get("text"):
+                    st.markdown(f"**{attachment['url']}** ({attachment['kind']}, "
+                                f"{len(attachment['text'])} characters)")
+                    st.markdown(f"```\n{attachment['text'][:2000]}\n```")
+                else:
+                    st.markdown(f"- {attachment['url']}: {attachment.get('error') or 'no text extracted'}")
+
         if sources["video"]:
             st.markdown("---")
             st.subheader("Full Video Transcript")
             st.markdown(f"```\n{sources['video']}\n```")
+
+def display_duplicate(duplicate):
+    """Note that the job reposts an earlier one, with the description diff"""
+    earlier = duplicate["title"] or duplicate["job_id"]
+    reuse = " — reusing its analysis" if duplicate["reusable"] else ""
+    st.info(f"♻️ {duplicate['similarity']:.0%} similar to an earlier job: {earlier}{reuse}")
+    with st.expander("Changes since the earlier posting"):
+        st.code(duplicate["diff"] or "No changes to the description", language="diff")
+
+def display_trace(trace):
+    """Per-stage timings (and profile, if captured) in a collapsed panel"""
+    with st.expander("⏱️ Stage Timings"):
+        stages = trace.summary()
+        st.dataframe([{**stage, "seconds": round(stage["seconds"], 3)} for stage in stages])
+        st.caption(f"Trace {trace.trace_id}")
+        if trace.profile:
+            st.markdown(f"**Profile** (peak traced memory {trace.profile['peak_mb']:.1f} MB, "
+                        f"saved to `{trace.profile['path']}`)")
+            st.code(trace.profile["functions"], language="text")
+            st.code("\n".join(trace.profile["allocations"]), language="text")
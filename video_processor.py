@@ -1,45 +1,104 @@
 # File: video_processor.py
 # Handles video processing and transcription
 
-import whisper
 from pytube import YouTube
+import hashlib
 import tempfile
 import os
+from media_stream import lowest_bitrate_audio, stream_audio
+from config import WHISPER_MODEL, LONG_MEDIA_THRESHOLD, LONG_MEDIA_SEGMENT_SECONDS
+from transcription_backends import get_backend
+from long_media import SAMPLE_RATE, get_chunked_transcriber, load_audio
+from transcript_cache import CHUNK_SIZE, get_transcript_cache, media_id
 
 class VideoProcessor:
-    def __init__(self):
-        self.model = whisper.load_model("base")
-        
+    def __init__(self, model_size=WHISPER_MODEL, on_segment=None, backend=None):
+        self.model_size = model_size
+        # Speech-to-text engine (see transcription_backends); the model
+        # itself is loaded on first use and shared through the registry
+        self.backend = get_backend(backend, model_size)
+        # Called with each long-media segment ({index, start, end, text, ...})
+        # as soon as it is transcribed
+        self.on_segment = on_segment
+
     def transcribe_video(self, video_input):
         """Handle both YouTube URLs and file uploads"""
         try:
             if isinstance(video_input, str) and ("youtube.com" in video_input or "youtu.be" in video_input):
                 return self._process_youtube(video_input)
+            elif isinstance(video_input, str) and os.path.isfile(video_input):
+                return self._process_path(video_input)
             else:
                 return self._process_file(video_input)
         except Exception as e:
             raise Exception(f"Video processing failed: {str(e)}")
+
+    @property
+    def options(self):
+        """Settings that change the transcript text, part of the cache key"""
+        return dict(self.backend.options,
+                    long_media=[LONG_MEDIA_THRESHOLD, LONG_MEDIA_SEGMENT_SECONDS])
+
+    def _cached(self, media, transcribe):
+        """Serve a transcript from the cache or produce and store it"""
+        cache = get_transcript_cache()
+        if cache is None:
+            return transcribe()
+        text = cache.get(media, self.model_size, self.options)
+        if text is None:
+            text = cache.set(media, self.model_size, transcribe(), self.options)
+        return text
+
+    def _transcribe(self, path):
+        """Transcribe a media file, splitting long media into parallel segments"""
+        return self._transcribe_audio(load_audio(path))
+
+    def _transcribe_audio(self, audio):
+        """Transcribe 16 kHz float32 samples"""
+        if LONG_MEDIA_THRESHOLD and len(audio) / SAMPLE_RATE > LONG_MEDIA_THRESHOLD:
+            transcriber = get_chunked_transcriber(self.model_size, backend=self.backend.name)
+            return transcriber.transcribe(audio, on_segment=self.on_segment)["text"]
+        return self.backend.transcribe(audio)["text"]
     
     def _process_youtube(self, url):
         try:
-            yt = YouTube(url)
-            audio_stream = yt.streams.filter(only_audio=True).first()
-            temp_dir = tempfile.gettempdir()
-            temp_file = audio_stream.download(output_path=temp_dir)
-            result = self.model.transcribe(temp_file)
-            os.remove(temp_file)
-            return result["text"]
+            return self._cached(media_id(url), lambda: self._download_youtube(url))
         except Exception as e:
             raise Exception(f"YouTube processing error: {str(e)}")
     
+    def _download_youtube(self, url):
+        # The smallest audio-only stream is decoded by ffmpeg while it
+        # downloads; no media file touches the disk
+        audio_stream = lowest_bitrate_audio(YouTube(url).streams)
+        return self._transcribe_audio(stream_audio(audio_stream.url))
+
+    def _process_path(self, path):
+        try:
+            return self._cached(media_id(path), lambda: self._transcribe(path))
+        except Exception as e:
+            raise Exception(f"File processing error: {str(e)}")
+
     def _process_file(self, file):
         try:
-            with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
-                tmp.write(file.getbuffer())
-                tmp_path = tmp.name
-                
-            result = self.model.transcribe(tmp_path)
-            os.unlink(tmp_path)
-            return result["text"]
+            digest = hashlib.sha256()
+            tmp_path = save_upload(file, digest)
+            try:
+                return self._cached(f"sha256:{digest.hexdigest()}",
+                                    lambda: self._transcribe(tmp_path))
+            finally:
+                os.unlink(tmp_path)
         except Exception as e:
             raise Exception(f"File processing error: {str(e)}")
+
+def save_upload(file, digest=None):
+    """Stream an uploaded file to a temporary path in chunks (caller deletes
+    it), feeding the bytes to `digest` on the way if given"""
+    suffix = os.path.splitext(getattr(file, "name", ""))[1] or ".mp4"
+    if hasattr(file, "seek"):
+        file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        for block in iter(lambda: file.read(CHUNK_SIZE), b""):
+            if digest is not None:
+                digest.update(block)
+            tmp.write(block)
+        return tmp.name